@@ -2,35 +2,88 @@ from flask import Flask, render_template, request, redirect, url_for, flash, jso
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_wtf import FlaskForm, CSRFProtect
+from flask_wtf.csrf import generate_csrf
 from wtforms import StringField, PasswordField, BooleanField, TextAreaField
 from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError
 import re
-from database import Database
+from database import EXPLORE_SORTS, Database, normalize_tags
 from bson.objectid import ObjectId
 from PIL import Image
 import os
 from datetime import timedelta, datetime
+from collections import namedtuple
 import stripe
 import uuid
 from object_storage import ObjectStorageService
+from cache import TTLCache, PageCache
+from subscriptions import apply_subscription_event, reconcile_subscriptions, sync_subscription
+from webhooks import StripeEventWorker
+from asset_pipeline import init_assets
+from request_stats import init_request_stats
+from metrics import init_metrics
+from query_diagnostics import init_query_diagnostics
+from rate_limit import TRUSTED_PROXY_HOPS, init_rate_limits
+from list_transfer import FORMATS as TRANSFER_FORMATS, ImportReport, export_csv, export_ndjson, parse_csv, parse_ndjson
 import io
+import json
+import time
 
 app = Flask(__name__)
+# request.remote_addr is the client, not the proxy in front of us
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
 app.config['SECRET_KEY'] = os.getenv('SESSION_SECRET', 'dev-secret-key-change-in-production')
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=7)
+LIST_IMPORT_MAX_BYTES = int(os.getenv('LIST_IMPORT_MAX_MB', 20)) * 1024 * 1024
+
+init_metrics(app)
+
+# Must run before CSRFProtect reads the form, which applies the size limit
+@app.before_request
+def allow_large_imports():
+    if request.endpoint == 'import_lists':
+        request.max_content_length = LIST_IMPORT_MAX_BYTES
 
 csrf = CSRFProtect(app)
 db = Database()
+init_assets(app)
+init_request_stats(app)
+init_query_diagnostics(app)
+rate_limiter = init_rate_limits(app, db)
+
+# Shared, non-personalized /api/explore pages; per-user flags are overlaid per request
+explore_cache = TTLCache(ttl=int(os.getenv('EXPLORE_CACHE_TTL', 30)))
+
+# Hot username prefixes typed into the collaborator picker
+user_search_cache = TTLCache(ttl=60, max_entries=2048)
+
+# Rendered view_list HTML for anonymous viewers, keyed by list id and updated_at
+list_page_cache = PageCache(max_bytes=int(os.getenv('LIST_PAGE_CACHE_MB', 32)) * 1024 * 1024)
+CSRF_TOKEN_PLACEHOLDER = '__csrf_token_placeholder__'
+# Cached pages embed a CSRF token, so their ETags rotate before the token expires
+PAGE_ETAG_ROTATION_SECONDS = 1800
 
 stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
+stripe_event_worker = StripeEventWorker(db, lambda event: apply_subscription_event(db, event))
+
+# Started by the first request each process serves, not by the first
+# webhook, so events left queued or backing off across a restart still run
+@app.before_request
+def start_stripe_event_worker():
+    stripe_event_worker.ensure_started()
 
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+DASHBOARD_PAGE_SIZE = 24
+TREE_PAGE_SIZE = 50
+TREE_MAX_DEPTH = 10
+VOCABULARY_LIMIT = 5000
+
 class User(UserMixin):
     def __init__(self, user_dict):
         self.id = str(user_dict['_id'])
@@ -112,38 +165,46 @@ class ListForm(FlaskForm):
 def make_session_permanent():
     session.permanent = True
 
+@app.after_request
+def invalidate_list_page_cache(response):
+    if request.method != 'GET' and response.status_code < 400:
+        if request.endpoint == 'delete_list':
+            # Parents and re-parented children render the deleted list's lineage
+            list_page_cache.invalidate()
+        elif request.view_args and 'list_id' in request.view_args:
+            list_page_cache.invalidate(request.view_args['list_id'])
+    return response
+
 @app.errorhandler(413)
 def request_entity_too_large(error):
+    if request.path.startswith('/api/'):
+        return jsonify({'success': False, 'message': 'Upload too large'}), 413
     flash('File too large! Maximum size is 500KB. Please choose a smaller image.', 'error')
     return redirect(request.referrer or url_for('index'))
 
 @app.route('/')
 def index():
     if current_user.is_authenticated:
-        my_lists = db.get_lists_by_owner(current_user.id)
-        favorited_lists = db.get_favorited_lists(current_user.id)
-        collaborated_lists = db.get_collaborated_lists(current_user.id)
-        
-        for lst in my_lists:
-            lst['is_favorited'] = db.is_favorited(current_user.id, str(lst['_id']))
-            lst['clone_count'] = lst.get('clone_count', 0)
-        
-        for lst in favorited_lists:
-            owner = db.get_user_by_id(str(lst['owner_id']))
-            lst['owner_username'] = owner['username'] if owner else 'Unknown'
-            lst['is_favorited'] = True
-            lst['clone_count'] = lst.get('clone_count', 0)
+        pages = {
+            'owned_page': max(1, request.args.get('owned_page', 1, type=int)),
+            'favorites_page': max(1, request.args.get('favorites_page', 1, type=int)),
+            'collaborated_page': max(1, request.args.get('collaborated_page', 1, type=int))
+        }
+        dashboard = db.get_dashboard(current_user.id, per_page=DASHBOARD_PAGE_SIZE, **pages)
         
-        for lst in collaborated_lists:
-            owner = db.get_user_by_id(str(lst['owner_id']))
-            lst['owner_username'] = owner['username'] if owner else 'Unknown'
-            lst['is_favorited'] = db.is_favorited(current_user.id, str(lst['_id']))
-            lst['clone_count'] = lst.get('clone_count', 0)
+        def total_pages(section):
+            return max(1, -(-dashboard[section]['total'] // DASHBOARD_PAGE_SIZE))
         
         return render_template('index.html', 
-                             my_lists=my_lists, 
-                             favorited_lists=favorited_lists,
-                             collaborated_lists=collaborated_lists,
+                             my_lists=dashboard['owned']['lists'], 
+                             favorited_lists=dashboard['favorited']['lists'],
+                             collaborated_lists=dashboard['collaborated']['lists'],
+                             pages=pages,
+                             total_pages={
+                                 'owned_page': total_pages('owned'),
+                                 'favorites_page': total_pages('favorited'),
+                                 'collaborated_page': total_pages('collaborated')
+                             },
                              theme=current_user.preferences.get('theme', 'dark'))
     return render_template('landing.html')
 
@@ -302,6 +363,7 @@ def create_list():
             is_ordered=is_ordered,
             show_numbering=show_numbering
         )
+        explore_cache.invalidate()
         
         flash('List created successfully!', 'success')
         return redirect(url_for('view_list', list_id=str(list_id)))
@@ -310,6 +372,38 @@ def create_list():
 
 @app.route('/lists/<list_id>')
 def view_list(list_id):
+    if not current_user.is_authenticated and '_flashes' not in session:
+        list_meta = db.get_list_version(list_id)
+        if list_meta and list_meta['is_public']:
+            return serve_cached_list_page(list_id, list_meta)
+    return render_list_page(list_id)
+
+def serve_cached_list_page(list_id, list_meta):
+    # Every field the page renders, so other workers' copies go stale too
+    cache_key = (
+        list_id,
+        list_meta.get('updated_at'),
+        list_meta.get('favorite_count', 0),
+        list_meta.get('clone_count', 0),
+        list_meta.get('parent_id'),
+        list_meta.get('owner_username'),
+        request.url
+    )
+    page = list_page_cache.get(cache_key)
+    if page is None:
+        started = time.perf_counter()
+        rendered = render_list_page(list_id, csrf_token=lambda: CSRF_TOKEN_PLACEHOLDER)
+        if not isinstance(rendered, str):
+            return rendered
+        page = list_page_cache.put(cache_key, rendered, time.perf_counter() - started)
+    
+    response = Response(page.html.replace(CSRF_TOKEN_PLACEHOLDER, generate_csrf()), mimetype='text/html')
+    response.set_etag(f'{page.fingerprint}-{int(time.time() // PAGE_ETAG_ROTATION_SECONDS)}')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
+def render_list_page(list_id, **template_overrides):
     list_doc = db.get_list_by_id(list_id)
     if not list_doc:
         flash('List not found', 'error')
@@ -331,6 +425,7 @@ def view_list(list_id):
     
     owner = db.get_user_by_id(str(list_doc['owner_id']))
     list_doc['owner_username'] = owner['username'] if owner else 'Unknown'
+    list_doc['items'] = db.run_items(list_doc)
     
     is_favorited = False
     if current_user.is_authenticated:
@@ -353,7 +448,8 @@ def view_list(list_id):
                          parent_list=parent_list,
                          clone_count=clone_count,
                          theme=theme,
-                         adsense_publisher_id=adsense_publisher_id)
+                         adsense_publisher_id=adsense_publisher_id,
+                         **template_overrides)
 
 @app.route('/lists/<list_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -398,6 +494,7 @@ def edit_list(list_id):
                     flash(f'Error uploading image: {str(e)}', 'error')
         
         db.update_list(list_id, **update_data)
+        explore_cache.invalidate()
         flash('List updated successfully!', 'success')
         return redirect(url_for('view_list', list_id=list_id))
     
@@ -438,6 +535,7 @@ def clone_list(list_id):
     
     cloned_list_id = db.clone_list(list_id, current_user.id)
     if cloned_list_id:
+        explore_cache.invalidate()
         flash('List cloned successfully!', 'success')
         return redirect(url_for('view_list', list_id=str(cloned_list_id)))
     else:
@@ -450,6 +548,7 @@ def delete_list(list_id):
     list_doc = db.get_list_by_id(list_id)
     if can_manage_list(list_doc):
         db.delete_list(list_id)
+        explore_cache.invalidate()
         flash('List deleted successfully', 'success')
     else:
         flash('List not found or access denied', 'error')
@@ -513,7 +612,14 @@ def toggle_item(list_id, item_id):
     if not list_doc['is_public'] and not is_owner and not is_collaborator:
         return jsonify({'success': False, 'message': 'Access denied'}), 403
     
-    success, message = db.toggle_item_checked(list_id, item_id)
+    # Clients send the state they want so a retried request is harmless;
+    # without it the item's current state is flipped
+    data = request.get_json(silent=True) or {}
+    checked = data.get('checked')
+    if checked is not None:
+        checked = bool(checked)
+    
+    success, message = db.toggle_item_checked(list_id, item_id, checked)
     return jsonify({'success': success, 'message': message})
 
 @app.route('/api/lists/<list_id>/items/<item_id>/quantity', methods=['POST'])
@@ -533,7 +639,7 @@ def adjust_quantity(list_id, item_id):
     
     list_doc = db.get_list_by_id(list_id)
     new_quantity = 1
-    for item in list_doc.get('items', []):
+    for item in db.run_items(list_doc):
         if str(item['_id']) == str(item_id):
             new_quantity = item.get('quantity', 1)
             break
@@ -638,6 +744,38 @@ def autocomplete():
     suggestions = db.get_autocomplete_suggestions(current_user.id, query)
     return jsonify(suggestions)
 
+@app.route('/api/vocabulary')
+@login_required
+def vocabulary():
+    version = db.get_vocabulary_version(current_user.id)
+    etag = f'{current_user.id}-{version:%Y%m%d%H%M%S%f}' if version else f'{current_user.id}-empty'
+    # Revalidation costs one indexed lookup; the vocabulary is only read when it changed
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        items = db.get_vocabulary(current_user.id, VOCABULARY_LIMIT)
+        response = jsonify({'items': items, 'complete': len(items) < VOCABULARY_LIMIT})
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/api/tags')
+def api_tags():
+    prefix = request.args.get('q', '')
+    limit = min(max(1, request.args.get('limit', 10, type=int)), 50)
+    tags = db.get_tag_suggestions(prefix, limit=limit)
+    return jsonify({'tags': [{'tag': tag['_id'], 'count': max(0, tag['count'])} for tag in tags]})
+
+@app.route('/api/tags/facets')
+def api_tag_facets():
+    tags_param = request.args.get('tags', '')
+    selected = normalize_tags(tags_param.split(','))
+    facets = explore_cache.get_or_compute(
+        ('tag_facets', tuple(selected)),
+        lambda: db.get_tag_facets(selected)
+    )
+    return jsonify({'facets': facets})
+
 @app.route('/api/lists/<list_id>/sections', methods=['POST'])
 @login_required
 def create_section(list_id):
@@ -761,6 +899,51 @@ def api_children(list_id):
             })
     return jsonify({'children': result})
 
+@app.route('/api/lists/<list_id>/tree')
+def api_tree(list_id):
+    list_doc = db.get_list_by_id(list_id)
+    if not list_doc:
+        return jsonify({'error': 'List not found'}), 404
+    
+    is_owner = current_user.is_authenticated and str(list_doc['owner_id']) == current_user.id
+    is_collaborator = current_user.is_authenticated and db.is_collaborator(current_user.id, list_id)
+    
+    if not list_doc['is_public'] and not is_owner and not is_collaborator:
+        return jsonify({'error': 'Access denied'}), 403
+    
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(max(1, request.args.get('per_page', TREE_PAGE_SIZE, type=int)), TREE_PAGE_SIZE)
+    max_depth = min(max(1, request.args.get('max_depth', TREE_MAX_DEPTH, type=int)), TREE_MAX_DEPTH)
+    
+    tree = db.get_descendant_tree(
+        list_doc,
+        viewer_id=current_user.id if current_user.is_authenticated else None,
+        max_depth=max_depth,
+        skip=(page - 1) * per_page,
+        limit=per_page
+    )
+    usernames = db.get_usernames_by_ids({lst['owner_id'] for lst in tree['lists']})
+    
+    return jsonify({
+        'id': str(list_doc['_id']),
+        'name': list_doc['name'],
+        'depth': len(list_doc.get('ancestors', [])),
+        'ancestors': [str(ancestor_id) for ancestor_id in list_doc.get('ancestors', [])],
+        'total': tree['total'],
+        'depth_counts': {str(depth): count for depth, count in tree['depth_counts'].items()},
+        'page': page,
+        'per_page': per_page,
+        'total_pages': max(1, -(-tree['total'] // per_page)),
+        'descendants': [{
+            'id': str(lst['_id']),
+            'name': lst['name'],
+            'parent_id': str(lst['parent_id']),
+            'depth': lst['depth'],
+            'owner_username': usernames.get(lst['owner_id'], 'Unknown'),
+            'clone_count': lst['clone_count']
+        } for lst in tree['lists']]
+    })
+
 @app.route('/api/lists/<list_id>')
 def api_get_list(list_id):
     list_doc = db.get_list_by_id(list_id)
@@ -773,54 +956,116 @@ def api_get_list(list_id):
     if not list_doc['is_public'] and not is_owner and not is_collaborator:
         return jsonify({'success': False, 'error': 'Access denied'}), 403
     
-    items = list_doc.get('items', [])
-    items_result = []
-    for item in items:
-        items_result.append({
-            '_id': str(item['_id']),
-            'text': item.get('text', ''),
-            'checked': item.get('checked', False),
-            'quantity': item.get('quantity', 1),
-            'section': item.get('section'),
-            'order': item.get('order')
-        })
+    return jsonify(list_items_payload(list_doc))
+
+@app.route('/api/lists/<list_id>/changes')
+def api_list_changes(list_id):
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        return jsonify({'success': False, 'error': 'since must be a list version'}), 400
     
-    empty_sections = list_doc.get('empty_sections', [])
+    list_doc = db.get_list_by_id(list_id)
+    if not list_doc:
+        return jsonify({'success': False, 'error': 'List not found'}), 404
     
-    return jsonify({'success': True, 'items': items_result, 'empty_sections': empty_sections})
-
-@app.route('/api/explore')
-def api_explore():
-    search_query = request.args.get('q', '')
-    tags_param = request.args.get('tags', '')
-    skip = int(request.args.get('skip', 0))
-    limit = int(request.args.get('limit', 10))
+    is_owner = current_user.is_authenticated and str(list_doc['owner_id']) == current_user.id
+    is_collaborator = current_user.is_authenticated and db.is_collaborator(current_user.id, list_id)
     
-    tags = [tag.strip() for tag in tags_param.split(',') if tag.strip()]
+    if not list_doc['is_public'] and not is_owner and not is_collaborator:
+        return jsonify({'success': False, 'error': 'Access denied'}), 403
     
-    public_lists = db.get_public_lists_paginated(search_query, tags if tags else None, skip=skip, limit=limit)
+    version = list_doc.get('version', 0)
+    changed_ids = db.get_changed_item_ids(list_doc, since)
+    if changed_ids is None:
+        return jsonify({'success': True, 'resync': True, 'version': version})
+    
+    # Changed items still in the run are sent whole; the rest were removed
+    items = [item_payload(item) for item in db.run_items(list_doc) if item['_id'] in changed_ids]
+    present = {item['_id'] for item in items}
+    removed = [str(item_id) for item_id in changed_ids if str(item_id) not in present]
+    return jsonify({
+        'success': True,
+        'resync': False,
+        'version': version,
+        'items': items,
+        'removed': removed,
+        'empty_sections': list_doc.get('empty_sections', [])
+    })
+
+def item_payload(item):
+    return {
+        '_id': str(item['_id']),
+        'text': item.get('text', ''),
+        'checked': item.get('checked', False),
+        'quantity': item.get('quantity', 1),
+        'section': item.get('section'),
+        'order': item.get('order')
+    }
+
+def list_items_payload(list_doc):
+    items_result = [item_payload(item) for item in db.run_items(list_doc)]
     
-    result = []
-    for lst in public_lists:
-        owner = db.get_user_by_id(str(lst['owner_id']))
-        list_data = {
-            'id': str(lst['_id']),
-            'name': lst['name'],
-            'thumbnail_url': lst.get('thumbnail_url', ''),
-            'is_ethereal': lst.get('is_ethereal', False),
-            'owner_username': owner['username'] if owner else 'Unknown',
-            'tags': lst.get('tags', []),
-            'is_favorited': False,
-            'clone_count': lst.get('clone_count', 0),
-            'updated_at': lst.get('updated_at').isoformat() if lst.get('updated_at') else None
-        }
-        
-        if current_user.is_authenticated:
-            list_data['is_favorited'] = db.is_favorited(current_user.id, str(lst['_id']))
-        
-        result.append(list_data)
+    empty_sections = list_doc.get('empty_sections', [])
     
-    return jsonify({'lists': result, 'has_more': len(result) == limit})
+    return {
+        'success': True,
+        'version': list_doc.get('version', 0),
+        'items': items_result,
+        'empty_sections': empty_sections
+    }
+
+# An explore page request; also its key in explore_cache
+ExploreQuery = namedtuple('ExploreQuery', ['search_query', 'tags', 'skip', 'limit', 'sort'])
+
+def parse_explore_query(args):
+    """(ExploreQuery, None) from /api/explore's arguments, or (None, error).
+    
+    Shared with the ASGI route, so both servers key the cache alike.
+    """
+    sort = args.get('sort', 'recent')
+    if sort not in EXPLORE_SORTS:
+        return None, f'sort must be one of: {", ".join(EXPLORE_SORTS)}'
+    tags = tuple(tag.strip() for tag in args.get('tags', '').split(',') if tag.strip())
+    return ExploreQuery(args.get('q', ''), tags, int(args.get('skip', 0)), int(args.get('limit', 10)), sort), None
+
+def explore_payload(query, shared, favorited_ids):
+    """The cached cards with the caller's favorites marked."""
+    result = [dict(lst, is_favorited=lst['id'] in favorited_ids) for lst in shared]
+    return {'lists': result, 'has_more': len(result) == query.limit}
+
+@app.route('/api/explore')
+def api_explore():
+    query, error = parse_explore_query(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    shared = explore_cache.get_or_compute(query, lambda: build_explore_page(*query))
+    
+    favorited_ids = set()
+    if current_user.is_authenticated and shared:
+        favorited_ids = db.get_favorited_list_ids(current_user.id, [lst['id'] for lst in shared])
+    
+    return jsonify(explore_payload(query, shared, favorited_ids))
+
+def build_explore_page(search_query, tags, skip, limit, sort='recent'):
+    public_lists = db.get_public_lists_paginated(search_query, tags if tags else None, skip=skip, limit=limit, sort=sort)
+    usernames = db.get_usernames_by_ids({lst['owner_id'] for lst in public_lists})
+    return [explore_card(lst, usernames.get(lst['owner_id'], 'Unknown')) for lst in public_lists]
+
+def explore_card(lst, owner_username):
+    return {
+        'id': str(lst['_id']),
+        'name': lst['name'],
+        'thumbnail_url': lst.get('thumbnail_url', ''),
+        'is_ethereal': lst.get('is_ethereal', False),
+        'owner_username': owner_username,
+        'tags': lst.get('tags', []),
+        'clone_count': lst.get('clone_count', 0),
+        'favorite_count': lst.get('favorite_count', 0),
+        'item_count': lst['item_count'],
+        'checked_count': lst['checked_count'],
+        'updated_at': lst.get('updated_at').isoformat() if lst.get('updated_at') else None
+    }
 
 @app.route('/api/favorite/<list_id>', methods=['POST'])
 @login_required
@@ -828,11 +1073,11 @@ def toggle_favorite(list_id):
     is_favorited = db.is_favorited(current_user.id, list_id)
     
     if is_favorited:
-        db.remove_favorite(current_user.id, list_id)
-        return jsonify({'success': True, 'favorited': False})
+        favorite_count = db.remove_favorite(current_user.id, list_id)
+        return jsonify({'success': True, 'favorited': False, 'favorite_count': favorite_count})
     else:
-        success = db.add_favorite(current_user.id, list_id)
-        return jsonify({'success': success, 'favorited': True})
+        favorite_count = db.add_favorite(current_user.id, list_id)
+        return jsonify({'success': favorite_count is not None, 'favorited': True, 'favorite_count': favorite_count})
 
 @app.route('/create-subscription-session', methods=['POST'])
 @login_required
@@ -899,6 +1144,7 @@ def subscription_success():
                 is_ad_free=True,
                 subscription_start=datetime.utcnow()
             )
+            sync_subscription(db, current_user.id, stripe.Subscription.retrieve(subscription_id))
             
             flash('Subscription activated! Ads have been removed.', 'success')
         except Exception as e:
@@ -961,24 +1207,11 @@ def stripe_webhook():
     except stripe.error.SignatureVerificationError:
         return jsonify({'error': 'Invalid signature'}), 400
     
-    if event['type'] == 'customer.subscription.deleted':
-        subscription = event['data']['object']
-        customer_id = subscription['customer']
-        
-        user_dict = db.get_user_by_stripe_customer_id(customer_id)
-        if user_dict:
-            db.cancel_user_subscription(str(user_dict['_id']))
-    
-    elif event['type'] == 'customer.subscription.updated':
-        subscription = event['data']['object']
-        customer_id = subscription['customer']
-        
-        user_dict = db.get_user_by_stripe_customer_id(customer_id)
-        if user_dict:
-            is_active = subscription['status'] in ['active', 'trialing']
-            if not is_active:
-                db.cancel_user_subscription(str(user_dict['_id']))
+    # Acknowledge right away; the worker applies the event in the background
+    if not db.record_stripe_event(json.loads(payload)):
+        return jsonify({'status': 'duplicate', 'event': event['id']}), 200
     
+    stripe_event_worker.wake()
     return jsonify({'status': 'success'}), 200
 
 @app.route('/api/users/<user_id>')
@@ -996,7 +1229,10 @@ def search_users():
     if not query or len(query) < 2:
         return jsonify({'users': []})
     
-    users = db.search_users_by_username(query, limit=5)
+    users = user_search_cache.get_or_compute(
+        query.lower(),
+        lambda: db.search_users_by_username(query, limit=5)
+    )
     return jsonify({'users': users})
 
 @app.route('/api/lists/<list_id>/collaborators', methods=['POST'])
@@ -1046,17 +1282,14 @@ def settings():
     user_dict = db.get_user_by_id(current_user.id)
     subscription = user_dict.get('subscription', {})
     
+    # Mirrored from Stripe by the webhook and reconcile-subscriptions
     subscription_info = None
-    if subscription.get('stripe_subscription_id'):
-        try:
-            stripe_sub = stripe.Subscription.retrieve(subscription['stripe_subscription_id'])
-            subscription_info = {
-                'status': stripe_sub.status,
-                'current_period_end': datetime.fromtimestamp(stripe_sub.current_period_end),
-                'cancel_at_period_end': stripe_sub.cancel_at_period_end
-            }
-        except:
-            subscription_info = None
+    if subscription.get('stripe_subscription_id') and subscription.get('current_period_end'):
+        subscription_info = {
+            'status': subscription.get('status'),
+            'current_period_end': subscription['current_period_end'],
+            'cancel_at_period_end': subscription.get('cancel_at_period_end', False)
+        }
     
     theme = current_user.preferences.get('theme', 'dark')
     return render_template('settings.html', 
@@ -1064,6 +1297,54 @@ def settings():
                          subscription_info=subscription_info,
                          theme=theme)
 
+@app.route('/api/export')
+@login_required
+def export_lists():
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in TRANSFER_FORMATS:
+        return jsonify({'success': False, 'message': 'Format must be ndjson or csv'}), 400
+    
+    lists = db.iter_lists_for_export(current_user.id)
+    body = export_ndjson(lists) if export_format == 'ndjson' else export_csv(lists)
+    filename = f'listpoint-lists-{datetime.utcnow():%Y%m%d}.{export_format}'
+    return Response(
+        body,
+        mimetype=TRANSFER_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"', 'Cache-Control': 'no-store'}
+    )
+
+@app.route('/api/import', methods=['POST'])
+@login_required
+def import_lists():
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'success': False, 'message': 'Choose a file to import'}), 400
+    
+    import_format = request.form.get('format') or os.path.splitext(upload.filename)[1].lstrip('.').lower()
+    if import_format in ('json', 'jsonl'):
+        import_format = 'ndjson'
+    if import_format not in TRANSFER_FORMATS:
+        return jsonify({'success': False, 'message': 'Format must be ndjson or csv'}), 400
+    
+    # Parsed line by line straight from the upload
+    lines = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    report = ImportReport(parse_ndjson(lines) if import_format == 'ndjson' else parse_csv(lines))
+    try:
+        imported = db.import_lists(current_user.id, report.records())
+    except UnicodeDecodeError:
+        return jsonify({'success': False, 'message': 'The file must be UTF-8 text'}), 400
+    
+    if imported:
+        explore_cache.invalidate()
+    
+    return jsonify({
+        'success': True,
+        'message': f'Imported {imported} lists' + (f', skipped {report.skipped}' if report.skipped else ''),
+        'imported': imported,
+        'skipped': report.skipped,
+        'errors': report.errors
+    })
+
 @app.route('/objects/<path:object_path>')
 def serve_object(object_path):
     try:
@@ -1084,9 +1365,40 @@ def admin_users():
         flash('Access denied. Admin privileges required.', 'error')
         return redirect(url_for('index'))
     
-    users = db.get_all_users()
+    search = request.args.get('q', '').strip()
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = 50
+    
+    users, total = db.get_users_page(search=search or None, page=page, per_page=per_page)
+    total_pages = max(1, -(-total // per_page))
     theme = current_user.preferences.get('theme', 'dark')
-    return render_template('admin_users.html', users=users, theme=theme)
+    return render_template('admin_users.html',
+                         users=users,
+                         search=search,
+                         page=page,
+                         total=total,
+                         total_pages=total_pages,
+                         theme=theme)
+
+@app.route('/admin/cache-stats')
+@login_required
+def admin_cache_stats():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+    
+    return jsonify({
+        'explore': explore_cache.stats(),
+        'list_pages': list_page_cache.stats(),
+        'rate_limits': rate_limiter.stats() if rate_limiter else None
+    })
+
+@app.route('/admin/db-stats')
+@login_required
+def admin_db_stats():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+    
+    return jsonify({'pool': db.pool_stats.as_dict()})
 
 @app.route('/admin/user/<user_id>')
 @login_required
@@ -1155,6 +1467,51 @@ def manage_user_group(user_id):
     
     return jsonify({'success': success})
 
+@app.cli.command('create-indexes')
+def create_indexes_command():
+    db._create_indexes()
+    print('Indexes created')
+
+@app.cli.command('backfill-user-search-keys')
+def backfill_user_search_keys_command():
+    updated = db.backfill_user_search_keys()
+    print(f'Backfilled username_lower/email_lower on {updated} users')
+
+@app.cli.command('backfill-ancestors')
+def backfill_ancestors_command():
+    updated = db.backfill_ancestors()
+    print(f'Backfilled ancestors on {updated} lists')
+
+@app.cli.command('migrate-checked-state')
+def migrate_checked_state_command():
+    migrated = db.migrate_checked_state()
+    print(f'Migrated checked state on {migrated} lists')
+
+@app.cli.command('rebuild-tag-stats')
+def rebuild_tag_stats_command():
+    normalized = db.rebuild_tag_stats()
+    print(f'Normalized tags on {normalized} lists and rebuilt tag_stats')
+
+@app.cli.command('reconcile-favorite-counts')
+def reconcile_favorite_counts_command():
+    repaired = db.reconcile_favorite_counts()
+    print(f'Repaired favorite_count on {repaired} lists')
+
+@app.cli.command('decay-popularity')
+def decay_popularity_command():
+    updated = db.decay_popularity()
+    print(f'Decayed popularity on {updated} lists')
+
+@app.cli.command('process-stripe-events')
+def process_stripe_events_command():
+    processed = stripe_event_worker.run_pending()
+    print(f'Processed {processed} Stripe events')
+
+@app.cli.command('reconcile-subscriptions')
+def reconcile_subscriptions_command():
+    synced, cancelled = reconcile_subscriptions(db)
+    print(f'Reconciled subscriptions: {synced} synced, {cancelled} cancelled')
+
 if __name__ == '__main__':
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     app.run(host='0.0.0.0', port=5000, debug=True)
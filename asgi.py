@@ -0,0 +1,176 @@
+"""Async serving mode.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+
+The I/O-bound read routes below run as coroutines on pymongo's asyncio
+client, so one worker can hold many slow Mongo or object storage calls
+in flight. Every other URL is handed to the unchanged Flask app in a
+thread pool, which keeps sessions, CSRF and the sync routes working as
+they do under gunicorn.
+"""
+from contextlib import asynccontextmanager
+import os
+
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Mount, Route
+
+from app import app as flask_app, explore_card, explore_cache, explore_payload, list_items_payload, parse_explore_query, rate_limiter
+from async_database import AsyncDatabase
+from object_storage import ObjectStorageService
+from rate_limit import TOO_MANY_REQUESTS, client_key, forwarded_client, limited_endpoint, retry_after_header
+
+adb = AsyncDatabase()
+flask_wsgi = WSGIMiddleware(flask_app, workers=int(os.getenv('ASGI_WSGI_THREADS', 10)))
+
+
+def session_user_id(request):
+    """The logged-in user's id from Flask's signed session cookie, if any."""
+    cookie = request.cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if not cookie:
+        return None
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    try:
+        session = serializer.loads(cookie, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return None
+    return session.get('_user_id')
+
+
+def needs_flask_login(request):
+    # A remember-me cookie without a session is restored by Flask-Login
+    return session_user_id(request) is None and 'remember_token' in request.cookies
+
+
+class FlaskFallback:
+    """ASGI endpoint that hands the request to Flask when `handler` returns None."""
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    async def __call__(self, scope, receive, send):
+        response = await self.handler(Request(scope, receive))
+        if response is None:
+            await flask_wsgi(scope, receive, send)
+        else:
+            await response(scope, receive, send)
+
+
+async def throttle(request, endpoint, user_id):
+    """The 429 response when the caller's bucket for `endpoint` is empty."""
+    if rate_limiter is None:
+        return None
+    endpoint = limited_endpoint(endpoint, request.query_params.get('q'))
+    if endpoint is None:
+        return None
+    remote_addr = request.client.host if request.client else None
+    client = client_key(user_id, forwarded_client(remote_addr, request.headers.get('x-forwarded-for')))
+    if rate_limiter.buckets.shared:
+        retry_after = await run_in_threadpool(rate_limiter.check, endpoint, client)
+    else:
+        retry_after = rate_limiter.check(endpoint, client)
+    if not retry_after:
+        return None
+    return JSONResponse(
+        TOO_MANY_REQUESTS,
+        status_code=429,
+        headers={'Retry-After': retry_after_header(retry_after)}
+    )
+
+
+async def api_get_list(request):
+    if needs_flask_login(request):
+        return None
+    list_id = request.path_params['list_id']
+    list_doc = await adb.get_list_by_id(list_id)
+    if not list_doc:
+        return JSONResponse({'success': False, 'error': 'List not found'}, status_code=404)
+
+    user_id = session_user_id(request)
+    is_owner = user_id is not None and str(list_doc['owner_id']) == user_id
+    is_collaborator = user_id is not None and await adb.is_collaborator(user_id, list_id)
+
+    if not list_doc['is_public'] and not is_owner and not is_collaborator:
+        return JSONResponse({'success': False, 'error': 'Access denied'}, status_code=403)
+
+    return JSONResponse(list_items_payload(list_doc))
+
+
+async def api_explore(request):
+    if needs_flask_login(request):
+        return None
+    user_id = session_user_id(request)
+    throttled = await throttle(request, 'api_explore', user_id)
+    if throttled is not None:
+        return throttled
+    query, error = parse_explore_query(request.query_params)
+    if error:
+        return JSONResponse({'error': error}, status_code=400)
+
+    shared = await explore_cache.get_or_compute_async(query, lambda: build_explore_page(*query))
+
+    favorited_ids = set()
+    if user_id and shared:
+        favorited_ids = await adb.get_favorited_list_ids(user_id, [lst['id'] for lst in shared])
+
+    return JSONResponse(explore_payload(query, shared, favorited_ids))
+
+
+async def build_explore_page(search_query, tags, skip, limit, sort='recent'):
+    public_lists = await adb.get_public_lists_paginated(search_query, tags if tags else None, skip=skip, limit=limit, sort=sort)
+    usernames = await adb.get_usernames_by_ids({lst['owner_id'] for lst in public_lists})
+    return [explore_card(lst, usernames.get(lst['owner_id'], 'Unknown')) for lst in public_lists]
+
+
+async def autocomplete(request):
+    user_id = session_user_id(request)
+    if user_id is None:
+        return None  # Flask answers with the login redirect
+    throttled = await throttle(request, 'autocomplete', user_id)
+    if throttled is not None:
+        return throttled
+    query = request.query_params.get('q', '')
+    if len(query) < 2:
+        return JSONResponse([])
+
+    suggestions = await adb.get_autocomplete_suggestions(user_id, query)
+    return JSONResponse(suggestions)
+
+
+def read_object(object_path):
+    storage_service = ObjectStorageService()
+    return storage_service.get_object_file(f'/objects/{object_path}')
+
+
+async def serve_object(request):
+    # The object storage SDK is blocking, so it runs off the event loop
+    try:
+        file_data = await run_in_threadpool(read_object, request.path_params['object_path'])
+    except FileNotFoundError:
+        return PlainTextResponse('Object not found', status_code=404)
+    except Exception as e:
+        print(f"Error serving object: {str(e)}")
+        return PlainTextResponse('Internal server error', status_code=500)
+    return Response(file_data, media_type='image/jpeg', headers={'Cache-Control': 'public, max-age=3600'})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await adb.close()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/lists/{list_id}', FlaskFallback(api_get_list), methods=['GET']),
+        Route('/api/explore', FlaskFallback(api_explore), methods=['GET']),
+        Route('/api/autocomplete', FlaskFallback(autocomplete), methods=['GET']),
+        Route('/objects/{object_path:path}', FlaskFallback(serve_object), methods=['GET']),
+        Mount('', app=flask_wsgi)
+    ],
+    lifespan=lifespan
+)
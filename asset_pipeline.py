@@ -0,0 +1,127 @@
+"""Static asset pipeline.
+
+`python asset_pipeline.py` compiles Tailwind and concatenates the page scripts in
+assets/ into content-hashed files under static/dist/, plus a manifest that
+maps logical names to hashed filenames. The app serves those files with
+immutable caching. Without a build (local development) scripts are
+concatenated on request and base.html falls back to the Tailwind CDN.
+"""
+from flask import Response, abort, send_from_directory, url_for
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(ROOT_DIR, 'assets')
+DIST_DIR = os.path.join(ROOT_DIR, 'static', 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Scripts are concatenated in order so function declarations keep hoisting
+# across what used to be one inline <script> block.
+SCRIPT_BUNDLES = {
+    'view_list.js': ['js/view_list/core.js', 'js/view_list/vocabulary.js', 'js/view_list/page.js'],
+    'view_list_editor.js': ['js/view_list/core.js', 'js/view_list/vocabulary.js', 'js/view_list/editor.js', 'js/view_list/page.js'],
+    'edit_list.js': ['js/edit_list.js'],
+    'create_list.js': ['js/create_list.js'],
+}
+
+STYLESHEETS = {
+    'app.css': 'css/app.css',
+}
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def bundle_script(name):
+    parts = []
+    for source in SCRIPT_BUNDLES[name]:
+        with open(os.path.join(SOURCE_DIR, source), encoding='utf-8') as f:
+            parts.append(f'// {source}\n{f.read()}')
+    return '\n'.join(parts).encode('utf-8')
+
+
+def compile_stylesheet(source):
+    tailwind_bin = os.getenv('TAILWIND_BIN', 'tailwindcss')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, 'out.css')
+        subprocess.run([
+            tailwind_bin,
+            '--config', os.path.join(ROOT_DIR, 'tailwind.config.js'),
+            '--input', os.path.join(SOURCE_DIR, source),
+            '--output', output_path,
+            '--minify'
+        ], check=True, cwd=ROOT_DIR)
+        with open(output_path, 'rb') as f:
+            return f.read()
+
+
+def write_fingerprinted(name, content):
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    stem, ext = os.path.splitext(name)
+    hashed_name = f'{stem}.{digest}{ext}'
+    with open(os.path.join(DIST_DIR, hashed_name), 'wb') as f:
+        f.write(content)
+    return hashed_name
+
+
+def build():
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = {}
+    for name, source in STYLESHEETS.items():
+        manifest[name] = write_fingerprinted(name, compile_stylesheet(source))
+    for name in SCRIPT_BUNDLES:
+        manifest[name] = write_fingerprinted(name, bundle_script(name))
+
+    # Stale hashed files from earlier builds are no longer referenced
+    for filename in os.listdir(DIST_DIR):
+        if filename != 'manifest.json' and filename not in manifest.values():
+            os.remove(os.path.join(DIST_DIR, filename))
+
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def init_assets(app):
+    manifest = load_manifest()
+    hashed_files = set(manifest.values())
+
+    @app.route('/assets/<path:filename>')
+    def asset(filename):
+        if filename in hashed_files:
+            response = send_from_directory(DIST_DIR, filename)
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+            return response
+        if filename in SCRIPT_BUNDLES:
+            # Unbuilt development checkout: bundle on the fly, never cache
+            response = Response(bundle_script(filename), mimetype='text/javascript')
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        abort(404)
+
+    @app.context_processor
+    def inject_asset_url():
+        def asset_url(name):
+            if name in manifest:
+                return url_for('asset', filename=manifest[name])
+            if name in SCRIPT_BUNDLES:
+                return url_for('asset', filename=name)
+            return None
+        return {'asset_url': asset_url}
+
+
+if __name__ == '__main__':
+    built = build()
+    for logical_name, hashed_name in sorted(built.items()):
+        size = os.path.getsize(os.path.join(DIST_DIR, hashed_name))
+        print(f'{logical_name} -> {hashed_name} ({size} bytes)')
@@ -0,0 +1,408 @@
+function updateOrderedSettings() {
+    const isOrderedCheckbox = document.getElementById('is-ordered-checkbox');
+    const showNumberingCheckbox = document.getElementById('show-numbering-checkbox');
+    const showNumberingContainer = document.getElementById('show-numbering-container');
+    const isOrderedHidden = document.getElementById('is-ordered-hidden');
+    const showNumberingHidden = document.getElementById('show-numbering-hidden');
+
+    isOrderedHidden.value = isOrderedCheckbox.checked ? 'true' : 'false';
+    showNumberingHidden.value = showNumberingCheckbox.checked ? 'true' : 'false';
+
+    if (isOrderedCheckbox.checked) {
+        showNumberingContainer.style.display = '';
+    } else {
+        showNumberingContainer.style.display = 'none';
+        showNumberingCheckbox.checked = false;
+        showNumberingHidden.value = 'false';
+    }
+}
+
+const thumbnailInput = document.getElementById('thumbnail-input');
+const fileNameSpan = document.getElementById('file-name');
+const maxSize = 500 * 1024; // 500KB in bytes
+
+let currentImage = null;
+let cropArea = { x: 0, y: 0, width: 0, height: 0 };
+let isDragging = false;
+let isResizing = false;
+let dragStart = { x: 0, y: 0 };
+let resizeHandle = null;
+let resizeAnchor = { x: 0, y: 0 };
+let canvas, ctx;
+let displayScale = 1;
+
+function showCropModal(img) {
+    currentImage = img;
+    const modal = document.getElementById('crop-modal');
+    canvas = document.getElementById('crop-canvas');
+    ctx = canvas.getContext('2d');
+
+    // Calculate display size while maintaining aspect ratio
+    const maxWidth = window.innerWidth * 0.8;
+    const maxHeight = window.innerHeight * 0.7;
+    let displayWidth = img.width;
+    let displayHeight = img.height;
+
+    if (displayWidth > maxWidth || displayHeight > maxHeight) {
+        const widthRatio = maxWidth / displayWidth;
+        const heightRatio = maxHeight / displayHeight;
+        displayScale = Math.min(widthRatio, heightRatio);
+        displayWidth = img.width * displayScale;
+        displayHeight = img.height * displayScale;
+    } else {
+        displayScale = 1;
+    }
+
+    canvas.width = displayWidth;
+    canvas.height = displayHeight;
+
+    // Initialize crop area (centered, reasonable size)
+    const cropWidth = Math.min(displayWidth * 0.7, displayHeight);
+    const cropHeight = cropWidth * (160 / 300); // Aspect ratio of thumbnails
+    cropArea = {
+        x: (displayWidth - cropWidth) / 2,
+        y: (displayHeight - cropHeight) / 2,
+        width: cropWidth,
+        height: cropHeight
+    };
+
+    setupCanvasEvents();
+    drawCropInterface();
+
+    // Lock body scroll
+    document.body.style.overflow = 'hidden';
+
+    modal.classList.remove('hidden');
+    modal.classList.add('flex');
+}
+
+function drawCropInterface() {
+    // Draw the full image
+    ctx.drawImage(currentImage, 0, 0, canvas.width, canvas.height);
+
+    // Draw darkened overlay outside crop area
+    ctx.fillStyle = 'rgba(0, 0, 0, 0.5)';
+    ctx.fillRect(0, 0, canvas.width, canvas.height);
+
+    // Clear the crop area (shows image normally)
+    ctx.clearRect(cropArea.x, cropArea.y, cropArea.width, cropArea.height);
+    ctx.drawImage(currentImage, 
+        cropArea.x / displayScale, cropArea.y / displayScale, 
+        cropArea.width / displayScale, cropArea.height / displayScale,
+        cropArea.x, cropArea.y, cropArea.width, cropArea.height);
+
+    // Draw crop rectangle border (thicker for mobile)
+    ctx.strokeStyle = '#3b82f6';
+    ctx.lineWidth = 3;
+    ctx.strokeRect(cropArea.x, cropArea.y, cropArea.width, cropArea.height);
+
+    // Draw resize handles (larger for mobile)
+    const handleSize = 20;
+    ctx.fillStyle = '#3b82f6';
+    // Corners
+    ctx.fillRect(cropArea.x - handleSize/2, cropArea.y - handleSize/2, handleSize, handleSize);
+    ctx.fillRect(cropArea.x + cropArea.width - handleSize/2, cropArea.y - handleSize/2, handleSize, handleSize);
+    ctx.fillRect(cropArea.x - handleSize/2, cropArea.y + cropArea.height - handleSize/2, handleSize, handleSize);
+    ctx.fillRect(cropArea.x + cropArea.width - handleSize/2, cropArea.y + cropArea.height - handleSize/2, handleSize, handleSize);
+}
+
+function getResizeHandle(x, y) {
+    const handleSize = 20;
+    const handles = [
+        { name: 'nw', x: cropArea.x, y: cropArea.y },
+        { name: 'ne', x: cropArea.x + cropArea.width, y: cropArea.y },
+        { name: 'sw', x: cropArea.x, y: cropArea.y + cropArea.height },
+        { name: 'se', x: cropArea.x + cropArea.width, y: cropArea.y + cropArea.height }
+    ];
+
+    for (let handle of handles) {
+        if (Math.abs(x - handle.x) <= handleSize && Math.abs(y - handle.y) <= handleSize) {
+            return handle.name;
+        }
+    }
+    return null;
+}
+
+function setupCanvasEvents() {
+    // Handle start of drag (mouse or touch)
+    function handleStart(e) {
+        e.preventDefault();
+
+        const rect = canvas.getBoundingClientRect();
+        let clientX, clientY;
+
+        if (e.touches) {
+            clientX = e.touches[0].clientX;
+            clientY = e.touches[0].clientY;
+        } else {
+            clientX = e.clientX;
+            clientY = e.clientY;
+        }
+
+        const x = clientX - rect.left;
+        const y = clientY - rect.top;
+
+        // Check if clicking/touching a resize handle
+        resizeHandle = getResizeHandle(x, y);
+        if (resizeHandle) {
+            isResizing = true;
+            dragStart = { x, y };
+
+            // Set anchor point (opposite corner from handle)
+            if (resizeHandle === 'se') {
+                resizeAnchor = { x: cropArea.x, y: cropArea.y };
+            } else if (resizeHandle === 'sw') {
+                resizeAnchor = { x: cropArea.x + cropArea.width, y: cropArea.y };
+            } else if (resizeHandle === 'ne') {
+                resizeAnchor = { x: cropArea.x, y: cropArea.y + cropArea.height };
+            } else if (resizeHandle === 'nw') {
+                resizeAnchor = { x: cropArea.x + cropArea.width, y: cropArea.y + cropArea.height };
+            }
+        }
+        // Check if touch/click is inside crop area for dragging
+        else if (x >= cropArea.x && x <= cropArea.x + cropArea.width &&
+                 y >= cropArea.y && y <= cropArea.y + cropArea.height) {
+            isDragging = true;
+            dragStart = { x, y };
+        }
+    }
+
+    // Handle drag movement (mouse or touch)
+    function handleMove(e) {
+        if (!isDragging && !isResizing) return;
+
+        e.preventDefault();
+
+        const rect = canvas.getBoundingClientRect();
+        let clientX, clientY;
+
+        if (e.touches) {
+            clientX = e.touches[0].clientX;
+            clientY = e.touches[0].clientY;
+        } else {
+            clientX = e.clientX;
+            clientY = e.clientY;
+        }
+
+        const x = clientX - rect.left;
+        const y = clientY - rect.top;
+
+        if (isResizing && resizeHandle) {
+            const aspectRatio = 160 / 300;
+
+            if (resizeHandle === 'se') {
+                const newWidth = Math.max(50, x - resizeAnchor.x);
+                const newHeight = newWidth * aspectRatio;
+                cropArea.x = resizeAnchor.x;
+                cropArea.y = resizeAnchor.y;
+                cropArea.width = newWidth;
+                cropArea.height = newHeight;
+            } else if (resizeHandle === 'sw') {
+                const newWidth = Math.max(50, resizeAnchor.x - x);
+                const newHeight = newWidth * aspectRatio;
+                cropArea.x = resizeAnchor.x - newWidth;
+                cropArea.y = resizeAnchor.y;
+                cropArea.width = newWidth;
+                cropArea.height = newHeight;
+            } else if (resizeHandle === 'ne') {
+                const newWidth = Math.max(50, x - resizeAnchor.x);
+                const newHeight = newWidth * aspectRatio;
+                cropArea.x = resizeAnchor.x;
+                cropArea.y = resizeAnchor.y - newHeight;
+                cropArea.width = newWidth;
+                cropArea.height = newHeight;
+            } else if (resizeHandle === 'nw') {
+                const newWidth = Math.max(50, resizeAnchor.x - x);
+                const newHeight = newWidth * aspectRatio;
+                cropArea.x = resizeAnchor.x - newWidth;
+                cropArea.y = resizeAnchor.y - newHeight;
+                cropArea.width = newWidth;
+                cropArea.height = newHeight;
+            }
+
+            // Keep within bounds
+            cropArea.x = Math.max(0, cropArea.x);
+            cropArea.y = Math.max(0, cropArea.y);
+            cropArea.width = Math.min(cropArea.width, canvas.width - cropArea.x);
+            cropArea.height = Math.min(cropArea.height, canvas.height - cropArea.y);
+
+            drawCropInterface();
+        } else if (isDragging) {
+            const dx = x - dragStart.x;
+            const dy = y - dragStart.y;
+
+            cropArea.x = Math.max(0, Math.min(canvas.width - cropArea.width, cropArea.x + dx));
+            cropArea.y = Math.max(0, Math.min(canvas.height - cropArea.height, cropArea.y + dy));
+
+            dragStart = { x, y };
+            drawCropInterface();
+        }
+    }
+
+    // Handle end of drag (mouse or touch)
+    function handleEnd(e) {
+        isDragging = false;
+        isResizing = false;
+        resizeHandle = null;
+    }
+
+    // Mouse events
+    canvas.addEventListener('mousedown', handleStart);
+    document.addEventListener('mousemove', handleMove);
+    document.addEventListener('mouseup', handleEnd);
+
+    // Touch events for mobile
+    canvas.addEventListener('touchstart', handleStart, { passive: false });
+    document.addEventListener('touchmove', handleMove, { passive: false });
+    document.addEventListener('touchend', handleEnd);
+}
+
+function cleanupCanvasEvents() {
+    // Note: we can't remove the event listeners because they're defined inside setupCanvasEvents
+    // This is okay - they only run when isDragging is true, which we reset
+    isDragging = false;
+    isResizing = false;
+}
+
+function cancelCrop() {
+    cleanupCanvasEvents();
+
+    const modal = document.getElementById('crop-modal');
+    modal.classList.add('hidden');
+    modal.classList.remove('flex');
+
+    // Unlock body scroll
+    document.body.style.overflow = '';
+
+    // Hide preview
+    const previewImg = document.getElementById('thumbnail-preview');
+    previewImg.classList.add('hidden');
+
+    thumbnailInput.value = '';
+    fileNameSpan.textContent = 'No file chosen';
+    fileNameSpan.style.color = 'var(--text-secondary)';
+}
+
+async function applyCrop() {
+    cleanupCanvasEvents();
+
+    const modal = document.getElementById('crop-modal');
+    modal.classList.add('hidden');
+    modal.classList.remove('flex');
+
+    // Unlock body scroll
+    document.body.style.overflow = '';
+
+    fileNameSpan.textContent = 'Processing image...';
+    fileNameSpan.style.color = '#fbbf24';
+
+    // Create a new canvas for the cropped image
+    const cropCanvas = document.createElement('canvas');
+    const cropCtx = cropCanvas.getContext('2d');
+
+    // Set canvas to actual crop size
+    const actualX = cropArea.x / displayScale;
+    const actualY = cropArea.y / displayScale;
+    const actualWidth = cropArea.width / displayScale;
+    const actualHeight = cropArea.height / displayScale;
+
+    cropCanvas.width = actualWidth;
+    cropCanvas.height = actualHeight;
+
+    // Draw the cropped portion
+    cropCtx.drawImage(currentImage, actualX, actualY, actualWidth, actualHeight, 0, 0, actualWidth, actualHeight);
+
+    // Convert to blob and compress if needed
+    cropCanvas.toBlob(async (blob) => {
+        let finalBlob = blob;
+
+        // Compress if over size limit
+        if (blob.size > maxSize) {
+            finalBlob = await compressBlob(cropCanvas, actualWidth, actualHeight);
+        }
+
+        const file = new File([finalBlob], 'thumbnail.jpg', {
+            type: 'image/jpeg',
+            lastModified: Date.now()
+        });
+
+        const dataTransfer = new DataTransfer();
+        dataTransfer.items.add(file);
+        thumbnailInput.files = dataTransfer.files;
+
+        // Show preview of cropped image
+        const previewUrl = URL.createObjectURL(file);
+        const previewImg = document.getElementById('thumbnail-preview');
+        previewImg.src = previewUrl;
+        previewImg.classList.remove('hidden');
+
+        fileNameSpan.textContent = `Cropped image (${(file.size / 1024).toFixed(0)}KB)`;
+        fileNameSpan.style.color = '#10b981';
+    }, 'image/jpeg', 0.9);
+}
+
+async function compressBlob(canvas, width, height) {
+    return new Promise((resolve) => {
+        let quality = 0.8;
+        let currentWidth = width;
+        let currentHeight = height;
+
+        function tryCompress() {
+            const tempCanvas = document.createElement('canvas');
+            tempCanvas.width = currentWidth;
+            tempCanvas.height = currentHeight;
+            const tempCtx = tempCanvas.getContext('2d');
+            tempCtx.drawImage(canvas, 0, 0, width, height, 0, 0, currentWidth, currentHeight);
+
+            tempCanvas.toBlob((blob) => {
+                if (blob.size <= maxSize || quality <= 0.1) {
+                    resolve(blob);
+                } else {
+                    if (quality > 0.5) {
+                        quality -= 0.1;
+                    } else {
+                        currentWidth = Math.floor(currentWidth * 0.9);
+                        currentHeight = Math.floor(currentHeight * 0.9);
+                        quality = 0.8;
+                    }
+                    tryCompress();
+                }
+            }, 'image/jpeg', quality);
+        }
+
+        tryCompress();
+    });
+}
+
+thumbnailInput.addEventListener('change', async function(e) {
+    const file = e.target.files[0];
+
+    if (!file) {
+        fileNameSpan.textContent = 'No file chosen';
+        fileNameSpan.style.color = 'var(--text-secondary)';
+        return;
+    }
+
+    // Check if it's an image
+    if (!file.type.startsWith('image/')) {
+        fileNameSpan.textContent = 'Please select an image file';
+        fileNameSpan.style.color = '#ef4444';
+        thumbnailInput.value = '';
+        return;
+    }
+
+    // Show loading message
+    fileNameSpan.textContent = 'Loading image...';
+    fileNameSpan.style.color = '#fbbf24';
+
+    // Load image and show crop modal
+    const reader = new FileReader();
+    reader.onload = function(e) {
+        const img = new Image();
+        img.onload = function() {
+            showCropModal(img);
+        };
+        img.src = e.target.result;
+    };
+    reader.readAsDataURL(file);
+});
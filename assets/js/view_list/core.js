@@ -0,0 +1,133 @@
+// Updated: Oct 15, 2025 - Fixed touch event handlers
+let undoStack = [];
+const MAX_UNDO = 10;
+let currentMode = 'checkOff';
+
+let moveModeActive = false;
+let draggedItem = null;
+let draggedItemElement = null;
+let dragPlaceholder = null;
+let touchStartY = 0;
+let touchCurrentY = 0;
+let touchTargetElement = null;
+let autoScrollInterval = null;
+
+function loadUndoStack() {
+    const storageKey = `undoStack_${listId}`;
+    const stored = localStorage.getItem(storageKey);
+    if (stored) {
+        try {
+            undoStack = JSON.parse(stored);
+            updateUndoButton();
+        } catch (e) {
+            console.error('Failed to load undo stack:', e);
+            undoStack = [];
+        }
+    }
+}
+
+function saveUndoStack() {
+    const storageKey = `undoStack_${listId}`;
+    try {
+        localStorage.setItem(storageKey, JSON.stringify(undoStack));
+    } catch (e) {
+        console.error('Failed to save undo stack:', e);
+    }
+}
+
+loadUndoStack();
+
+// Local copy of the list's items, kept current from
+// /api/lists/<id>/changes so a refresh only downloads what changed
+let listSnapshot = null;
+
+async function fetchListItems() {
+    if (listSnapshot) {
+        try {
+            const response = await fetch(`/api/lists/${listId}/changes?since=${listSnapshot.version}`);
+            const changes = await response.json();
+            if (changes.success && !changes.resync) {
+                applyListChanges(changes);
+                return { success: true, items: listSnapshot.items.slice(), empty_sections: listSnapshot.empty_sections };
+            }
+        } catch (e) {
+            console.error('Failed to fetch list changes:', e);
+        }
+    }
+    
+    const response = await fetch(`/api/lists/${listId}`);
+    const data = await response.json();
+    if (data.success) {
+        listSnapshot = { version: data.version, items: data.items.slice(), empty_sections: data.empty_sections || [] };
+    }
+    return data;
+}
+
+function applyListChanges(changes) {
+    const replaced = new Set(changes.removed.concat(changes.items.map(item => item._id)));
+    listSnapshot = {
+        version: changes.version,
+        items: listSnapshot.items.filter(item => !replaced.has(item._id)).concat(changes.items),
+        empty_sections: changes.empty_sections
+    };
+}
+
+function toggleMode() {
+    if (!isEthereal || !isOwner) return;
+    
+    currentMode = currentMode === 'checkOff' ? 'edit' : 'checkOff';
+    updateUIForMode();
+}
+
+function updateUIForMode() {
+    const modeToggleText = document.getElementById('mode-toggle-text');
+    const restoreText = document.getElementById('restore-text');
+    const addItemSection = document.getElementById('add-item-section');
+    const checkboxes = document.querySelectorAll('.item-checkbox');
+    const deleteButtons = document.querySelectorAll('.item-delete-btn');
+    
+    if (currentMode === 'edit') {
+        if (modeToggleText) modeToggleText.textContent = '☑ Check Off Mode';
+        if (restoreText) restoreText.textContent = '🔄 Restore to Original';
+        if (addItemSection) addItemSection.style.display = 'block';
+        checkboxes.forEach(cb => cb.classList.add('hidden'));
+        deleteButtons.forEach(btn => btn.classList.remove('hidden'));
+    } else {
+        if (modeToggleText) modeToggleText.textContent = '📝 Edit Mode';
+        if (restoreText) restoreText.textContent = '🔄 Uncheck All';
+        if (addItemSection) addItemSection.style.display = 'none';
+        checkboxes.forEach(cb => cb.classList.remove('hidden'));
+        deleteButtons.forEach(btn => btn.classList.add('hidden'));
+    }
+}
+
+async function toggleItemChecked(itemId) {
+    const itemRow = document.querySelector(`[data-item-id="${itemId}"]`);
+    const checkbox = itemRow.querySelector('.item-checkbox');
+    const isChecked = checkbox.checked;
+    
+    const response = await fetch(`/api/lists/${listId}/items/${itemId}/toggle`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify({ checked: isChecked })
+    });
+    
+    if (response.ok) {
+        const itemText = itemRow.querySelector('.item-text');
+        
+        if (isChecked) {
+            itemText.classList.add('line-through');
+            itemRow.classList.add('opacity-50');
+        } else {
+            itemText.classList.remove('line-through');
+            itemRow.classList.remove('opacity-50');
+        }
+    }
+}
+
+if (isEthereal && isOwner) {
+    updateUIForMode();
+}
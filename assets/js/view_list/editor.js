@@ -0,0 +1,870 @@
+const itemInput = document.getElementById('item-input');
+const autocomplete = document.getElementById('autocomplete');
+
+function autoResizeTextarea() {
+    itemInput.style.height = 'auto';
+    itemInput.style.height = itemInput.scrollHeight + 'px';
+}
+
+itemInput.addEventListener('input', async (e) => {
+    autoResizeTextarea();
+    
+    const query = e.target.value.trim();
+    
+    if (query.length < 2) {
+        autocomplete.classList.add('hidden');
+        return;
+    }
+    
+    const suggestions = await suggestItems(query);
+    
+    if (suggestions.length > 0) {
+        autocomplete.innerHTML = suggestions.map(s => 
+            `<div class="p-2 hover:bg-opacity-80 cursor-pointer" style="background-color: var(--bg-primary);" onclick="selectSuggestion('${s}')">${s}</div>`
+        ).join('');
+        autocomplete.classList.remove('hidden');
+    } else {
+        autocomplete.classList.add('hidden');
+    }
+});
+
+itemInput.addEventListener('keypress', (e) => {
+    if (e.key === 'Enter') {
+        e.preventDefault();
+        addItem();
+    }
+});
+
+document.addEventListener('click', (e) => {
+    if (!autocomplete.contains(e.target) && e.target !== itemInput) {
+        autocomplete.classList.add('hidden');
+    }
+});
+
+function selectSuggestion(text) {
+    itemInput.value = text;
+    autoResizeTextarea();
+    autocomplete.classList.add('hidden');
+    addItem();
+}
+
+let longPressTimer = null;
+let longPressTriggered = false;
+let contextMenuItemId = null;
+let contextMenuItemText = null;
+
+let contextMenuSectionName = null;
+let createSectionItemId = null;
+
+let eventListenersSetup = false;
+
+function setupItemEventListeners() {
+    if (eventListenersSetup) {
+        return;
+    }
+    eventListenersSetup = true;
+    
+    const itemsList = document.getElementById('items-list');
+    
+    itemsList.addEventListener('contextmenu', (e) => {
+        const sectionHeader = e.target.closest('.section-header');
+        const itemRow = e.target.closest('.item-row');
+        
+        if (sectionHeader && (isOwner || isCollaborator)) {
+            e.preventDefault();
+            const sectionName = sectionHeader.getAttribute('data-section-name');
+            showSectionContextMenu(e.clientX, e.clientY, sectionName);
+        } else if (itemRow) {
+            e.preventDefault();
+            const itemId = itemRow.getAttribute('data-item-id');
+            const currentText = itemRow.getAttribute('data-item-text');
+            showContextMenu(e.clientX, e.clientY, itemId, currentText);
+        }
+    });
+    
+    itemsList.addEventListener('touchstart', (e) => {
+        const sectionHeader = e.target.closest('.section-header');
+        const itemRow = e.target.closest('.item-row');
+        
+        if (sectionHeader && (isOwner || isCollaborator)) {
+            longPressTriggered = false;
+            const sectionName = sectionHeader.getAttribute('data-section-name');
+            
+            longPressTimer = setTimeout(() => {
+                longPressTriggered = true;
+                navigator.vibrate && navigator.vibrate(50);
+                const touch = e.touches[0];
+                showSectionContextMenu(touch.clientX, touch.clientY, sectionName);
+            }, 500);
+        } else if (itemRow) {
+            longPressTriggered = false;
+            const itemId = itemRow.getAttribute('data-item-id');
+            const currentText = itemRow.getAttribute('data-item-text');
+            
+            longPressTimer = setTimeout(() => {
+                longPressTriggered = true;
+                navigator.vibrate && navigator.vibrate(50);
+                const touch = e.touches[0];
+                showContextMenu(touch.clientX, touch.clientY, itemId, currentText);
+            }, 500);
+        }
+    }, { passive: true });
+    
+    itemsList.addEventListener('touchend', (e) => {
+        if (longPressTimer) {
+            clearTimeout(longPressTimer);
+            longPressTimer = null;
+        }
+        
+        if (longPressTriggered) {
+            e.preventDefault();
+            e.stopPropagation();
+        }
+    }, { passive: false });
+    
+    itemsList.addEventListener('touchmove', (e) => {
+        if (longPressTimer) {
+            clearTimeout(longPressTimer);
+            longPressTimer = null;
+        }
+    }, { passive: true });
+    
+    itemsList.addEventListener('click', (e) => {
+        if (longPressTriggered) {
+            e.preventDefault();
+            e.stopPropagation();
+            e.stopImmediatePropagation();
+            setTimeout(() => {
+                longPressTriggered = false;
+            }, 100);
+            return false;
+        }
+    }, { capture: true });
+}
+
+function showContextMenu(x, y, itemId, itemText) {
+    contextMenuItemId = itemId;
+    contextMenuItemText = itemText;
+    contextMenuSectionName = null;
+    
+    const itemContextMenu = document.getElementById('item-context-menu');
+    const sectionContextMenu = document.getElementById('section-context-menu');
+    itemContextMenu.classList.remove('hidden');
+    sectionContextMenu.classList.add('hidden');
+    
+    const moveToSectionBtn = document.getElementById('move-to-section-btn');
+    if (moveToSectionBtn) {
+        const sectionHeaders = document.querySelectorAll('.section-header');
+        if (sectionHeaders.length > 0) {
+            moveToSectionBtn.classList.remove('hidden');
+        } else {
+            moveToSectionBtn.classList.add('hidden');
+        }
+    }
+    
+    const enterMoveModeBtn = document.getElementById('enter-move-mode-btn-menu');
+    if (enterMoveModeBtn) {
+        if (moveModeActive) {
+            enterMoveModeBtn.classList.add('hidden');
+        } else {
+            enterMoveModeBtn.classList.remove('hidden');
+        }
+    }
+    
+    const contextMenu = document.getElementById('context-menu');
+    contextMenu.classList.remove('hidden');
+    
+    // Position menu temporarily to get its dimensions
+    contextMenu.style.left = `${x}px`;
+    contextMenu.style.top = `${y}px`;
+    
+    const menuRect = contextMenu.getBoundingClientRect();
+    
+    // Position menu above the click point with 10px gap
+    let menuTop = y - menuRect.height - 10;
+    let menuLeft = x;
+    
+    // Adjust if menu goes off the left edge
+    if (menuLeft < 10) {
+        menuLeft = 10;
+    }
+    
+    // Adjust if menu goes off the right edge
+    if (menuLeft + menuRect.width > window.innerWidth - 10) {
+        menuLeft = window.innerWidth - menuRect.width - 10;
+    }
+    
+    // If menu goes above viewport, position it below the click point instead
+    if (menuTop < 10) {
+        menuTop = y + 10;
+    }
+    
+    contextMenu.style.left = `${menuLeft}px`;
+    contextMenu.style.top = `${menuTop}px`;
+}
+
+function showSectionContextMenu(x, y, sectionName) {
+    contextMenuSectionName = sectionName;
+    contextMenuItemId = null;
+    contextMenuItemText = null;
+    
+    const itemContextMenu = document.getElementById('item-context-menu');
+    const sectionContextMenu = document.getElementById('section-context-menu');
+    itemContextMenu.classList.add('hidden');
+    sectionContextMenu.classList.remove('hidden');
+    
+    const contextMenu = document.getElementById('context-menu');
+    contextMenu.classList.remove('hidden');
+    
+    // Position menu temporarily to get its dimensions
+    contextMenu.style.left = `${x}px`;
+    contextMenu.style.top = `${y}px`;
+    
+    const menuRect = contextMenu.getBoundingClientRect();
+    
+    // Position menu above the click point with 10px gap
+    let menuTop = y - menuRect.height - 10;
+    let menuLeft = x;
+    
+    // Adjust if menu goes off the left edge
+    if (menuLeft < 10) {
+        menuLeft = 10;
+    }
+    
+    // Adjust if menu goes off the right edge
+    if (menuLeft + menuRect.width > window.innerWidth - 10) {
+        menuLeft = window.innerWidth - menuRect.width - 10;
+    }
+    
+    // If menu goes above viewport, position it below the click point instead
+    if (menuTop < 10) {
+        menuTop = y + 10;
+    }
+    
+    contextMenu.style.left = `${menuLeft}px`;
+    contextMenu.style.top = `${menuTop}px`;
+}
+
+function hideContextMenu() {
+    const contextMenu = document.getElementById('context-menu');
+    contextMenu.classList.add('hidden');
+    contextMenuItemId = null;
+    contextMenuItemText = null;
+    contextMenuSectionName = null;
+    longPressTriggered = false;
+}
+
+function copyItemText() {
+    if (!contextMenuItemText) return;
+    
+    navigator.clipboard.writeText(contextMenuItemText).then(() => {
+        showModal('✓ Text copied to clipboard', 'success');
+    }).catch(err => {
+        const textArea = document.createElement('textarea');
+        textArea.value = contextMenuItemText;
+        textArea.style.position = 'fixed';
+        textArea.style.opacity = '0';
+        document.body.appendChild(textArea);
+        textArea.select();
+        try {
+            document.execCommand('copy');
+            showModal('✓ Text copied to clipboard', 'success');
+        } catch (err) {
+            showModal('✗ Failed to copy text', 'error');
+        }
+        document.body.removeChild(textArea);
+    });
+    
+    hideContextMenu();
+}
+
+function editItemFromMenu() {
+    if (!contextMenuItemId || !contextMenuItemText) return;
+    const itemId = contextMenuItemId;
+    const itemText = contextMenuItemText;
+    hideContextMenu();
+    editItem(itemId, itemText);
+}
+
+document.addEventListener('click', (e) => {
+    const contextMenu = document.getElementById('context-menu');
+    if (!contextMenu.contains(e.target)) {
+        hideContextMenu();
+    }
+});
+
+let editingItemId = null;
+let editingItemText = null;
+
+function editItem(itemId, currentText) {
+    editingItemId = itemId;
+    editingItemText = currentText;
+    
+    const modal = document.getElementById('edit-item-modal');
+    const input = document.getElementById('edit-item-input');
+    
+    input.value = currentText;
+    modal.classList.remove('hidden');
+    modal.classList.add('flex');
+    
+    setTimeout(() => {
+        input.focus();
+        input.select();
+    }, 100);
+}
+
+function closeEditModal(event) {
+    if (event && event.target.id !== 'edit-item-modal') {
+        return;
+    }
+    
+    const modal = document.getElementById('edit-item-modal');
+    modal.classList.add('hidden');
+    modal.classList.remove('flex');
+    
+    editingItemId = null;
+    editingItemText = null;
+}
+
+async function saveEditedItem() {
+    const input = document.getElementById('edit-item-input');
+    const newText = input.value.trim();
+    
+    if (!newText || newText === editingItemText) {
+        closeEditModal();
+        return;
+    }
+    
+    const endpoint = (isEthereal && currentMode === 'edit')
+        ? `/api/lists/${listId}/original/items/${editingItemId}`
+        : `/api/lists/${listId}/items/${editingItemId}`;
+    
+    const response = await fetch(endpoint, {
+        method: 'PUT',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify({ text: newText })
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        showModal('✓ Item updated successfully', 'success');
+        
+        const listData = await fetchListItems();
+        
+        if (listData.success) {
+            rebuildItemsList(listData.items);
+        }
+        
+        closeEditModal();
+    } else {
+        showModal(`✗ ${result.message}`, 'error');
+    }
+}
+
+document.getElementById('edit-item-input').addEventListener('keypress', (e) => {
+    if (e.key === 'Enter') {
+        e.preventDefault();
+        saveEditedItem();
+    }
+});
+
+document.addEventListener('keydown', (e) => {
+    if (e.key === 'Escape') {
+        const editModal = document.getElementById('edit-item-modal');
+        const undoModal = document.getElementById('undo-modal');
+        
+        if (!editModal.classList.contains('hidden')) {
+            closeEditModal();
+        } else if (!undoModal.classList.contains('hidden')) {
+            closeUndoModal();
+        }
+    }
+});
+
+let undoButtonLongPressTimer = null;
+let undoButtonLongPressTriggered = false;
+
+const undoBtn = document.getElementById('undo-btn');
+
+undoBtn.addEventListener('contextmenu', (e) => {
+    e.preventDefault();
+    showUndoModal();
+});
+
+undoBtn.addEventListener('touchstart', (e) => {
+    undoButtonLongPressTriggered = false;
+    
+    undoButtonLongPressTimer = setTimeout(() => {
+        undoButtonLongPressTriggered = true;
+        navigator.vibrate && navigator.vibrate(50);
+        showUndoModal();
+    }, 500);
+}, { passive: true });
+
+undoBtn.addEventListener('touchend', (e) => {
+    if (undoButtonLongPressTimer) {
+        clearTimeout(undoButtonLongPressTimer);
+        undoButtonLongPressTimer = null;
+    }
+    
+    if (undoButtonLongPressTriggered) {
+        e.preventDefault();
+        undoButtonLongPressTriggered = false;
+    }
+}, { passive: false });
+
+undoBtn.addEventListener('touchmove', (e) => {
+    if (undoButtonLongPressTimer) {
+        clearTimeout(undoButtonLongPressTimer);
+        undoButtonLongPressTimer = null;
+    }
+}, { passive: true });
+
+undoBtn.addEventListener('click', (e) => {
+    if (!undoButtonLongPressTriggered) {
+        undoDelete();
+    }
+    undoButtonLongPressTriggered = false;
+});
+
+setupItemEventListeners();
+
+async function addItem() {
+    const text = itemInput.value.trim();
+    if (!text) return;
+    
+    const addBtn = document.getElementById('add-item-btn');
+    const originalBtnText = addBtn.textContent;
+    
+    try {
+        addBtn.disabled = true;
+        addBtn.textContent = '...';
+        addBtn.style.opacity = '0.6';
+        
+        itemInput.value = '';
+        autoResizeTextarea();
+        
+        const endpoint = (isEthereal && currentMode === 'edit') 
+            ? `/api/lists/${listId}/original/items`
+            : `/api/lists/${listId}/items`;
+        
+        const response = await fetch(endpoint, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfToken
+            },
+            body: JSON.stringify({ text })
+        });
+        
+        const result = await response.json();
+        
+        if (result.success) {
+            showModal('✓ Item added', 'success');
+            learnVocabularyItem(text);
+            
+            const itemsArray = [];
+            document.querySelectorAll('.item-row').forEach(row => {
+                const itemId = row.getAttribute('data-item-id');
+                const itemText = row.getAttribute('data-item-text');
+                const itemSection = row.getAttribute('data-section');
+                const itemChecked = row.getAttribute('data-checked') === 'true';
+                const itemQuantity = parseInt(row.getAttribute('data-quantity')) || 1;
+                
+                itemsArray.push({
+                    _id: itemId,
+                    text: itemText,
+                    section: itemSection,
+                    checked: itemChecked,
+                    quantity: itemQuantity
+                });
+            });
+            
+            itemsArray.push({
+                _id: result.item_id,
+                text: text,
+                section: null,
+                checked: false,
+                quantity: 1
+            });
+            
+            rebuildItemsList(itemsArray);
+        } else {
+            showModal(`✗ ${result.message}`, 'error');
+            itemInput.value = text;
+        }
+        
+        itemInput.focus();
+    } catch (error) {
+        console.error('Error adding item:', error);
+        showModal('✗ Failed to add item. Please try again.', 'error');
+        itemInput.value = text;
+        itemInput.focus();
+    } finally {
+        addBtn.disabled = false;
+        addBtn.textContent = originalBtnText;
+        addBtn.style.opacity = '1';
+    }
+}
+
+async function deleteItemByRow(itemId, event) {
+    if (!isOwner && !isCollaborator) return;
+    
+    if (longPressTriggered) {
+        event.preventDefault();
+        event.stopPropagation();
+        setTimeout(() => {
+            longPressTriggered = false;
+        }, 100);
+        return;
+    }
+    
+    const target = event.target;
+    if (target.classList.contains('quantity-btn') || target.classList.contains('item-checkbox')) {
+        return;
+    }
+    
+    const itemRow = document.querySelector(`[data-item-id="${itemId}"]`);
+    const itemText = itemRow.getAttribute('data-item-text');
+    const itemSection = itemRow.getAttribute('data-section');
+    
+    const endpoint = (isEthereal && currentMode === 'edit')
+        ? `/api/lists/${listId}/original/items/${itemId}`
+        : `/api/lists/${listId}/items/${itemId}`;
+    
+    const response = await fetch(endpoint, {
+        method: 'DELETE',
+        headers: {
+            'X-CSRFToken': csrfToken
+        }
+    });
+    
+    if (response.ok) {
+        undoStack.push({ id: itemId, text: itemText, section: itemSection });
+        if (undoStack.length > MAX_UNDO) {
+            undoStack.shift();
+        }
+        updateUndoButton();
+        
+        itemRow.remove();
+        
+        if (document.querySelectorAll('[data-item-id]').length === 0) {
+            document.getElementById('items-list').innerHTML = '<p class="text-center py-8" style="color: var(--text-secondary);">No items yet. Start adding items above!</p>';
+        }
+    }
+}
+
+async function adjustQuantity(itemId, delta, event) {
+    event.stopPropagation();
+    
+    const response = await fetch(`/api/lists/${listId}/items/${itemId}/quantity`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify({ delta })
+    });
+    
+    if (response.ok) {
+        const result = await response.json();
+        const itemRow = document.querySelector(`[data-item-id="${itemId}"]`);
+        itemRow.setAttribute('data-quantity', result.quantity);
+        
+        const itemTextSpan = itemRow.querySelector('.item-text');
+        const existingQtySpan = itemTextSpan.nextElementSibling;
+        if (existingQtySpan && existingQtySpan.textContent.startsWith('x')) {
+            existingQtySpan.remove();
+        }
+        
+        if (result.quantity > 1) {
+            const qtySpan = document.createElement('span');
+            qtySpan.className = 'text-sm';
+            qtySpan.style.color = 'var(--text-secondary)';
+            qtySpan.textContent = `x${result.quantity}`;
+            itemTextSpan.parentNode.appendChild(qtySpan);
+        }
+        
+        const decreaseBtn = itemRow.querySelector('[data-action="decrease"]');
+        if (decreaseBtn) {
+            if (result.quantity <= 1) {
+                decreaseBtn.classList.add('invisible');
+            } else {
+                decreaseBtn.classList.remove('invisible');
+            }
+        }
+    }
+}
+
+function updateUndoButton() {
+    const undoBtn = document.getElementById('undo-btn');
+    const undoCount = document.getElementById('undo-count');
+    
+    if (undoStack.length > 0) {
+        undoBtn.classList.remove('hidden');
+        undoCount.textContent = undoStack.length;
+    } else {
+        undoBtn.classList.add('hidden');
+    }
+    
+    saveUndoStack();
+}
+
+async function undoDelete() {
+    if (undoStack.length === 0) return;
+    
+    const item = undoStack.pop();
+    
+    // Check if item already exists in the list
+    const existingItems = Array.from(document.querySelectorAll('.item-text'));
+    const itemExists = existingItems.some(el => el.textContent.toLowerCase() === item.text.toLowerCase());
+    
+    if (itemExists) {
+        showModal('✗ Item already exists in the list', 'error');
+        updateUndoButton();
+        return;
+    }
+    
+    updateUndoButton();
+    
+    const endpoint = (isEthereal && currentMode === 'edit') 
+        ? `/api/lists/${listId}/original/items`
+        : `/api/lists/${listId}/items`;
+    
+    const requestBody = { text: item.text };
+    if (item.section && item.section !== 'null' && item.section !== 'undefined') {
+        requestBody.section = item.section;
+    }
+    
+    const response = await fetch(endpoint, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify(requestBody)
+    });
+    
+    if (response.ok) {
+        const result = await response.json();
+        
+        // Fetch updated items and rebuild the list
+        const listData = await fetchListItems();
+        
+        if (listData.success) {
+            rebuildItemsList(listData.items);
+            showModal('✓ Item restored', 'success');
+        }
+    }
+}
+
+function showUndoModal() {
+    if (undoStack.length === 0) {
+        showModal('✗ No items to restore', 'error');
+        return;
+    }
+    
+    if (window.getSelection) {
+        window.getSelection().removeAllRanges();
+    } else if (document.selection) {
+        document.selection.empty();
+    }
+    
+    const modal = document.getElementById('undo-modal');
+    const modalList = document.getElementById('undo-modal-list');
+    
+    // Create a map of unique items (most recent occurrence of each text)
+    const uniqueItems = new Map();
+    undoStack.forEach((item, index) => {
+        const key = item.text.toLowerCase();
+        if (!uniqueItems.has(key) || uniqueItems.get(key).index < index) {
+            uniqueItems.set(key, { item, index });
+        }
+    });
+    
+    // Convert to array and sort by index descending (most recent first)
+    const itemsToDisplay = Array.from(uniqueItems.values())
+        .sort((a, b) => b.index - a.index);
+    
+    modalList.innerHTML = itemsToDisplay.map(({ item, index }) => `
+        <div class="flex items-center justify-between p-3 rounded cursor-pointer hover:bg-opacity-80 transition-colors"
+             style="background-color: var(--bg-primary);"
+             onclick="restoreFromModalByIndex(${index})"
+             data-undo-index="${index}">
+            <span>${item.text}</span>
+        </div>
+    `).join('');
+    
+    modal.classList.remove('hidden');
+    modal.classList.add('flex');
+}
+
+function closeUndoModal(event) {
+    if (event && event.target.id !== 'undo-modal') {
+        return;
+    }
+    
+    const modal = document.getElementById('undo-modal');
+    modal.classList.add('hidden');
+    modal.classList.remove('flex');
+}
+
+async function restoreFromModal(index) {
+    const reversedIndex = undoStack.length - 1 - index;
+    const item = undoStack[reversedIndex];
+    
+    // Check if item already exists in the list
+    const existingItems = Array.from(document.querySelectorAll('.item-text'));
+    const itemExists = existingItems.some(el => el.textContent.toLowerCase() === item.text.toLowerCase());
+    
+    if (itemExists) {
+        showModal('✗ Item already exists in the list', 'error');
+        closeUndoModal();
+        return;
+    }
+    
+    undoStack.splice(reversedIndex, 1);
+    updateUndoButton();
+    
+    const endpoint = (isEthereal && currentMode === 'edit') 
+        ? `/api/lists/${listId}/original/items`
+        : `/api/lists/${listId}/items`;
+    
+    const requestBody = { text: item.text };
+    if (item.section && item.section !== 'null' && item.section !== 'undefined') {
+        requestBody.section = item.section;
+    }
+    
+    const response = await fetch(endpoint, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify(requestBody)
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        // Fetch updated items and rebuild the list
+        const listData = await fetchListItems();
+        
+        if (listData.success) {
+            rebuildItemsList(listData.items);
+            showModal('✓ Item restored', 'success');
+        }
+        
+        if (undoStack.length === 0) {
+            closeUndoModal();
+        } else {
+            showUndoModal();
+        }
+    } else {
+        showModal(`✗ ${result.message}`, 'error');
+        closeUndoModal();
+    }
+}
+
+async function restoreFromModalByIndex(stackIndex) {
+    const item = undoStack[stackIndex];
+    
+    // Check if item already exists in the list
+    const existingItems = Array.from(document.querySelectorAll('.item-text'));
+    const itemExists = existingItems.some(el => el.textContent.toLowerCase() === item.text.toLowerCase());
+    
+    if (itemExists) {
+        showModal('✗ Item already exists in the list', 'error');
+        closeUndoModal();
+        return;
+    }
+    
+    undoStack.splice(stackIndex, 1);
+    updateUndoButton();
+    
+    const endpoint = (isEthereal && currentMode === 'edit') 
+        ? `/api/lists/${listId}/original/items`
+        : `/api/lists/${listId}/items`;
+    
+    const requestBody = { text: item.text };
+    if (item.section && item.section !== 'null' && item.section !== 'undefined') {
+        requestBody.section = item.section;
+    }
+    
+    const response = await fetch(endpoint, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify(requestBody)
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        // Fetch updated items and rebuild the list
+        const listData = await fetchListItems();
+        
+        if (listData.success) {
+            rebuildItemsList(listData.items);
+            showModal('✓ Item restored', 'success');
+        }
+        
+        if (undoStack.length === 0) {
+            closeUndoModal();
+        } else {
+            showUndoModal();
+        }
+    } else {
+        showModal(`✗ ${result.message}`, 'error');
+        closeUndoModal();
+    }
+}
+
+async function restoreList() {
+    const isCheckOffMode = currentMode === 'checkOff';
+    const confirmMessage = isCheckOffMode 
+        ? 'Uncheck all items?' 
+        : 'Restore list to original items? Current items will be replaced.';
+    
+    if (!confirm(confirmMessage)) {
+        return;
+    }
+    
+    const response = await fetch(`/api/lists/${listId}/restore`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify({ reset_checked_only: isCheckOffMode })
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        const message = isCheckOffMode ? '✓ All items unchecked' : '✓ List restored successfully';
+        showModal(message, 'success');
+        
+        if (isCheckOffMode) {
+            document.querySelectorAll('.item-checkbox').forEach(checkbox => {
+                checkbox.checked = false;
+            });
+            document.querySelectorAll('.item-text').forEach(text => {
+                text.classList.remove('line-through');
+            });
+            document.querySelectorAll('.item-row').forEach(row => {
+                row.classList.remove('opacity-50');
+            });
+        } else {
+            setTimeout(() => location.reload(), 1000);
+        }
+    } else {
+        showModal('✗ Failed to restore list', 'error');
+    }
+}
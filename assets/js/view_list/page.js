@@ -0,0 +1,1845 @@
+function confirmDelete() {
+    if (confirm('Are you sure you want to delete this list? This cannot be undone.')) {
+        document.getElementById('delete-form').submit();
+    }
+}
+
+function cloneList() {
+    if (confirm('Clone this list? A copy will be created and added to your lists.')) {
+        document.getElementById('clone-form').submit();
+    }
+}
+
+async function showChildrenModal() {
+    const modal = document.getElementById('children-modal');
+    const childrenList = document.getElementById('children-list');
+    
+    childrenList.innerHTML = '<p class="text-center" style="color: var(--text-secondary);">Loading...</p>';
+    modal.classList.remove('hidden');
+    modal.classList.add('flex');
+    
+    try {
+        const response = await fetch(`/api/lists/${listId}/children`);
+        const data = await response.json();
+        
+        if (data.children && data.children.length > 0) {
+            childrenList.innerHTML = data.children.map(child => `
+                <a href="/lists/${child.id}" class="block p-3 rounded card hover:opacity-80">
+                    <div class="font-semibold">${child.name}</div>
+                    <div class="text-sm" style="color: var(--text-secondary);">by @${child.owner_username}</div>
+                </a>
+            `).join('');
+        } else {
+            childrenList.innerHTML = '<p class="text-center" style="color: var(--text-secondary);">No cloned lists found</p>';
+        }
+    } catch (error) {
+        console.error('Error loading children:', error);
+        childrenList.innerHTML = '<p class="text-center text-red-500">Error loading cloned lists</p>';
+    }
+}
+
+function closeChildrenModal(event) {
+    if (event && event.target.id !== 'children-modal') {
+        return;
+    }
+    
+    const modal = document.getElementById('children-modal');
+    modal.classList.add('hidden');
+    modal.classList.remove('flex');
+}
+
+async function toggleFavorite() {
+    const response = await fetch(`/api/favorite/${listId}`, {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': csrfToken
+        }
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        const btn = document.getElementById('favorite-btn');
+        const icon = document.getElementById('favorite-icon');
+        const text = document.getElementById('favorite-text');
+        
+        if (result.favorite_count !== null) {
+            document.getElementById('favorite-count').textContent = result.favorite_count;
+        }
+        
+        if (result.favorited) {
+            btn.classList.remove('card');
+            btn.classList.add('bg-yellow-600');
+            icon.textContent = '⭐';
+            text.textContent = 'Favorited';
+        } else {
+            btn.classList.add('card');
+            btn.classList.remove('bg-yellow-600');
+            icon.textContent = '☆';
+            text.textContent = 'Favorite';
+        }
+    }
+}
+
+function showModal(message, type) {
+    const notification = document.getElementById('inline-notification');
+    
+    const bgColor = type === 'success' ? 'bg-green-500' : 'bg-red-500';
+    notification.className = `absolute w-full p-3 rounded text-white text-center ${bgColor}`;
+    notification.style.top = '100%';
+    notification.style.marginTop = '8px';
+    notification.style.zIndex = '50';
+    notification.textContent = message;
+    notification.classList.remove('hidden');
+    
+    const duration = type === 'success' ? 2000 : 3000;
+    setTimeout(() => {
+        notification.classList.add('hidden');
+    }, duration);
+}
+
+function toggleListMenu() {
+    const dropdown = document.getElementById('list-menu-dropdown');
+    dropdown.classList.toggle('hidden');
+}
+
+function createSectionFromItem() {
+    if (!contextMenuItemId || !contextMenuItemText) return;
+    
+    createSectionItemId = contextMenuItemId;
+    hideContextMenu();
+    
+    const modal = document.getElementById('create-section-modal');
+    const input = document.getElementById('section-name-input');
+    
+    input.value = '';
+    modal.classList.remove('hidden');
+    modal.classList.add('flex');
+    
+    setTimeout(() => {
+        input.focus();
+    }, 100);
+}
+
+function closeCreateSectionModal(event) {
+    if (event && event.target.id !== 'create-section-modal') {
+        return;
+    }
+    
+    const modal = document.getElementById('create-section-modal');
+    const sectionAutocomplete = document.getElementById('section-autocomplete');
+    modal.classList.add('hidden');
+    modal.classList.remove('flex');
+    sectionAutocomplete.classList.add('hidden');
+}
+
+async function saveNewSection() {
+    const input = document.getElementById('section-name-input');
+    const sectionName = input.value.trim();
+    
+    if (!sectionName || !createSectionItemId) {
+        closeCreateSectionModal();
+        return;
+    }
+    
+    const response = await fetch(`/api/lists/${listId}/sections`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify({ 
+            item_id: createSectionItemId,
+            section_name: sectionName
+        })
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        showModal('✓ Section created successfully', 'success');
+        
+        const itemRow = document.querySelector(`[data-item-id="${createSectionItemId}"]`);
+        if (itemRow) {
+            itemRow.setAttribute('data-section', sectionName);
+            
+            const itemsList = document.getElementById('items-list');
+            const itemsListHtml = itemsList.innerHTML;
+            
+            const itemsArray = [];
+            document.querySelectorAll('.item-row').forEach(row => {
+                const itemId = row.getAttribute('data-item-id');
+                const itemText = row.getAttribute('data-item-text');
+                const itemSection = row.getAttribute('data-section');
+                const itemChecked = row.getAttribute('data-checked') === 'true';
+                const itemQuantity = parseInt(row.getAttribute('data-quantity')) || 1;
+                
+                itemsArray.push({
+                    _id: itemId,
+                    text: itemText,
+                    section: itemSection,
+                    checked: itemChecked,
+                    quantity: itemQuantity
+                });
+            });
+            
+            rebuildItemsList(itemsArray);
+        }
+    } else {
+        showModal(`✗ ${result.message}`, 'error');
+    }
+    
+    closeCreateSectionModal();
+    createSectionItemId = null;
+}
+
+async function promoteToSection() {
+    if (!contextMenuItemId || !contextMenuItemText) return;
+    
+    const itemId = contextMenuItemId;
+    const sectionName = contextMenuItemText;
+    
+    hideContextMenu();
+    
+    const response = await fetch(`/api/lists/${listId}/promote-to-section`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify({ 
+            item_id: itemId,
+            section_name: sectionName
+        })
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        showModal(`✓ Item promoted to section "${sectionName}"`, 'success');
+        
+        const listData = await fetchListItems();
+        
+        if (listData.success) {
+            rebuildItemsList(listData.items, listData.empty_sections || []);
+        }
+    } else {
+        showModal(`✗ ${result.message}`, 'error');
+    }
+}
+
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+function escapeJs(text) {
+    return text.replace(/\\/g, '\\\\').replace(/'/g, "\\'").replace(/"/g, '\\"').replace(/\n/g, '\\n').replace(/\r/g, '\\r');
+}
+
+function rebuildItemsList(items, emptySections = []) {
+    const sections = {};
+    const looseItems = [];
+    
+    items.forEach(item => {
+        if (item.section) {
+            if (!sections[item.section]) {
+                sections[item.section] = [];
+            }
+            sections[item.section].push(item);
+        } else {
+            looseItems.push(item);
+        }
+    });
+    
+    emptySections.forEach(sectionName => {
+        if (!sections[sectionName]) {
+            sections[sectionName] = [];
+        }
+    });
+    
+    const sortedSections = Object.keys(sections).sort();
+    
+    let html = '';
+    
+    sortedSections.forEach(sectionName => {
+        const sectionItems = isOrdered 
+            ? sections[sectionName].sort((a, b) => (a.order || 0) - (b.order || 0))
+            : sections[sectionName].sort((a, b) => a.text.localeCompare(b.text));
+        const escapedSectionName = escapeHtml(sectionName);
+        const jsSafeSectionName = escapeJs(sectionName);
+        
+        html += `<div class="section-group mb-4" data-section-name="${escapedSectionName}">`;
+        html += `<div class="section-header flex items-center justify-between p-4 rounded-t font-semibold cursor-pointer" style="background-color: var(--bg-secondary); user-select: none; -webkit-user-select: none; -moz-user-select: none; -ms-user-select: none; min-height: 60px;" data-section-name="${escapedSectionName}">`;
+        html += `<span style="pointer-events: none;">${escapedSectionName}</span>`;
+        
+        if (isOwner || isCollaborator) {
+            html += `<button onclick="showSectionAddModal('${jsSafeSectionName}', event)" class="px-3 py-1 bg-blue-600 text-white rounded text-sm hover:bg-blue-700">➕</button>`;
+        }
+        
+        html += `</div><div class="section-items space-y-2 pt-2">`;
+        
+        sectionItems.forEach((item, index) => {
+            const checkedClass = item.checked ? 'opacity-50' : '';
+            const stripeClass = index % 2 === 0 ? 'section-item-even' : 'section-item-odd';
+            const lineThrough = item.checked ? 'line-through' : '';
+            const checkboxHidden = !isEthereal ? 'hidden' : '';
+            const checked = item.checked ? 'checked' : '';
+            const quantityVisible = item.quantity > 1 ? '' : 'invisible';
+            const escapedItemText = escapeHtml(item.text);
+            const escapedItemSection = item.section ? escapeHtml(item.section) : '';
+            const jsSafeItemId = escapeJs(item._id);
+            
+            html += `<div class="flex items-center justify-between p-3 rounded item-row ${checkedClass} ${stripeClass}" style="cursor: pointer; user-select: none; -webkit-user-select: none; -moz-user-select: none; -ms-user-select: none;" data-item-id="${escapeHtml(item._id)}" data-item-text="${escapedItemText}" data-checked="${item.checked}" data-quantity="${item.quantity}" data-section="${escapedItemSection}" onclick="deleteItemByRow('${jsSafeItemId}', event)">`;
+            html += `<div class="flex items-center gap-3 flex-1">`;
+            html += `<input type="checkbox" class="item-checkbox w-5 h-5 cursor-pointer ${checkboxHidden}" onchange="toggleItemChecked('${jsSafeItemId}')" ${checked} onclick="event.stopPropagation()">`;
+            
+            if (isOrdered && showNumbering) {
+                html += `<span class="item-number font-semibold" style="color: var(--text-secondary); min-width: 2em;">${index + 1}.</span>`;
+            }
+            
+            html += `<span class="item-text ${lineThrough}">${escapedItemText}</span>`;
+            
+            if (item.quantity > 1) {
+                html += `<span class="text-sm" style="color: var(--text-secondary);">x${escapeHtml(String(item.quantity))}</span>`;
+            }
+            
+            html += `</div>`;
+            
+            if (isOwner || isCollaborator) {
+                const decreaseHidden = isEthereal ? 'hidden' : '';
+                const increaseHidden = isEthereal ? 'hidden' : '';
+                html += `<div class="flex items-center gap-2">`;
+                html += `<button class="quantity-btn ${decreaseHidden} ${quantityVisible} text-lg px-2 hover:opacity-70" onclick="adjustQuantity('${jsSafeItemId}', -1, event)" data-action="decrease">−</button>`;
+                html += `<button class="quantity-btn ${increaseHidden} text-lg px-2 hover:opacity-70" onclick="adjustQuantity('${jsSafeItemId}', 1, event)" data-action="increase">+</button>`;
+                html += `</div>`;
+            }
+            
+            html += `</div>`;
+        });
+        
+        html += `</div></div>`;
+    });
+    
+    const hasSections = Object.keys(sections).length > 0;
+    
+    if (looseItems.length > 0 || (hasSections && isOrdered) || (moveModeActive && hasSections)) {
+        const sortedLooseItems = isOrdered
+            ? looseItems.sort((a, b) => (a.order || 0) - (b.order || 0))
+            : looseItems.sort((a, b) => a.text.localeCompare(b.text));
+        
+        html += `<div id="loose-items-drop-zone" class="loose-items-separator border-t-2 mt-6 pt-4" style="border-color: var(--border-color); transition: all 0.2s ease; min-height: 80px;">`;
+        
+        if (looseItems.length === 0 && hasSections && (isOrdered || moveModeActive)) {
+            html += `<div class="text-center py-6" style="color: var(--text-secondary); min-height: 60px; display: flex; align-items: center; justify-content: center;">`;
+            html += `<p class="text-sm">Drop items here to remove from sections</p>`;
+            html += `</div>`;
+        } else {
+            html += `<div class="space-y-2">`;
+            
+            sortedLooseItems.forEach((item, index) => {
+                const checkedClass = item.checked ? 'opacity-50' : '';
+                const lineThrough = item.checked ? 'line-through' : '';
+                const checkboxHidden = !isEthereal ? 'hidden' : '';
+                const checked = item.checked ? 'checked' : '';
+                const quantityVisible = item.quantity > 1 ? '' : 'invisible';
+                const escapedItemText = escapeHtml(item.text);
+                const jsSafeItemId = escapeJs(item._id);
+                
+                html += `<div class="flex items-center justify-between p-3 rounded item-row ${checkedClass}" style="background-color: var(--bg-primary); cursor: pointer; user-select: none; -webkit-user-select: none; -moz-user-select: none; -ms-user-select: none;" data-item-id="${escapeHtml(item._id)}" data-item-text="${escapedItemText}" data-checked="${item.checked}" data-quantity="${item.quantity}" data-section="" onclick="deleteItemByRow('${jsSafeItemId}', event)">`;
+                html += `<div class="flex items-center gap-3 flex-1">`;
+                html += `<input type="checkbox" class="item-checkbox w-5 h-5 cursor-pointer ${checkboxHidden}" onchange="toggleItemChecked('${jsSafeItemId}')" ${checked} onclick="event.stopPropagation()">`;
+                
+                if (isOrdered && showNumbering) {
+                    html += `<span class="item-number font-semibold" style="color: var(--text-secondary); min-width: 2em;">${index + 1}.</span>`;
+                }
+                
+                html += `<span class="item-text ${lineThrough}">${escapedItemText}</span>`;
+                
+                if (item.quantity > 1) {
+                    html += `<span class="text-sm" style="color: var(--text-secondary);">x${escapeHtml(String(item.quantity))}</span>`;
+                }
+                
+                html += `</div>`;
+                
+                if (isOwner || isCollaborator) {
+                    const decreaseHidden = isEthereal ? 'hidden' : '';
+                    const increaseHidden = isEthereal ? 'hidden' : '';
+                    html += `<div class="flex items-center gap-2">`;
+                    html += `<button class="quantity-btn ${decreaseHidden} ${quantityVisible} text-lg px-2 hover:opacity-70" onclick="adjustQuantity('${jsSafeItemId}', -1, event)" data-action="decrease">−</button>`;
+                    html += `<button class="quantity-btn ${increaseHidden} text-lg px-2 hover:opacity-70" onclick="adjustQuantity('${jsSafeItemId}', 1, event)" data-action="increase">+</button>`;
+                    html += `</div>`;
+                }
+                
+                html += `</div>`;
+            });
+            
+            html += `</div>`;
+        }
+        
+        html += `</div>`;
+    }
+    
+    document.getElementById('items-list').innerHTML = html;
+    setupItemEventListeners();
+}
+
+let renamingSectionName = null;
+let deletingSectionName = null;
+
+function renameSectionFromMenu() {
+    if (!contextMenuSectionName) return;
+    
+    renamingSectionName = contextMenuSectionName;
+    hideContextMenu();
+    
+    const modal = document.getElementById('rename-section-modal');
+    const input = document.getElementById('rename-section-input');
+    
+    input.value = renamingSectionName;
+    modal.classList.remove('hidden');
+    modal.classList.add('flex');
+    
+    setTimeout(() => {
+        input.focus();
+        input.select();
+    }, 100);
+}
+
+function closeRenameSectionModal(event) {
+    if (event && event.target.id !== 'rename-section-modal') {
+        return;
+    }
+    
+    const modal = document.getElementById('rename-section-modal');
+    modal.classList.add('hidden');
+    modal.classList.remove('flex');
+    renamingSectionName = null;
+}
+
+async function saveRenamedSection() {
+    const input = document.getElementById('rename-section-input');
+    const newSectionName = input.value.trim();
+    const oldSectionName = renamingSectionName;
+    
+    if (!newSectionName || !oldSectionName || newSectionName === oldSectionName) {
+        closeRenameSectionModal();
+        renamingSectionName = null;
+        return;
+    }
+    
+    const response = await fetch(`/api/lists/${listId}/sections/${encodeURIComponent(oldSectionName)}`, {
+        method: 'PUT',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify({ new_section_name: newSectionName })
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        showModal('✓ Section renamed successfully', 'success');
+        
+        // Fetch updated items and rebuild the list
+        const listData = await fetchListItems();
+        
+        if (listData.success) {
+            rebuildItemsList(listData.items);
+        }
+    } else {
+        showModal(`✗ ${result.message}`, 'error');
+    }
+    
+    closeRenameSectionModal();
+    renamingSectionName = null;
+}
+
+function deleteSectionFromMenu() {
+    if (!contextMenuSectionName) return;
+    
+    deletingSectionName = contextMenuSectionName;
+    hideContextMenu();
+    
+    const modal = document.getElementById('delete-section-modal');
+    modal.classList.remove('hidden');
+    modal.classList.add('flex');
+}
+
+function closeDeleteSectionModal(event) {
+    if (event && event.target.id !== 'delete-section-modal') {
+        return;
+    }
+    
+    const modal = document.getElementById('delete-section-modal');
+    modal.classList.add('hidden');
+    modal.classList.remove('flex');
+    deletingSectionName = null;
+}
+
+async function confirmDeleteSection() {
+    const sectionToDelete = deletingSectionName;
+    
+    if (!sectionToDelete) {
+        closeDeleteSectionModal();
+        return;
+    }
+    
+    const response = await fetch(`/api/lists/${listId}/sections/${encodeURIComponent(sectionToDelete)}`, {
+        method: 'DELETE',
+        headers: {
+            'X-CSRFToken': csrfToken
+        }
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        showModal('✓ Section deleted successfully', 'success');
+        
+        const listData = await fetchListItems();
+        
+        if (listData.success) {
+            rebuildItemsList(listData.items, listData.empty_sections || []);
+        }
+    } else {
+        showModal(`✗ ${result.message}`, 'error');
+    }
+    
+    closeDeleteSectionModal();
+    deletingSectionName = null;
+}
+
+let currentSectionForAdd = null;
+
+function showSectionAddModal(sectionName, event) {
+    if (event) {
+        event.stopPropagation();
+    }
+    
+    currentSectionForAdd = sectionName;
+    
+    const modal = document.getElementById('section-add-item-modal');
+    const input = document.getElementById('section-item-input');
+    const title = document.getElementById('section-add-title');
+    
+    title.textContent = sectionName;
+    input.value = '';
+    modal.classList.remove('hidden');
+    modal.classList.add('flex');
+    
+    setTimeout(() => {
+        input.focus();
+    }, 100);
+}
+
+function closeSectionAddModal(event) {
+    if (event && event.target.id !== 'section-add-item-modal') {
+        return;
+    }
+    
+    const modal = document.getElementById('section-add-item-modal');
+    const autocomplete = document.getElementById('section-autocomplete');
+    modal.classList.add('hidden');
+    modal.classList.remove('flex');
+    autocomplete.classList.add('hidden');
+    currentSectionForAdd = null;
+}
+
+async function addItemToSection() {
+    const input = document.getElementById('section-item-input');
+    const itemText = input.value.trim();
+    const sectionName = currentSectionForAdd;
+    
+    if (!itemText || !sectionName) {
+        closeSectionAddModal();
+        return;
+    }
+    
+    const response = await fetch(`/api/lists/${listId}/items`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify({ 
+            text: itemText,
+            section: sectionName
+        })
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        showModal('✓ Item added successfully', 'success');
+        learnVocabularyItem(itemText);
+        
+        const itemsArray = [];
+        document.querySelectorAll('.item-row').forEach(row => {
+            const itemId = row.getAttribute('data-item-id');
+            const itemText = row.getAttribute('data-item-text');
+            const itemSection = row.getAttribute('data-section');
+            const itemChecked = row.getAttribute('data-checked') === 'true';
+            const itemQuantity = parseInt(row.getAttribute('data-quantity')) || 1;
+            
+            itemsArray.push({
+                _id: itemId,
+                text: itemText,
+                section: itemSection,
+                checked: itemChecked,
+                quantity: itemQuantity
+            });
+        });
+        
+        itemsArray.push({
+            _id: result.item_id,
+            text: itemText,
+            section: sectionName,
+            checked: false,
+            quantity: 1
+        });
+        
+        rebuildItemsList(itemsArray);
+    } else {
+        showModal(`✗ ${result.message}`, 'error');
+    }
+    
+    closeSectionAddModal();
+}
+
+const sectionItemInput = document.getElementById('section-item-input');
+const sectionAutocomplete = document.getElementById('section-autocomplete');
+
+if (sectionItemInput && sectionAutocomplete) {
+    sectionItemInput.addEventListener('input', async (e) => {
+        const query = e.target.value.trim();
+        
+        if (query.length < 2) {
+            sectionAutocomplete.classList.add('hidden');
+            return;
+        }
+        
+        const suggestions = await suggestItems(query);
+        
+        if (suggestions.length > 0) {
+            sectionAutocomplete.innerHTML = suggestions.map(s => 
+                `<div class="p-2 hover:bg-opacity-80 cursor-pointer" style="background-color: var(--bg-primary);" onclick="selectSectionSuggestion('${s}')">${s}</div>`
+            ).join('');
+            sectionAutocomplete.classList.remove('hidden');
+        } else {
+            sectionAutocomplete.classList.add('hidden');
+        }
+    });
+    
+    sectionItemInput.addEventListener('keypress', (e) => {
+        if (e.key === 'Enter') {
+            e.preventDefault();
+            addItemToSection();
+        }
+    });
+    
+    document.addEventListener('click', (e) => {
+        if (!sectionAutocomplete.contains(e.target) && e.target !== sectionItemInput) {
+            sectionAutocomplete.classList.add('hidden');
+        }
+    });
+}
+
+function selectSectionSuggestion(text) {
+    const input = document.getElementById('section-item-input');
+    input.value = text;
+    document.getElementById('section-autocomplete').classList.add('hidden');
+    addItemToSection();
+}
+
+function selectCreateSectionSuggestion(text) {
+    const input = document.getElementById('section-name-input');
+    input.value = text;
+    document.getElementById('section-autocomplete').classList.add('hidden');
+    input.focus();
+}
+
+document.getElementById('section-name-input').addEventListener('input', async (e) => {
+    const query = e.target.value.trim();
+    const sectionAutocomplete = document.getElementById('section-autocomplete');
+    
+    if (query.length < 2) {
+        sectionAutocomplete.classList.add('hidden');
+        return;
+    }
+    
+    const suggestions = await suggestItems(query);
+    
+    if (suggestions.length > 0) {
+        sectionAutocomplete.innerHTML = suggestions.map(s => 
+            `<div class="p-2 hover:bg-opacity-80 cursor-pointer" style="background-color: var(--bg-primary);" onclick="selectCreateSectionSuggestion('${escapeJs(s)}')">${escapeHtml(s)}</div>`
+        ).join('');
+        sectionAutocomplete.classList.remove('hidden');
+    } else {
+        sectionAutocomplete.classList.add('hidden');
+    }
+});
+
+document.getElementById('section-name-input').addEventListener('keypress', (e) => {
+    if (e.key === 'Enter') {
+        e.preventDefault();
+        saveNewSection();
+    }
+});
+
+document.getElementById('rename-section-input').addEventListener('keypress', (e) => {
+    if (e.key === 'Enter') {
+        e.preventDefault();
+        saveRenamedSection();
+    }
+});
+
+document.addEventListener('click', (e) => {
+    const menuContainer = document.getElementById('list-menu-container');
+    const dropdown = document.getElementById('list-menu-dropdown');
+    
+    if (menuContainer && !menuContainer.contains(e.target)) {
+        dropdown.classList.add('hidden');
+    }
+    
+    const sectionAutocomplete = document.getElementById('section-autocomplete');
+    const sectionNameInput = document.getElementById('section-name-input');
+    if (sectionAutocomplete && sectionNameInput && !sectionAutocomplete.contains(e.target) && e.target !== sectionNameInput) {
+        sectionAutocomplete.classList.add('hidden');
+    }
+});
+
+let moveToSectionItemId = null;
+
+function showMoveToSectionModal() {
+    if (!contextMenuItemId || !contextMenuItemText) return;
+    
+    moveToSectionItemId = contextMenuItemId;
+    const itemText = contextMenuItemText;
+    
+    const itemRow = document.querySelector(`[data-item-id="${moveToSectionItemId}"]`);
+    const currentSection = itemRow ? itemRow.getAttribute('data-section') : null;
+    
+    hideContextMenu();
+    
+    const modal = document.getElementById('move-to-section-modal');
+    const itemNameSpan = document.getElementById('move-item-name');
+    const sectionList = document.getElementById('section-list');
+    
+    itemNameSpan.textContent = itemText;
+    
+    const sections = new Set();
+    document.querySelectorAll('.section-header').forEach(header => {
+        const sectionName = header.getAttribute('data-section-name');
+        if (sectionName && sectionName !== currentSection) {
+            sections.add(sectionName);
+        }
+    });
+    
+    const sortedSections = Array.from(sections).sort((a, b) => a.toLowerCase().localeCompare(b.toLowerCase()));
+    
+    let html = '';
+    
+    if (currentSection) {
+        html += `<div class="flex items-center justify-between p-3 rounded cursor-pointer hover:bg-opacity-80 transition-colors" 
+                     style="background-color: var(--bg-primary);"
+                     onclick="moveItemToSection(null)">
+                    <span>🔓 Loose Items (Remove from section)</span>
+                </div>`;
+    }
+    
+    sortedSections.forEach(sectionName => {
+        const escapedSection = sectionName.replace(/'/g, "\\'");
+        html += `<div class="flex items-center justify-between p-3 rounded cursor-pointer hover:bg-opacity-80 transition-colors" 
+                     style="background-color: var(--bg-primary);"
+                     onclick="moveItemToSection('${escapedSection}')">
+                    <span>📁 ${sectionName}</span>
+                </div>`;
+    });
+    
+    if (html === '') {
+        html = '<p class="text-center py-4" style="color: var(--text-secondary);">No other sections available</p>';
+    }
+    
+    sectionList.innerHTML = html;
+    
+    modal.classList.remove('hidden');
+    modal.classList.add('flex');
+}
+
+function closeMoveToSectionModal(event) {
+    if (event && event.target.id !== 'move-to-section-modal') {
+        return;
+    }
+    
+    const modal = document.getElementById('move-to-section-modal');
+    modal.classList.add('hidden');
+    modal.classList.remove('flex');
+    moveToSectionItemId = null;
+}
+
+async function moveItemToSection(sectionName) {
+    if (!moveToSectionItemId) {
+        closeMoveToSectionModal();
+        return;
+    }
+    
+    const itemId = moveToSectionItemId;
+    
+    const response = await fetch(`/api/lists/${listId}/sections`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify({ 
+            item_id: itemId,
+            section_name: sectionName || ''
+        })
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        const message = sectionName 
+            ? `✓ Item moved to "${sectionName}"` 
+            : '✓ Item moved to loose items';
+        showModal(message, 'success');
+        
+        const listData = await fetchListItems();
+        
+        if (listData.success) {
+            rebuildItemsList(listData.items);
+        }
+    } else {
+        showModal(`✗ ${result.message}`, 'error');
+    }
+    
+    closeMoveToSectionModal();
+}
+
+function attachMoveModeListeners() {
+    const itemRows = document.querySelectorAll('.item-row');
+    itemRows.forEach(row => {
+        row.style.cursor = 'grab';
+        row.setAttribute('draggable', 'true');
+        
+        row.addEventListener('dragstart', handleDragStart);
+        row.addEventListener('dragover', handleDragOver);
+        row.addEventListener('drop', handleDrop);
+        row.addEventListener('dragend', handleDragEnd);
+        row.addEventListener('dragenter', handleDragEnter);
+        row.addEventListener('dragleave', handleDragLeave);
+        
+        row.addEventListener('touchstart', handleTouchStart, { passive: false });
+        row.addEventListener('touchmove', handleTouchMove, { passive: false });
+        row.addEventListener('touchend', handleTouchEnd, { passive: false });
+    });
+    
+    const sectionHeaders = document.querySelectorAll('.section-header');
+    sectionHeaders.forEach(header => {
+        header.addEventListener('dragover', handleSectionDragOver);
+        header.addEventListener('drop', handleSectionDrop);
+        header.addEventListener('dragleave', handleSectionDragLeave);
+        header.addEventListener('dragenter', handleSectionDragEnter);
+        
+        header.addEventListener('touchmove', handleSectionTouchMove, { passive: false });
+        header.addEventListener('touchend', handleSectionTouchEnd, { passive: false });
+    });
+    
+    const sectionContainers = document.querySelectorAll('.section-items');
+    sectionContainers.forEach(container => {
+        container.addEventListener('dragover', handleDragOver);
+        container.addEventListener('drop', handleDrop);
+    });
+    
+    const looseItemsZone = document.getElementById('loose-items-drop-zone');
+    if (looseItemsZone) {
+        looseItemsZone.addEventListener('dragover', handleLooseItemsDragOver);
+        looseItemsZone.addEventListener('drop', handleLooseItemsDrop);
+        looseItemsZone.addEventListener('dragleave', handleLooseItemsDragLeave);
+        looseItemsZone.addEventListener('dragenter', handleLooseItemsDragEnter);
+        
+        looseItemsZone.addEventListener('touchmove', handleLooseItemsTouchMove, { passive: false });
+        looseItemsZone.addEventListener('touchend', handleLooseItemsTouchEnd, { passive: false });
+    }
+}
+
+function enterMoveMode() {
+    if (!isOrdered) {
+        showModal('✗ This list is not ordered', 'error');
+        return;
+    }
+    
+    hideContextMenu();
+    
+    moveModeActive = true;
+    
+    const exitBtn = document.getElementById('exit-move-mode-btn');
+    exitBtn.classList.remove('hidden');
+    
+    // Rebuild the items list to show the orphaned items section if needed
+    const itemsArray = [];
+    document.querySelectorAll('.item-row').forEach(row => {
+        const itemId = row.getAttribute('data-item-id');
+        const itemText = row.getAttribute('data-item-text');
+        const itemSection = row.getAttribute('data-section');
+        const itemChecked = row.getAttribute('data-checked') === 'true';
+        const itemQuantity = parseInt(row.getAttribute('data-quantity')) || 1;
+        
+        itemsArray.push({
+            _id: itemId,
+            text: itemText,
+            section: itemSection,
+            checked: itemChecked,
+            quantity: itemQuantity
+        });
+    });
+    
+    rebuildItemsList(itemsArray);
+    
+    // Attach move mode listeners to all items (including newly created orphaned section)
+    attachMoveModeListeners();
+    
+    showModal('✓ Move mode activated - Drag items to reorder or move to sections', 'success');
+}
+
+function exitMoveMode() {
+    moveModeActive = false;
+    
+    if (autoScrollInterval) {
+        clearInterval(autoScrollInterval);
+        autoScrollInterval = null;
+    }
+    
+    const exitBtn = document.getElementById('exit-move-mode-btn');
+    exitBtn.classList.add('hidden');
+    
+    const itemRows = document.querySelectorAll('.item-row');
+    itemRows.forEach(row => {
+        row.style.cursor = 'pointer';
+        row.removeAttribute('draggable');
+        row.style.opacity = '1';
+        row.style.transform = '';
+        row.style.borderTop = '';
+        
+        row.removeEventListener('dragstart', handleDragStart);
+        row.removeEventListener('dragover', handleDragOver);
+        row.removeEventListener('drop', handleDrop);
+        row.removeEventListener('dragend', handleDragEnd);
+        row.removeEventListener('dragenter', handleDragEnter);
+        row.removeEventListener('dragleave', handleDragLeave);
+        
+        row.removeEventListener('touchstart', handleTouchStart);
+        row.removeEventListener('touchmove', handleTouchMove);
+        row.removeEventListener('touchend', handleTouchEnd);
+    });
+    
+    const sectionHeaders = document.querySelectorAll('.section-header');
+    sectionHeaders.forEach(header => {
+        header.style.backgroundColor = '';
+        header.style.border = '';
+        header.removeEventListener('dragover', handleSectionDragOver);
+        header.removeEventListener('drop', handleSectionDrop);
+        header.removeEventListener('dragleave', handleSectionDragLeave);
+        header.removeEventListener('dragenter', handleSectionDragEnter);
+        header.removeEventListener('touchmove', handleSectionTouchMove);
+        header.removeEventListener('touchend', handleSectionTouchEnd);
+    });
+    
+    const sectionContainers = document.querySelectorAll('.section-items');
+    sectionContainers.forEach(container => {
+        container.removeEventListener('dragover', handleDragOver);
+        container.removeEventListener('drop', handleDrop);
+    });
+    
+    const looseItemsZone = document.getElementById('loose-items-drop-zone');
+    if (looseItemsZone) {
+        looseItemsZone.style.backgroundColor = '';
+        looseItemsZone.style.border = '';
+        looseItemsZone.removeEventListener('dragover', handleLooseItemsDragOver);
+        looseItemsZone.removeEventListener('drop', handleLooseItemsDrop);
+        looseItemsZone.removeEventListener('dragleave', handleLooseItemsDragLeave);
+        looseItemsZone.removeEventListener('dragenter', handleLooseItemsDragEnter);
+        looseItemsZone.removeEventListener('touchmove', handleLooseItemsTouchMove);
+        looseItemsZone.removeEventListener('touchend', handleLooseItemsTouchEnd);
+    }
+    
+    if (dragPlaceholder) {
+        dragPlaceholder.remove();
+        dragPlaceholder = null;
+    }
+    
+    draggedItemElement = null;
+    touchTargetElement = null;
+    
+    // Rebuild the items list to hide the orphaned items section if not needed
+    const itemsArray = [];
+    document.querySelectorAll('.item-row').forEach(row => {
+        const itemId = row.getAttribute('data-item-id');
+        const itemText = row.getAttribute('data-item-text');
+        const itemSection = row.getAttribute('data-section');
+        const itemChecked = row.getAttribute('data-checked') === 'true';
+        const itemQuantity = parseInt(row.getAttribute('data-quantity')) || 1;
+        
+        itemsArray.push({
+            _id: itemId,
+            text: itemText,
+            section: itemSection,
+            checked: itemChecked,
+            quantity: itemQuantity
+        });
+    });
+    
+    rebuildItemsList(itemsArray);
+    
+    showModal('✓ Move mode deactivated', 'success');
+}
+
+function handleDragStart(e) {
+    draggedItemElement = e.target.closest('.item-row');
+    draggedItem = {
+        id: draggedItemElement.getAttribute('data-item-id'),
+        text: draggedItemElement.getAttribute('data-item-text')
+    };
+    
+    draggedItemElement.style.opacity = '0.4';
+    e.dataTransfer.effectAllowed = 'move';
+}
+
+function handleDragOver(e) {
+    if (e.preventDefault) {
+        e.preventDefault();
+    }
+    e.dataTransfer.dropEffect = 'move';
+    
+    const targetRow = e.target.closest('.item-row');
+    if (targetRow && targetRow !== draggedItemElement) {
+        const allRows = document.querySelectorAll('.item-row');
+        allRows.forEach(row => {
+            if (row !== targetRow && row !== draggedItemElement) {
+                row.style.borderTop = '';
+            }
+        });
+        targetRow.style.borderTop = '3px solid #3b82f6';
+    }
+    
+    return false;
+}
+
+function handleDragEnter(e) {
+    // Handled in handleDragOver for better consistency
+}
+
+function handleDragLeave(e) {
+    // Handled in handleDragOver for better consistency
+}
+
+async function handleDrop(e) {
+    if (e.stopPropagation) {
+        e.stopPropagation();
+    }
+    
+    const allRows = document.querySelectorAll('.item-row');
+    allRows.forEach(row => {
+        row.style.borderTop = '';
+    });
+    
+    const sectionHeader = e.target.closest('.section-header');
+    if (sectionHeader) {
+        return await handleSectionDrop(e);
+    }
+    
+    let targetRow = e.target.closest('.item-row');
+    
+    // If we dropped on a section container (not directly on an item),
+    // find the section and move the item to that section
+    if (!targetRow) {
+        const sectionContainer = e.target.closest('.section-items');
+        if (sectionContainer && draggedItemElement) {
+            const sectionHeader = sectionContainer.previousElementSibling;
+            if (sectionHeader && sectionHeader.classList.contains('section-header')) {
+                const sectionName = sectionHeader.getAttribute('data-section-name');
+                const draggedItemId = draggedItemElement.getAttribute('data-item-id');
+                
+                const sectionResponse = await fetch(`/api/lists/${listId}/sections`, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'X-CSRFToken': csrfToken
+                    },
+                    body: JSON.stringify({ 
+                        item_id: draggedItemId,
+                        section_name: sectionName
+                    })
+                });
+                
+                const sectionResult = await sectionResponse.json();
+                
+                if (sectionResult.success) {
+                    const listData = await fetchListItems();
+                    
+                    if (listData.success) {
+                        rebuildItemsList(listData.items, listData.empty_sections || []);
+                        reattachMoveEventListeners();
+                        showModal(`✓ Item moved to section "${sectionName}"`, 'success');
+                    }
+                } else {
+                    showModal(`✗ ${sectionResult.message}`, 'error');
+                }
+                return false;
+            }
+        }
+    }
+    
+    if (!draggedItemElement || !targetRow || draggedItemElement === targetRow) {
+        return false;
+    }
+    
+    const draggedItemId = draggedItemElement.getAttribute('data-item-id');
+    const targetSection = targetRow.getAttribute('data-section') || '';
+    const draggedSection = draggedItemElement.getAttribute('data-section') || '';
+    
+    if (targetSection !== draggedSection) {
+        const sectionResponse = await fetch(`/api/lists/${listId}/sections`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfToken
+            },
+            body: JSON.stringify({ 
+                item_id: draggedItemId,
+                section_name: targetSection
+            })
+        });
+        
+        const sectionResult = await sectionResponse.json();
+        
+        if (!sectionResult.success) {
+            showModal(`✗ ${sectionResult.message}`, 'error');
+            return false;
+        }
+        
+        const listData = await fetchListItems();
+        
+        if (listData.success) {
+            rebuildItemsList(listData.items, listData.empty_sections || []);
+            reattachMoveEventListeners();
+            showModal('✓ Item moved to different section', 'success');
+        }
+        return false;
+    }
+    
+    const allItems = Array.from(document.querySelectorAll('.item-row'));
+    const draggedIndex = allItems.indexOf(draggedItemElement);
+    const targetIndex = allItems.indexOf(targetRow);
+    
+    if (targetIndex > draggedIndex) {
+        targetRow.parentNode.insertBefore(draggedItemElement, targetRow.nextSibling);
+    } else {
+        targetRow.parentNode.insertBefore(draggedItemElement, targetRow);
+    }
+    
+    updateItemNumbers();
+    
+    const itemOrders = {};
+    const updatedItems = Array.from(document.querySelectorAll('.item-row'));
+    updatedItems.forEach((row, index) => {
+        const itemId = row.getAttribute('data-item-id');
+        itemOrders[itemId] = index;
+    });
+    
+    const reorderResponse = await fetch(`/api/lists/${listId}/items/reorder`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify({ item_orders: itemOrders })
+    });
+    
+    const reorderResult = await reorderResponse.json();
+    
+    if (reorderResult.success) {
+        showModal('✓ Item moved successfully', 'success');
+    } else {
+        showModal('✗ Failed to reorder items', 'error');
+    }
+    
+    return false;
+}
+
+function updateItemNumbers() {
+    if (!isOrdered || !showNumbering) return;
+    
+    const allRows = document.querySelectorAll('.item-row');
+    allRows.forEach((row, index) => {
+        const numberSpan = row.querySelector('.item-number');
+        if (numberSpan) {
+            numberSpan.textContent = `${index + 1}.`;
+        }
+    });
+}
+
+function handleDragEnd(e) {
+    if (draggedItemElement) {
+        draggedItemElement.style.opacity = '1';
+    }
+    
+    const allRows = document.querySelectorAll('.item-row');
+    allRows.forEach(row => {
+        row.style.borderTop = '';
+    });
+    
+    const sectionHeaders = document.querySelectorAll('.section-header');
+    sectionHeaders.forEach(header => {
+        header.style.backgroundColor = '';
+        header.style.border = '';
+    });
+}
+
+function handleSectionDragOver(e) {
+    e.preventDefault();
+    e.stopPropagation();
+    
+    const sectionHeader = e.target.closest('.section-header');
+    if (sectionHeader) {
+        sectionHeader.style.backgroundColor = 'rgba(59, 130, 246, 0.7)';
+        sectionHeader.style.border = '3px solid rgba(59, 130, 246, 1)';
+        sectionHeader.style.transform = 'scale(1.02)';
+    }
+    
+    return false;
+}
+
+function handleSectionDragEnter(e) {
+    e.preventDefault();
+    const sectionHeader = e.target.closest('.section-header');
+    if (sectionHeader) {
+        sectionHeader.style.backgroundColor = 'rgba(59, 130, 246, 0.5)';
+        sectionHeader.style.border = '2px solid rgba(59, 130, 246, 0.8)';
+    }
+}
+
+function handleSectionDragLeave(e) {
+    const sectionHeader = e.target.closest('.section-header');
+    if (sectionHeader) {
+        sectionHeader.style.backgroundColor = '';
+        sectionHeader.style.border = '';
+        sectionHeader.style.transform = '';
+    }
+}
+
+function handleSectionTouchMove(e) {
+    if (!moveModeActive || !draggedItemElement) return;
+    
+    e.preventDefault();
+    
+    const touch = e.touches[0];
+    const elementBelow = document.elementFromPoint(touch.clientX, touch.clientY);
+    const sectionHeader = elementBelow ? elementBelow.closest('.section-header') : null;
+    
+    const allSectionHeaders = document.querySelectorAll('.section-header');
+    allSectionHeaders.forEach(header => {
+        header.style.backgroundColor = '';
+        header.style.border = '';
+    });
+    
+    if (sectionHeader) {
+        sectionHeader.style.backgroundColor = 'rgba(59, 130, 246, 0.5)';
+        sectionHeader.style.border = '2px solid rgba(59, 130, 246, 0.8)';
+    }
+}
+
+async function handleSectionDrop(e) {
+    e.preventDefault();
+    e.stopPropagation();
+    
+    const sectionHeader = e.target.closest('.section-header');
+    if (!sectionHeader || !draggedItemElement) {
+        return false;
+    }
+    
+    sectionHeader.style.backgroundColor = '';
+    sectionHeader.style.border = '';
+    sectionHeader.style.transform = '';
+    
+    const sectionName = sectionHeader.getAttribute('data-section-name');
+    const itemId = draggedItemElement.getAttribute('data-item-id');
+    
+    const response = await fetch(`/api/lists/${listId}/sections`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify({ 
+            item_id: itemId,
+            section_name: sectionName
+        })
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        showModal(`✓ Item moved to section "${sectionName}"`, 'success');
+        
+        const listData = await fetchListItems();
+        
+        if (listData.success) {
+            rebuildItemsList(listData.items, listData.empty_sections || []);
+            reattachMoveEventListeners();
+        }
+    } else {
+        showModal(`✗ ${result.message}`, 'error');
+    }
+    
+    return false;
+}
+
+function reattachMoveEventListeners() {
+    if (!moveModeActive) return;
+    
+    const itemRows = document.querySelectorAll('.item-row');
+    itemRows.forEach(row => {
+        row.style.cursor = 'grab';
+        row.setAttribute('draggable', 'true');
+        
+        row.addEventListener('dragstart', handleDragStart);
+        row.addEventListener('dragover', handleDragOver);
+        row.addEventListener('drop', handleDrop);
+        row.addEventListener('dragend', handleDragEnd);
+        row.addEventListener('dragenter', handleDragEnter);
+        row.addEventListener('dragleave', handleDragLeave);
+        
+        row.addEventListener('touchstart', handleTouchStart, { passive: false });
+        row.addEventListener('touchmove', handleTouchMove, { passive: false });
+        row.addEventListener('touchend', handleTouchEnd, { passive: false });
+    });
+    
+    const sectionHeaders = document.querySelectorAll('.section-header');
+    sectionHeaders.forEach(header => {
+        header.addEventListener('dragover', handleSectionDragOver);
+        header.addEventListener('drop', handleSectionDrop);
+        header.addEventListener('dragleave', handleSectionDragLeave);
+        header.addEventListener('dragenter', handleSectionDragEnter);
+        
+        header.addEventListener('touchmove', handleSectionTouchMove, { passive: false });
+        header.addEventListener('touchend', handleSectionTouchEnd, { passive: false });
+    });
+    
+    const sectionContainers = document.querySelectorAll('.section-items');
+    sectionContainers.forEach(container => {
+        container.addEventListener('dragover', handleDragOver);
+        container.addEventListener('drop', handleDrop);
+    });
+    
+    const looseItemsZone = document.getElementById('loose-items-drop-zone');
+    if (looseItemsZone) {
+        looseItemsZone.addEventListener('dragover', handleLooseItemsDragOver);
+        looseItemsZone.addEventListener('drop', handleLooseItemsDrop);
+        looseItemsZone.addEventListener('dragleave', handleLooseItemsDragLeave);
+        looseItemsZone.addEventListener('dragenter', handleLooseItemsDragEnter);
+        
+        looseItemsZone.addEventListener('touchmove', handleLooseItemsTouchMove, { passive: false });
+        looseItemsZone.addEventListener('touchend', handleLooseItemsTouchEnd, { passive: false });
+    }
+}
+
+async function handleSectionTouchEnd(e) {
+    if (!moveModeActive || !draggedItemElement) return;
+    
+    const touch = e.changedTouches[0];
+    const elementBelow = document.elementFromPoint(touch.clientX, touch.clientY);
+    const sectionHeader = elementBelow ? elementBelow.closest('.section-header') : null;
+    
+    const allSectionHeaders = document.querySelectorAll('.section-header');
+    allSectionHeaders.forEach(header => {
+        header.style.backgroundColor = '';
+        header.style.border = '';
+    });
+    
+    if (sectionHeader) {
+        const sectionName = sectionHeader.getAttribute('data-section-name');
+        const itemId = draggedItemElement.getAttribute('data-item-id');
+        
+        const response = await fetch(`/api/lists/${listId}/sections`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfToken
+            },
+            body: JSON.stringify({ 
+                item_id: itemId,
+                section_name: sectionName
+            })
+        });
+        
+        const result = await response.json();
+        
+        if (result.success) {
+            showModal(`✓ Item moved to section "${sectionName}"`, 'success');
+            
+            const listData = await fetchListItems();
+            
+            if (listData.success) {
+                rebuildItemsList(listData.items, listData.empty_sections || []);
+                reattachMoveEventListeners();
+            }
+        } else {
+            showModal(`✗ ${result.message}`, 'error');
+        }
+    }
+    
+    if (draggedItemElement) {
+        draggedItemElement.style.opacity = '1';
+        draggedItemElement.style.transform = '';
+    }
+    
+    draggedItemElement = null;
+}
+
+function handleLooseItemsDragOver(e) {
+    e.preventDefault();
+    e.stopPropagation();
+    
+    const looseItemsZone = document.getElementById('loose-items-drop-zone');
+    if (looseItemsZone) {
+        looseItemsZone.style.backgroundColor = 'rgba(59, 130, 246, 0.3)';
+        looseItemsZone.style.border = '3px solid rgba(59, 130, 246, 0.8)';
+    }
+    
+    return false;
+}
+
+function handleLooseItemsDragEnter(e) {
+    e.preventDefault();
+    const looseItemsZone = document.getElementById('loose-items-drop-zone');
+    if (looseItemsZone) {
+        looseItemsZone.style.backgroundColor = 'rgba(59, 130, 246, 0.3)';
+        looseItemsZone.style.border = '3px solid rgba(59, 130, 246, 0.8)';
+    }
+}
+
+function handleLooseItemsDragLeave(e) {
+    const looseItemsZone = document.getElementById('loose-items-drop-zone');
+    if (looseItemsZone) {
+        looseItemsZone.style.backgroundColor = '';
+        looseItemsZone.style.border = '';
+    }
+}
+
+async function handleLooseItemsDrop(e) {
+    e.preventDefault();
+    e.stopPropagation();
+    
+    const looseItemsZone = document.getElementById('loose-items-drop-zone');
+    if (!looseItemsZone || !draggedItemElement) {
+        return false;
+    }
+    
+    looseItemsZone.style.backgroundColor = '';
+    looseItemsZone.style.border = '';
+    
+    const itemId = draggedItemElement.getAttribute('data-item-id');
+    
+    const response = await fetch(`/api/lists/${listId}/sections`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify({ 
+            item_id: itemId,
+            section_name: ''
+        })
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        showModal('✓ Item moved to loose items', 'success');
+        
+        const listData = await fetchListItems();
+        
+        if (listData.success) {
+            rebuildItemsList(listData.items, listData.empty_sections || []);
+            reattachMoveEventListeners();
+        }
+    } else {
+        showModal(`✗ ${result.message}`, 'error');
+    }
+    
+    return false;
+}
+
+function handleLooseItemsTouchMove(e) {
+    if (!moveModeActive || !draggedItemElement) return;
+    
+    if (e.target.closest('.item-row')) {
+        return;
+    }
+    
+    e.preventDefault();
+    e.stopPropagation();
+    
+    const touch = e.touches[0];
+    const elementBelow = document.elementFromPoint(touch.clientX, touch.clientY);
+    const looseItemsZone = elementBelow ? elementBelow.closest('#loose-items-drop-zone') : null;
+    
+    const zone = document.getElementById('loose-items-drop-zone');
+    if (zone) {
+        if (looseItemsZone) {
+            zone.style.backgroundColor = 'rgba(59, 130, 246, 0.3)';
+            zone.style.border = '3px solid rgba(59, 130, 246, 0.8)';
+        } else {
+            zone.style.backgroundColor = '';
+            zone.style.border = '';
+        }
+    }
+}
+
+async function handleLooseItemsTouchEnd(e) {
+    if (!moveModeActive || !draggedItemElement) return;
+    
+    if (e.target.closest('.item-row')) {
+        return;
+    }
+    
+    e.preventDefault();
+    e.stopPropagation();
+    
+    const touch = e.changedTouches[0];
+    const elementBelow = document.elementFromPoint(touch.clientX, touch.clientY);
+    const looseItemsZone = elementBelow ? elementBelow.closest('#loose-items-drop-zone') : null;
+    
+    const zone = document.getElementById('loose-items-drop-zone');
+    if (zone) {
+        zone.style.backgroundColor = '';
+        zone.style.border = '';
+    }
+    
+    if (looseItemsZone) {
+        const itemId = draggedItemElement.getAttribute('data-item-id');
+        
+        const response = await fetch(`/api/lists/${listId}/sections`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfToken
+            },
+            body: JSON.stringify({ 
+                item_id: itemId,
+                section_name: ''
+            })
+        });
+        
+        const result = await response.json();
+        
+        if (result.success) {
+            showModal('✓ Item moved to loose items', 'success');
+            
+            const listData = await fetchListItems();
+            
+            if (listData.success) {
+                rebuildItemsList(listData.items, listData.empty_sections || []);
+                reattachMoveEventListeners();
+            }
+        } else {
+            showModal(`✗ ${result.message}`, 'error');
+        }
+    }
+    
+    if (draggedItemElement) {
+        draggedItemElement.style.opacity = '1';
+        draggedItemElement.style.transform = '';
+    }
+    
+    draggedItemElement = null;
+}
+
+function handleTouchStart(e) {
+    if (!moveModeActive) return;
+    
+    draggedItemElement = e.target.closest('.item-row');
+    if (!draggedItemElement) return;
+    
+    draggedItem = {
+        id: draggedItemElement.getAttribute('data-item-id'),
+        text: draggedItemElement.getAttribute('data-item-text')
+    };
+    
+    touchStartY = e.touches[0].clientY;
+    draggedItemElement.style.opacity = '0.4';
+    draggedItemElement.style.transform = 'scale(1.05)';
+    
+    e.preventDefault();
+}
+
+function handleTouchMove(e) {
+    if (!moveModeActive || !draggedItemElement) return;
+    
+    e.preventDefault();
+    touchCurrentY = e.touches[0].clientY;
+    
+    const touch = e.touches[0];
+    const elementAtPoint = document.elementFromPoint(touch.clientX, touch.clientY);
+    const targetRow = elementAtPoint ? elementAtPoint.closest('.item-row') : null;
+    const sectionHeader = elementAtPoint ? elementAtPoint.closest('.section-header') : null;
+    const looseItemsZone = elementAtPoint ? elementAtPoint.closest('#loose-items-drop-zone') : null;
+    
+    const allRows = document.querySelectorAll('.item-row');
+    allRows.forEach(row => {
+        if (row !== draggedItemElement) {
+            row.style.borderTop = '';
+        }
+    });
+    
+    const allSectionHeaders = document.querySelectorAll('.section-header');
+    allSectionHeaders.forEach(header => {
+        header.style.backgroundColor = '';
+        header.style.border = '';
+    });
+    
+    const zone = document.getElementById('loose-items-drop-zone');
+    if (zone) {
+        zone.style.backgroundColor = '';
+        zone.style.border = '';
+    }
+    
+    if (sectionHeader) {
+        sectionHeader.style.backgroundColor = 'rgba(59, 130, 246, 0.5)';
+        sectionHeader.style.border = '2px solid rgba(59, 130, 246, 0.8)';
+        touchTargetElement = null;
+    } else if (looseItemsZone && !targetRow) {
+        if (zone) {
+            zone.style.backgroundColor = 'rgba(59, 130, 246, 0.3)';
+            zone.style.border = '3px solid rgba(59, 130, 246, 0.8)';
+        }
+        touchTargetElement = 'loose-items';
+    } else if (targetRow && targetRow !== draggedItemElement) {
+        touchTargetElement = targetRow;
+        targetRow.style.borderTop = '3px solid #3b82f6';
+    } else {
+        touchTargetElement = null;
+    }
+    
+    const windowHeight = window.innerHeight;
+    const scrollThreshold = 100;
+    
+    if (autoScrollInterval) {
+        clearInterval(autoScrollInterval);
+        autoScrollInterval = null;
+    }
+    
+    if (touch.clientY < scrollThreshold) {
+        autoScrollInterval = setInterval(() => {
+            window.scrollBy(0, -10);
+        }, 50);
+    } else if (touch.clientY > windowHeight - scrollThreshold) {
+        autoScrollInterval = setInterval(() => {
+            window.scrollBy(0, 10);
+        }, 50);
+    }
+}
+
+async function handleTouchEnd(e) {
+    if (!moveModeActive || !draggedItemElement) return;
+    
+    e.preventDefault();
+    
+    if (autoScrollInterval) {
+        clearInterval(autoScrollInterval);
+        autoScrollInterval = null;
+    }
+    
+    draggedItemElement.style.opacity = '1';
+    draggedItemElement.style.transform = '';
+    
+    const allRows = document.querySelectorAll('.item-row');
+    allRows.forEach(row => {
+        row.style.borderTop = '';
+    });
+    
+    const allSectionHeaders = document.querySelectorAll('.section-header');
+    allSectionHeaders.forEach(header => {
+        header.style.backgroundColor = '';
+        header.style.border = '';
+    });
+    
+    const zone = document.getElementById('loose-items-drop-zone');
+    if (zone) {
+        zone.style.backgroundColor = '';
+        zone.style.border = '';
+    }
+    
+    const touch = e.changedTouches[0];
+    const elementBelow = document.elementFromPoint(touch.clientX, touch.clientY);
+    const sectionHeader = elementBelow ? elementBelow.closest('.section-header') : null;
+    const looseItemsZone = elementBelow ? elementBelow.closest('#loose-items-drop-zone') : null;
+    
+    if (sectionHeader) {
+        const sectionName = sectionHeader.getAttribute('data-section-name');
+        const itemId = draggedItemElement.getAttribute('data-item-id');
+        
+        const response = await fetch(`/api/lists/${listId}/sections`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfToken
+            },
+            body: JSON.stringify({ 
+                item_id: itemId,
+                section_name: sectionName
+            })
+        });
+        
+        const result = await response.json();
+        
+        if (result.success) {
+            showModal(`✓ Item moved to section "${sectionName}"`, 'success');
+            
+            const listData = await fetchListItems();
+            
+            if (listData.success) {
+                rebuildItemsList(listData.items, listData.empty_sections || []);
+                reattachMoveEventListeners();
+            }
+        } else {
+            showModal(`✗ ${result.message}`, 'error');
+        }
+        
+        draggedItemElement = null;
+        touchTargetElement = null;
+        return;
+    }
+    
+    if (touchTargetElement === 'loose-items' || (looseItemsZone && !elementBelow.closest('.item-row'))) {
+        const itemId = draggedItemElement.getAttribute('data-item-id');
+        
+        const response = await fetch(`/api/lists/${listId}/sections`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfToken
+            },
+            body: JSON.stringify({ 
+                item_id: itemId,
+                section_name: ''
+            })
+        });
+        
+        const result = await response.json();
+        
+        if (result.success) {
+            showModal('✓ Item moved to loose items', 'success');
+            
+            const listData = await fetchListItems();
+            
+            if (listData.success) {
+                rebuildItemsList(listData.items, listData.empty_sections || []);
+                reattachMoveEventListeners();
+            }
+        } else {
+            showModal(`✗ ${result.message}`, 'error');
+        }
+        
+        draggedItemElement = null;
+        touchTargetElement = null;
+        return;
+    }
+    
+    if (!touchTargetElement || draggedItemElement === touchTargetElement) {
+        draggedItemElement = null;
+        touchTargetElement = null;
+        return;
+    }
+    
+    const draggedItemId = draggedItemElement.getAttribute('data-item-id');
+    const targetSection = touchTargetElement.getAttribute('data-section') || '';
+    const draggedSection = draggedItemElement.getAttribute('data-section') || '';
+    
+    if (targetSection !== draggedSection) {
+        const sectionResponse = await fetch(`/api/lists/${listId}/sections`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfToken
+            },
+            body: JSON.stringify({ 
+                item_id: draggedItemId,
+                section_name: targetSection
+            })
+        });
+        
+        const sectionResult = await sectionResponse.json();
+        
+        if (!sectionResult.success) {
+            showModal(`✗ ${sectionResult.message}`, 'error');
+            draggedItemElement = null;
+            touchTargetElement = null;
+            return;
+        }
+        
+        const listData = await fetchListItems();
+        
+        if (listData.success) {
+            rebuildItemsList(listData.items, listData.empty_sections || []);
+            reattachMoveEventListeners();
+            showModal('✓ Item moved to different section', 'success');
+        }
+        
+        draggedItemElement = null;
+        touchTargetElement = null;
+        return;
+    }
+    
+    const allItems = Array.from(document.querySelectorAll('.item-row'));
+    const draggedIndex = allItems.indexOf(draggedItemElement);
+    const targetIndex = allItems.indexOf(touchTargetElement);
+    
+    if (targetIndex > draggedIndex) {
+        touchTargetElement.parentNode.insertBefore(draggedItemElement, touchTargetElement.nextSibling);
+    } else {
+        touchTargetElement.parentNode.insertBefore(draggedItemElement, touchTargetElement);
+    }
+    
+    updateItemNumbers();
+    
+    const itemOrders = {};
+    const updatedItems = Array.from(document.querySelectorAll('.item-row'));
+    updatedItems.forEach((row, index) => {
+        const itemId = row.getAttribute('data-item-id');
+        itemOrders[itemId] = index;
+    });
+    
+    const response = await fetch(`/api/lists/${listId}/items/reorder`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify({ item_orders: itemOrders })
+    });
+    
+    const result = await response.json();
+    
+    if (result.success) {
+        showModal('✓ Item moved successfully', 'success');
+    } else {
+        showModal('✗ Failed to reorder items', 'error');
+    }
+    
+    draggedItemElement = null;
+    touchTargetElement = null;
+}
+
+window.addEventListener('scroll', function() {
+    const exitBtn = document.getElementById('exit-move-mode-btn');
+    if (exitBtn && !exitBtn.classList.contains('hidden')) {
+        exitBtn.style.position = 'fixed';
+        exitBtn.style.top = '20px';
+    }
+});
@@ -0,0 +1,101 @@
+// Item autocomplete filtered in the browser. The user's vocabulary is
+// fetched on first use (revalidated with its ETag against a copy in
+// localStorage) and updated in place as items are added, so typing makes
+// no requests. /api/autocomplete is only asked when the vocabulary could
+// not load, or was truncated and has too few local matches.
+const SUGGESTION_LIMIT = 5;
+const vocabularyStorageKey = `vocabulary_${currentUserId}`;
+let vocabulary = null;
+let vocabularyLoading = null;
+
+function loadVocabulary() {
+    if (!vocabularyLoading) {
+        vocabularyLoading = fetchVocabulary();
+    }
+    return vocabularyLoading;
+}
+
+async function fetchVocabulary() {
+    if (!currentUserId) return;
+    let stored = null;
+    try {
+        stored = JSON.parse(localStorage.getItem(vocabularyStorageKey));
+    } catch (e) {
+        stored = null;
+    }
+
+    try {
+        const headers = stored && stored.etag ? { 'If-None-Match': stored.etag } : {};
+        const response = await fetch('/api/vocabulary', { headers, redirect: 'error' });
+        if (response.status === 304 && stored) {
+            setVocabulary(stored);
+        } else if (response.ok) {
+            const data = await response.json();
+            setVocabulary({ etag: response.headers.get('ETag'), complete: data.complete, items: data.items });
+            saveVocabulary();
+        }
+    } catch (e) {
+        console.error('Failed to load vocabulary:', e);
+    }
+}
+
+function setVocabulary(data) {
+    vocabulary = data;
+    vocabulary.lowered = data.items.map(([text]) => text.toLowerCase());
+}
+
+function saveVocabulary() {
+    try {
+        const { etag, complete, items } = vocabulary;
+        localStorage.setItem(vocabularyStorageKey, JSON.stringify({ etag, complete, items }));
+    } catch (e) {
+        console.error('Failed to save vocabulary:', e);
+    }
+}
+
+function localSuggestions(query) {
+    // Items are ranked by frequency, so the first prefix matches are the best
+    const prefix = query.toLowerCase();
+    const matches = [];
+    for (let i = 0; i < vocabulary.lowered.length && matches.length < SUGGESTION_LIMIT; i++) {
+        if (vocabulary.lowered[i].startsWith(prefix)) {
+            matches.push(vocabulary.items[i][0]);
+        }
+    }
+    return matches;
+}
+
+async function suggestItems(query) {
+    await loadVocabulary();
+    if (vocabulary) {
+        const matches = localSuggestions(query);
+        if (matches.length === SUGGESTION_LIMIT || vocabulary.complete) {
+            return matches;
+        }
+    }
+    const response = await fetch(`/api/autocomplete?q=${encodeURIComponent(query)}`);
+    return response.ok ? response.json() : [];
+}
+
+function learnVocabularyItem(text) {
+    // Mirrors the server's autocomplete_cache update for an added item
+    if (!vocabulary) return;
+    let index = vocabulary.items.findIndex(([itemText]) => itemText === text);
+    if (index === -1) {
+        vocabulary.items.push([text, 0]);
+        vocabulary.lowered.push(text.toLowerCase());
+        index = vocabulary.items.length - 1;
+    }
+    const entry = vocabulary.items[index];
+    entry[1] += 1;
+    while (index > 0 && vocabulary.items[index - 1][1] < entry[1]) {
+        vocabulary.items[index] = vocabulary.items[index - 1];
+        vocabulary.lowered[index] = vocabulary.lowered[index - 1];
+        index--;
+    }
+    vocabulary.items[index] = entry;
+    vocabulary.lowered[index] = text.toLowerCase();
+    // The server copy changed too, so the next page load fetches it afresh
+    vocabulary.etag = null;
+    saveVocabulary();
+}
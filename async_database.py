@@ -0,0 +1,100 @@
+from pymongo import AsyncMongoClient, read_preferences
+from bson.objectid import ObjectId
+import os
+import re
+
+from database import EXPLORE_SORTS, LIST_SUMMARY_PROJECTION, PoolStats, mongo_client_options, normalize_tags
+
+
+class AsyncDatabase:
+    """Read-only subset of the Database API on pymongo's asyncio client.
+
+    Used by the ASGI routes in asgi.py. Method names, arguments and return
+    values match Database so route code reads the same with `await`.
+    """
+
+    def __init__(self, mongo_uri=None, db_name=None):
+        self.mongo_uri = mongo_uri or os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+        self.db_name = db_name or os.getenv('MONGO_DB_NAME', 'list_tracker')
+        self.read_heavy_preference = read_preferences.make_read_preference(
+            read_preferences.read_pref_mode_from_name(os.getenv('MONGO_READ_HEAVY_PREFERENCE', 'primary')),
+            None
+        )
+        self.pool_stats = PoolStats()
+        self._client = None
+        self._pid = None
+
+    def _connect(self):
+        # Opened on first use inside the worker's event loop, after any fork
+        if self._client is not None and self._pid == os.getpid():
+            return
+        self.pool_stats.reset()
+        client = AsyncMongoClient(self.mongo_uri, event_listeners=[self.pool_stats], **mongo_client_options())
+        self._db = client[self.db_name]
+        self._read_heavy_db = client.get_database(self.db_name, read_preference=self.read_heavy_preference)
+        self._client = client
+        self._pid = os.getpid()
+
+    @property
+    def db(self):
+        self._connect()
+        return self._db
+
+    @property
+    def read_heavy_db(self):
+        self._connect()
+        return self._read_heavy_db
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def get_user_by_id(self, user_id):
+        return await self.db.users.find_one({'_id': ObjectId(user_id)})
+
+    async def get_usernames_by_ids(self, user_ids):
+        users = self.db.users.find({'_id': {'$in': list(user_ids)}}, {'username': 1})
+        return {user['_id']: user['username'] async for user in users}
+
+    async def get_list_by_id(self, list_id):
+        return await self.db.lists.find_one({'_id': ObjectId(list_id)})
+
+    async def is_collaborator(self, user_id, list_id):
+        list_doc = await self.db.lists.find_one({'_id': ObjectId(list_id)}, {'collaborators': 1})
+        if not list_doc:
+            return False
+        return ObjectId(user_id) in list_doc.get('collaborators', [])
+
+    async def get_list_summaries(self, query, sort, skip=0, limit=None, read_heavy=False):
+        pipeline = [{'$match': query}, {'$sort': sort}]
+        if skip:
+            pipeline.append({'$skip': skip})
+        if limit:
+            pipeline.append({'$limit': limit})
+        pipeline.append({'$project': LIST_SUMMARY_PROJECTION})
+        source = self.read_heavy_db if read_heavy else self.db
+        cursor = await source.lists.aggregate(pipeline)
+        return await cursor.to_list()
+
+    async def get_public_lists_paginated(self, search_query=None, tags=None, skip=0, limit=10, sort='recent'):
+        query = {'is_public': True}
+        if search_query:
+            query['name'] = {'$regex': search_query, '$options': 'i'}
+        if tags:
+            query['tags'] = {'$in': normalize_tags(tags)}
+        return await self.get_list_summaries(query, EXPLORE_SORTS[sort], skip=skip, limit=limit, read_heavy=True)
+
+    async def get_favorited_list_ids(self, user_id, list_ids):
+        favorites = self.db.favorites.find({
+            'user_id': ObjectId(user_id),
+            'list_id': {'$in': [ObjectId(list_id) for list_id in list_ids]}
+        }, {'list_id': 1, '_id': 0})
+        return {str(fav['list_id']) async for fav in favorites}
+
+    async def get_autocomplete_suggestions(self, user_id, query, limit=5):
+        suggestions = self.db.autocomplete_cache.find({
+            'user_id': ObjectId(user_id),
+            'item_text': {'$regex': f'^{re.escape(query)}', '$options': 'i'}
+        }).sort('frequency', -1).limit(limit)
+        return [s['item_text'] async for s in suggestions]
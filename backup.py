@@ -0,0 +1,362 @@
+"""Parallel, resumable backup and restore of the app's collections.
+
+    python -m backup dump backups/2026-10-18
+    python -m backup restore backups/2026-10-18 --db-name list_tracker_restore
+    python -m backup restore backups/2026-10-18 --rewrite-thumbnails /objects/=https://cdn.example.com/objects/
+
+A dump splits each collection into `_id` ranges and reads them on a pool
+of threads. Each range is written as gzip'd segments of at most
+--segment-docs documents: concatenated BSON (`.bson.gz`, the default) or
+canonical extended JSON lines (`.ndjson.gz`, --format ndjson), both of
+which keep ObjectIds and dates intact. manifest.json, written last, lists
+every segment with its document count and sha256. A directory without a
+manifest is an incomplete dump.
+
+The ranges are read independently, so the dump is not a point-in-time
+snapshot: take it from a secondary or while writes are paused if that
+matters. Ranges are taken from `_id`, which is an ObjectId in every
+collection dumped here.
+
+A restore verifies each segment's checksum before writing it and upserts
+its documents by `_id`, so a segment interrupted halfway is simply
+written again. Finished segments are appended to a state file in the
+dump directory (one per target database); running the same restore again
+skips them. Indexes from Database._create_indexes are built once the data
+is in, and tag_stats, which is derived from lists, is recounted.
+
+Both commands print documents, megabytes (uncompressed BSON) and
+throughput per collection.
+"""
+from bson import decode_all, encode, json_util
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pymongo import ReplaceOne
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from database import Database
+
+COLLECTIONS = ['users', 'lists', 'favorites', 'autocomplete_cache']
+FORMATS = {
+    'bson': '.bson.gz',
+    'ndjson': '.ndjson.gz'
+}
+MANIFEST = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+class BackupError(Exception):
+    pass
+
+
+class Throughput:
+    """Documents, bytes and wall time per collection across worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.collections = {}
+
+    def record(self, collection, docs, raw_bytes, started, finished):
+        with self._lock:
+            stats = self.collections.setdefault(collection, {
+                'docs': 0, 'bytes': 0, 'started': started, 'finished': finished
+            })
+            stats['docs'] += docs
+            stats['bytes'] += raw_bytes
+            stats['started'] = min(stats['started'], started)
+            stats['finished'] = max(stats['finished'], finished)
+
+    def print_report(self):
+        print(f"{'collection':<20} {'docs':>10} {'MB':>9} {'seconds':>8} {'docs/s':>10} {'MB/s':>8}")
+        for collection, stats in self.collections.items():
+            seconds = max(stats['finished'] - stats['started'], 1e-6)
+            mb = stats['bytes'] / 1e6
+            print(f"{collection:<20} {stats['docs']:>10} {mb:>9.2f} {seconds:>8.2f} "
+                  f"{stats['docs'] / seconds:>10.0f} {mb / seconds:>8.2f}")
+
+
+def open_database(mongo_uri, db_name):
+    db = Database(mongo_uri=mongo_uri, db_name=db_name)
+    # Indexes are built explicitly after a restore, never on a dump's source
+    db.auto_index = False
+    return db
+
+
+def split_ranges(db, collection, ranges):
+    """`_id` filters covering the collection in roughly equal ranges."""
+    if ranges <= 1:
+        return [{}]
+    buckets = list(db.db[collection].aggregate([
+        {'$project': {'_id': 1}},
+        {'$bucketAuto': {'groupBy': '$_id', 'buckets': ranges}}
+    ], allowDiskUse=True))
+    if len(buckets) <= 1:
+        return [{}]
+    # Open-ended first and last ranges also catch documents inserted
+    # outside the sampled bounds while the dump runs
+    bounds = [bucket['_id']['max'] for bucket in buckets[:-1]]
+    filters = [{'_id': {'$lt': bounds[0]}}]
+    for low, high in zip(bounds, bounds[1:]):
+        filters.append({'_id': {'$gte': low, '$lt': high}})
+    filters.append({'_id': {'$gte': bounds[-1]}})
+    return filters
+
+
+def encode_document(document, fmt):
+    if fmt == 'bson':
+        return encode(document)
+    return (json_util.dumps(document, json_options=json_util.CANONICAL_JSON_OPTIONS) + '\n').encode()
+
+
+def decode_segment(data, fmt):
+    if fmt == 'bson':
+        return decode_all(data)
+    return [json_util.loads(line) for line in data.splitlines() if line.strip()]
+
+
+def write_segment(directory, name, chunks):
+    """Gzip `chunks` to directory/name via a temp file; return (sha256, compressed bytes)."""
+    path = os.path.join(directory, name)
+    partial = path + '.partial'
+    with gzip.open(partial, 'wb', compresslevel=6) as f:
+        for chunk in chunks:
+            f.write(chunk)
+    digest = hashlib.sha256()
+    with open(partial, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    os.replace(partial, path)
+    return digest.hexdigest(), os.path.getsize(path)
+
+
+def dump_range(db, out_dir, collection, range_no, id_filter, fmt, segment_docs, throughput):
+    started = time.perf_counter()
+    segments = []
+    chunks = []
+    raw_bytes = 0
+    total_docs = 0
+    total_bytes = 0
+
+    def flush():
+        name = f'{collection}/{collection}-{range_no:04d}-{len(segments):04d}{FORMATS[fmt]}'
+        sha256, compressed = write_segment(out_dir, name, chunks)
+        segments.append({
+            'file': name,
+            'docs': len(chunks),
+            'bytes': raw_bytes,
+            'compressed_bytes': compressed,
+            'sha256': sha256
+        })
+
+    cursor = db.db[collection].find(id_filter).sort('_id', 1).batch_size(1000)
+    for document in cursor:
+        chunk = encode_document(document, fmt)
+        chunks.append(chunk)
+        raw_bytes += len(chunk)
+        if len(chunks) >= segment_docs:
+            flush()
+            total_docs += len(chunks)
+            total_bytes += raw_bytes
+            chunks = []
+            raw_bytes = 0
+    if chunks:
+        flush()
+        total_docs += len(chunks)
+        total_bytes += raw_bytes
+    throughput.record(collection, total_docs, total_bytes, started, time.perf_counter())
+    return collection, range_no, segments
+
+
+def dump(args):
+    if os.path.exists(os.path.join(args.directory, MANIFEST)):
+        raise BackupError(f'{args.directory} already holds a dump')
+    db = open_database(args.mongo_uri, args.db_name)
+    for collection in args.collections:
+        os.makedirs(os.path.join(args.directory, collection), exist_ok=True)
+
+    throughput = Throughput()
+    ranges = {collection: {} for collection in args.collections}
+    created_at = datetime.utcnow()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = []
+        for collection in args.collections:
+            for range_no, id_filter in enumerate(split_ranges(db, collection, args.ranges)):
+                futures.append(executor.submit(
+                    dump_range, db, args.directory, collection, range_no, id_filter,
+                    args.format, args.segment_docs, throughput
+                ))
+        for future in as_completed(futures):
+            collection, range_no, segments = future.result()
+            ranges[collection][range_no] = segments
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'created_at': created_at.isoformat() + 'Z',
+        'db_name': db.db_name,
+        'format': args.format,
+        'collections': {}
+    }
+    for collection in args.collections:
+        segments = [segment for range_no in sorted(ranges[collection]) for segment in ranges[collection][range_no]]
+        manifest['collections'][collection] = {
+            'docs': sum(segment['docs'] for segment in segments),
+            'bytes': sum(segment['bytes'] for segment in segments),
+            'segments': segments
+        }
+    # Written last: a dump without a manifest never finished
+    partial = os.path.join(args.directory, MANIFEST + '.partial')
+    with open(partial, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(partial, os.path.join(args.directory, MANIFEST))
+
+    throughput.print_report()
+    print(f'Dumped {db.db_name} to {args.directory}')
+
+
+def load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise BackupError(f'{directory} has no {MANIFEST}; the dump is missing or did not finish')
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise BackupError(f'unsupported manifest version {manifest.get("version")}')
+    return manifest
+
+
+def parse_rewrite(value):
+    old, sep, new = value.partition('=')
+    if not sep or not old:
+        raise argparse.ArgumentTypeError('expected OLD_PREFIX=NEW_PREFIX')
+    return old, new
+
+
+def rewrite_thumbnail(document, rewrite):
+    old, new = rewrite
+    thumbnail_url = document.get('thumbnail_url')
+    if isinstance(thumbnail_url, str) and thumbnail_url.startswith(old):
+        document['thumbnail_url'] = new + thumbnail_url[len(old):]
+
+
+class RestoreState:
+    """Segments already restored into one target database, one per line."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.done = {line.strip() for line in f if line.strip()}
+
+    def mark_done(self, name):
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(name + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.done.add(name)
+
+
+def restore_segment(db, directory, collection, segment, fmt, rewrite, batch_size, state, throughput):
+    started = time.perf_counter()
+    with open(os.path.join(directory, segment['file']), 'rb') as f:
+        compressed = f.read()
+    if hashlib.sha256(compressed).hexdigest() != segment['sha256']:
+        raise BackupError(f"checksum mismatch in {segment['file']}")
+    documents = decode_segment(gzip.decompress(compressed), fmt)
+    if len(documents) != segment['docs']:
+        raise BackupError(f"{segment['file']} holds {len(documents)} documents, manifest says {segment['docs']}")
+
+    batch = []
+    for document in documents:
+        if rewrite and collection == 'lists':
+            rewrite_thumbnail(document, rewrite)
+        # Upserts by _id make replaying a half-written segment harmless
+        batch.append(ReplaceOne({'_id': document['_id']}, document, upsert=True))
+        if len(batch) >= batch_size:
+            db.db[collection].bulk_write(batch, ordered=False)
+            batch = []
+    if batch:
+        db.db[collection].bulk_write(batch, ordered=False)
+    state.mark_done(segment['file'])
+    throughput.record(collection, len(documents), segment['bytes'], started, time.perf_counter())
+
+
+def restore(args):
+    manifest = load_manifest(args.directory)
+    db = open_database(args.mongo_uri, args.db_name or manifest['db_name'])
+    collections = [collection for collection in args.collections if collection in manifest['collections']]
+    state = RestoreState(os.path.join(args.directory, f'restore-{db.db_name}.state'))
+    if args.drop:
+        if state.done:
+            raise BackupError(f'refusing to --drop while resuming; delete {state.path} to start over')
+        for collection in collections:
+            db.db[collection].drop()
+
+    throughput = Throughput()
+    skipped = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = []
+        for collection in collections:
+            for segment in manifest['collections'][collection]['segments']:
+                if segment['file'] in state.done:
+                    skipped += 1
+                    continue
+                futures.append(executor.submit(
+                    restore_segment, db, args.directory, collection, segment, manifest['format'],
+                    args.rewrite_thumbnails, args.batch_size, state, throughput
+                ))
+        for future in as_completed(futures):
+            future.result()
+
+    db._create_indexes()
+    if 'lists' in collections:
+        db.rebuild_tag_stats()
+    throughput.print_report()
+    if skipped:
+        print(f'Skipped {skipped} segments restored by an earlier run')
+    print(f'Restored {args.directory} into {db.db_name}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri')
+    parser.add_argument('--workers', type=int, default=4)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    dump_parser = commands.add_parser('dump', help='write the collections to a new directory')
+    dump_parser.add_argument('directory')
+    dump_parser.add_argument('--db-name', help='source database (default MONGO_DB_NAME)')
+    dump_parser.add_argument('--collections', nargs='+', choices=COLLECTIONS, default=COLLECTIONS)
+    dump_parser.add_argument('--format', choices=list(FORMATS), default='bson')
+    dump_parser.add_argument('--ranges', type=int, default=8, help='_id ranges read in parallel per collection')
+    dump_parser.add_argument('--segment-docs', type=int, default=10000)
+    dump_parser.set_defaults(run=dump)
+
+    restore_parser = commands.add_parser('restore', help='load a dump, resuming an interrupted restore')
+    restore_parser.add_argument('directory')
+    restore_parser.add_argument('--db-name', help="target database (default the dump's source)")
+    restore_parser.add_argument('--collections', nargs='+', choices=COLLECTIONS, default=COLLECTIONS)
+    restore_parser.add_argument('--drop', action='store_true', help='drop the target collections first (fresh restores only)')
+    restore_parser.add_argument('--rewrite-thumbnails', type=parse_rewrite, metavar='OLD=NEW',
+                                help='replace this prefix of list thumbnail_url values')
+    restore_parser.add_argument('--batch-size', type=int, default=1000)
+    restore_parser.set_defaults(run=restore)
+
+    args = parser.parse_args()
+    try:
+        args.run(args)
+    except BackupError as e:
+        print(f'error: {e}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Compare gunicorn (app:app) with uvicorn (asgi:app) under high concurrency.
+
+    python -m benchmarks.async_serving --workers 2 --concurrency 64 256 1024
+
+Both servers run against the same seeded scratch database with the same
+number of worker processes. The explore cache is disabled so every
+request reaches MongoDB. Raise `ulimit -n` for concurrency above ~1000.
+"""
+from bson.objectid import ObjectId
+import argparse
+import asyncio
+import random
+
+from benchmarks.common import connect, drop, free_port, print_table, start_server, stop_server
+from benchmarks.httpload import run_load
+
+DB_NAME = 'listpoint_bench_serving'
+
+
+def seed(db, lists, items_per_list):
+    owners = [str(db.create_user(f'owner{i}@example.com', f'owner_{i}', 'x')) for i in range(20)]
+    list_ids = []
+    for i in range(lists):
+        items = [{'_id': ObjectId(), 'text': f'item {n}', 'quantity': 1, 'checked': n % 3 == 0} for n in range(items_per_list)]
+        list_ids.append(str(db.create_list(f'List {i}', owners[i % len(owners)], tags=[f'tag{i % 7}'], items=items)))
+    return list_ids
+
+
+def route_requests(route, list_ids, lists):
+    def explore(index):
+        return 'GET', f'/api/explore?skip={random.randrange(0, max(1, lists - 10))}&limit=10', None, b''
+
+    def get_list(index):
+        return 'GET', f'/api/lists/{random.choice(list_ids)}', None, b''
+
+    return {'explore': explore, 'list': get_list}[route]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri')
+    parser.add_argument('--lists', type=int, default=2000)
+    parser.add_argument('--items', type=int, default=30, help='items per list')
+    parser.add_argument('--workers', type=int, default=2, help='server processes for both servers')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker (and Flask threads under uvicorn)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[64, 256, 1024])
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per measurement')
+    parser.add_argument('--routes', nargs='+', choices=['explore', 'list'], default=['explore', 'list'])
+    args = parser.parse_args()
+
+    db, _ = connect(DB_NAME, args.mongo_uri)
+    try:
+        list_ids = seed(db, args.lists, args.items)
+        rows = []
+        for kind in ('gunicorn', 'uvicorn'):
+            port = free_port()
+            server = start_server(kind, port, args.workers, args.threads, DB_NAME, args.mongo_uri, {'EXPLORE_CACHE_TTL': '0'})
+            try:
+                for route in args.routes:
+                    for concurrency in args.concurrency:
+                        result = asyncio.run(run_load(
+                            f'http://127.0.0.1:{port}',
+                            route_requests(route, list_ids, args.lists),
+                            concurrency,
+                            args.duration
+                        ))
+                        rows.append(dict(result, server=kind, route=route, concurrency=concurrency))
+            finally:
+                stop_server(server)
+        print_table(rows, ['server', 'route', 'concurrency', 'rps', 'p50_ms', 'p95_ms', 'p99_ms', 'errors', 'statuses'])
+    finally:
+        drop(db)
+
+
+if __name__ == '__main__':
+    main()
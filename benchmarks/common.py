@@ -0,0 +1,123 @@
+"""Shared helpers for the benchmark scripts.
+
+Run benchmarks from the repository root with `python -m benchmarks.<name>`.
+They use a real mongod (MONGO_URI, default localhost) and a throwaway
+database that is dropped afterwards.
+"""
+from pymongo import monitoring
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from database import Database
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts commands (round trips) issued to MongoDB."""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def connect(db_name, mongo_uri=None):
+    """Register a command counter and open a Database on a scratch database."""
+    counter = CommandCounter()
+    monitoring.register(counter)
+    db = Database(mongo_uri=mongo_uri, db_name=db_name)
+    return db, counter
+
+
+def drop(db):
+    db.client.drop_database(db.db.name)
+
+
+def measure(fn, counter, runs):
+    """Run fn `runs` times; return latency stats in ms and commands per run."""
+    fn()  # warm up connections and caches
+    timings = []
+    commands = []
+    for _ in range(runs):
+        before = counter.count
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+        commands.append(counter.count - before)
+    timings.sort()
+    return {
+        'mean_ms': statistics.mean(timings),
+        'p50_ms': timings[len(timings) // 2],
+        'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'commands': statistics.mean(commands)
+    }
+
+
+def print_table(rows, columns):
+    widths = [max(len(str(column)), *(len(format_cell(row.get(column))) for row in rows)) for column in columns]
+    print('  '.join(str(column).ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(format_cell(row.get(column)).ljust(width) for column, width in zip(columns, widths)))
+
+
+def format_cell(value):
+    if isinstance(value, float):
+        return f'{value:.2f}'
+    return str(value)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, port, workers, threads, db_name, mongo_uri=None, env=None):
+    """Boot gunicorn (app:app) or uvicorn (asgi:app) on `db_name` and wait until it answers."""
+    server_env = dict(
+        os.environ,
+        MONGO_DB_NAME=db_name,
+        MONGO_AUTO_INDEX='false',
+        ASGI_WSGI_THREADS=str(threads),
+        # Every simulated anonymous client shares one IP
+        RATE_LIMIT_ENABLED='false',
+        **(env or {})
+    )
+    if mongo_uri:
+        server_env['MONGO_URI'] = mongo_uri
+    if kind == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+                   '--threads', str(threads), '--log-level', 'warning', 'app:app']
+    else:
+        command = [sys.executable, '-m', 'uvicorn', '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+                   '--log-level', 'warning', '--no-access-log', 'asgi:app']
+    process = subprocess.Popen(command, env=server_env)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/robots.txt', timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{kind} did not start on port {port}')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
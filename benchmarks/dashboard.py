@@ -0,0 +1,75 @@
+"""Compare the per-list N+1 home dashboard with Database.get_dashboard.
+
+    python -m benchmarks.dashboard --lists 100 --favorites 50 --collaborations 30
+"""
+from bson.objectid import ObjectId
+import argparse
+
+from benchmarks.common import connect, drop, measure, print_table
+
+
+def seed(db, owned, favorites, collaborations, items_per_list):
+    owner_id = db.create_user('bench@example.com', 'bench_owner', 'x')
+    others = [db.create_user(f'other{i}@example.com', f'other_{i}', 'x') for i in range(10)]
+
+    def items():
+        return [{'_id': ObjectId(), 'text': f'item {n}', 'quantity': 1} for n in range(items_per_list)]
+
+    for i in range(owned):
+        db.create_list(f'Owned {i}', str(owner_id), items=items())
+    for i in range(favorites):
+        list_id = db.create_list(f'Favorite {i}', str(others[i % len(others)]), items=items())
+        db.add_favorite(str(owner_id), str(list_id))
+    for i in range(collaborations):
+        list_id = db.create_list(f'Shared {i}', str(others[i % len(others)]), items=items())
+        db.add_collaborator(str(list_id), str(owner_id))
+    return str(owner_id)
+
+
+def legacy_dashboard(db, user_id):
+    """The home page data path before get_dashboard: full documents plus per-list lookups."""
+    my_lists = list(db.db.lists.find({'owner_id': ObjectId(user_id)}).sort('created_at', -1))
+    favorite_ids = [fav['list_id'] for fav in db.db.favorites.find({'user_id': ObjectId(user_id)})]
+    favorited_lists = list(db.db.lists.find({'_id': {'$in': favorite_ids}}).sort('created_at', -1))
+    collaborated_lists = list(db.db.lists.find({'collaborators': ObjectId(user_id)}).sort('created_at', -1))
+
+    for lst in my_lists:
+        lst['is_favorited'] = db.is_favorited(user_id, str(lst['_id']))
+    for lst in favorited_lists:
+        owner = db.get_user_by_id(str(lst['owner_id']))
+        lst['owner_username'] = owner['username'] if owner else 'Unknown'
+    for lst in collaborated_lists:
+        owner = db.get_user_by_id(str(lst['owner_id']))
+        lst['owner_username'] = owner['username'] if owner else 'Unknown'
+        lst['is_favorited'] = db.is_favorited(user_id, str(lst['_id']))
+    return my_lists, favorited_lists, collaborated_lists
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri')
+    parser.add_argument('--lists', type=int, default=100, help='owned lists')
+    parser.add_argument('--favorites', type=int, default=50)
+    parser.add_argument('--collaborations', type=int, default=30)
+    parser.add_argument('--items', type=int, default=50, help='items per list')
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    db, counter = connect('listpoint_bench_dashboard', args.mongo_uri)
+    try:
+        user_id = seed(db, args.lists, args.favorites, args.collaborations, args.items)
+        rows = [
+            dict(implementation='legacy N+1', **measure(lambda: legacy_dashboard(db, user_id), counter, args.runs)),
+            dict(implementation='get_dashboard (page 1)', **measure(lambda: db.get_dashboard(user_id), counter, args.runs)),
+            dict(implementation='get_dashboard (all)', **measure(
+                lambda: db.get_dashboard(user_id, per_page=max(args.lists, args.favorites, args.collaborations)),
+                counter, args.runs
+            )),
+        ]
+        print_table(rows, ['implementation', 'commands', 'mean_ms', 'p50_ms', 'p95_ms'])
+    finally:
+        drop(db)
+
+
+if __name__ == '__main__':
+    main()
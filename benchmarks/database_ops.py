@@ -0,0 +1,292 @@
+"""Scale benchmarks for Database list operations, checked against a baseline.
+
+    python -m benchmarks.database_ops --save-baseline
+    python -m benchmarks.database_ops                       # compare with the baseline
+    python -m benchmarks.database_ops --ops toggle_item add_item --items 100 10000
+
+Each operation runs over item counts, section counts and (for clone and
+delete) clone-tree sizes. Timings come from plain runs; one extra run per
+case records the BSON bytes of write commands sent to MongoDB and
+another the peak Python memory allocated (tracemalloc).
+
+The baseline (benchmarks/baselines/database_ops.json by default) is only
+meaningful on the machine that wrote it. A case regresses when its p50
+time grows by more than --time-tolerance, or its bytes written or peak
+allocation by more than --size-tolerance; the script then exits with 1.
+"""
+from bson import encode
+from bson.objectid import ObjectId
+from pymongo import monitoring
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import connect, drop, print_table
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'database_ops.json')
+WRITE_COMMANDS = ('insert', 'update', 'delete', 'findAndModify')
+
+
+class WriteBytesCounter(monitoring.CommandListener):
+    """Sums the encoded size of write commands while enabled."""
+
+    def __init__(self):
+        self.enabled = False
+        self.bytes = 0
+
+    def started(self, event):
+        if self.enabled and event.command_name in WRITE_COMMANDS:
+            self.bytes += len(encode(event.command))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def make_items(count, sections):
+    items = []
+    for i in range(count):
+        section = None
+        if sections and i % 5:
+            section = f'Section {i % sections:03d}'
+        items.append({
+            '_id': ObjectId(),
+            'text': f'item {count - i:05d}',
+            'quantity': 1,
+            'checked': False,
+            'section': section
+        })
+    return items
+
+
+def make_list(db, owner_id, items, sections, **kwargs):
+    return str(db.create_list(f'Bench {items}/{sections}', owner_id, items=make_items(items, sections), **kwargs))
+
+
+def make_tree(db, owner_id, root_id, size):
+    for i in range(size):
+        db.create_list(f'Clone {i}', owner_id, parent_id=root_id)
+
+
+# Each case builder returns (setup, operation): setup() runs untimed before
+# every measured call and returns the argument passed to operation().
+
+def sort_items_case(db, owner_id, items, sections, tree):
+    list_items = make_items(items, sections)
+    return (lambda: list_items), db._sort_items_with_sections
+
+
+def add_item_case(db, owner_id, items, sections, tree):
+    list_id = make_list(db, owner_id, items, sections)
+    counter = itertools.count()
+    return (lambda: next(counter)), lambda n: db.add_item_to_list(list_id, f'added {n:06d}', section='Section 000' if sections else None)
+
+
+def toggle_item_case(db, owner_id, items, sections, tree):
+    list_id = make_list(db, owner_id, items, sections, is_ethereal=True)
+    item_ids = [str(item['_id']) for item in db.get_list_by_id(list_id)['items']]
+    return (lambda: random.choice(item_ids)), lambda item_id: db.toggle_item_checked(list_id, item_id)
+
+
+def reorder_items_case(db, owner_id, items, sections, tree):
+    list_id = make_list(db, owner_id, items, sections, is_ordered=True)
+    item_ids = [str(item['_id']) for item in db.get_list_by_id(list_id)['items']]
+
+    def setup():
+        # The editor sends the full order after a drag
+        shuffled = random.sample(item_ids, len(item_ids))
+        return {item_id: order for order, item_id in enumerate(shuffled)}
+    return setup, lambda item_orders: db.reorder_items(list_id, item_orders)
+
+
+def rename_section_case(db, owner_id, items, sections, tree):
+    list_id = make_list(db, owner_id, items, sections)
+    names = ['Section 000', 'Renamed 000']
+    flips = itertools.count()
+
+    def setup():
+        n = next(flips)
+        return names[n % 2], names[(n + 1) % 2]
+    return setup, lambda names_pair: db.rename_section(list_id, *names_pair)
+
+
+def restore_case(db, owner_id, items, sections, tree):
+    list_id = make_list(db, owner_id, items, sections, is_ethereal=True)
+    return (lambda: None), lambda _: db.restore_ethereal_list(list_id)
+
+
+def reset_checked_case(db, owner_id, items, sections, tree):
+    list_id = make_list(db, owner_id, items, sections, is_ethereal=True)
+    return (lambda: None), lambda _: db.restore_ethereal_list(list_id, reset_checked_only=True)
+
+
+def clone_list_case(db, owner_id, items, sections, tree):
+    list_id = make_list(db, owner_id, items, sections, is_ethereal=True)
+    make_tree(db, owner_id, list_id, tree)
+    return (lambda: None), lambda _: db.clone_list(list_id, owner_id)
+
+
+def delete_list_case(db, owner_id, items, sections, tree):
+    def setup():
+        list_id = make_list(db, owner_id, items, sections)
+        make_tree(db, owner_id, list_id, tree)
+        return list_id
+    return setup, db.delete_list
+
+
+# Operation -> (case builder, axes it varies over)
+OPERATIONS = {
+    'sort_items': (sort_items_case, ('items', 'sections')),
+    'add_item': (add_item_case, ('items', 'sections')),
+    'toggle_item': (toggle_item_case, ('items',)),
+    'reorder_items': (reorder_items_case, ('items', 'sections')),
+    'rename_section': (rename_section_case, ('items', 'sections')),
+    'restore_list': (restore_case, ('items',)),
+    'reset_checked': (reset_checked_case, ('items',)),
+    'clone_list': (clone_list_case, ('items', 'tree')),
+    'delete_list': (delete_list_case, ('items', 'tree'))
+}
+
+
+def cases(ops, item_counts, section_counts, tree_sizes):
+    for op in ops:
+        _, axes = OPERATIONS[op]
+        for items in item_counts:
+            for sections in section_counts if 'sections' in axes else [0]:
+                if op == 'rename_section' and not sections:
+                    continue
+                for tree in tree_sizes if 'tree' in axes else [0]:
+                    yield op, items, sections, tree
+
+
+def run_case(db, counter, write_bytes, owner_id, op, items, sections, tree, runs):
+    builder, _ = OPERATIONS[op]
+    setup, operation = builder(db, owner_id, items, sections, tree)
+
+    timings = []
+    commands = []
+    for run in range(runs + 1):
+        arg = setup()
+        before = counter.count
+        started = time.perf_counter()
+        operation(arg)
+        elapsed = (time.perf_counter() - started) * 1000
+        if run:  # the first run warms up connections and caches
+            timings.append(elapsed)
+            commands.append(counter.count - before)
+
+    # Separate runs, so encoding commands for the byte count is not traced
+    arg = setup()
+    write_bytes.bytes = 0
+    write_bytes.enabled = True
+    try:
+        operation(arg)
+    finally:
+        write_bytes.enabled = False
+
+    arg = setup()
+    tracemalloc.start()
+    try:
+        operation(arg)
+        alloc_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'op': op,
+        'items': items,
+        'sections': sections,
+        'tree': tree,
+        'p50_ms': timings[len(timings) // 2],
+        'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'mean_ms': sum(timings) / len(timings),
+        'commands': sum(commands) / len(commands),
+        'bytes_written': write_bytes.bytes,
+        'alloc_peak_kb': alloc_peak / 1024
+    }
+
+
+def case_key(result):
+    return f"{result['op']}[items={result['items']},sections={result['sections']},tree={result['tree']}]"
+
+
+def check_baseline(results, baseline, time_tolerance, size_tolerance):
+    """Annotate results with their change against the baseline; return regressions."""
+    regressions = []
+    for result in results:
+        old = baseline['results'].get(case_key(result))
+        if old is None:
+            result['vs_baseline'] = 'new'
+            continue
+        problems = []
+        if old['p50_ms'] and result['p50_ms'] > old['p50_ms'] * (1 + time_tolerance):
+            problems.append(f"time {result['p50_ms'] / old['p50_ms']:.2f}x")
+        for metric in ('bytes_written', 'alloc_peak_kb'):
+            if old[metric] and result[metric] > old[metric] * (1 + size_tolerance):
+                problems.append(f"{metric} {result[metric] / old[metric]:.2f}x")
+        if problems:
+            result['vs_baseline'] = 'REGRESSION ' + ', '.join(problems)
+            regressions.append(case_key(result))
+        else:
+            result['vs_baseline'] = f"{result['p50_ms'] / old['p50_ms']:.2f}x time" if old['p50_ms'] else 'ok'
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri')
+    parser.add_argument('--ops', nargs='+', choices=list(OPERATIONS), default=list(OPERATIONS))
+    parser.add_argument('--items', type=int, nargs='+', default=[10, 100, 1000, 10000], help='items per list')
+    parser.add_argument('--sections', type=int, nargs='+', default=[0, 10, 50], help='sections per list')
+    parser.add_argument('--trees', type=int, nargs='+', default=[1, 10, 100], help='existing clones of the list')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='write these results as the new baseline')
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--size-tolerance', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    write_bytes = WriteBytesCounter()
+    monitoring.register(write_bytes)
+    db, counter = connect('listpoint_bench_database_ops', args.mongo_uri)
+    results = []
+    try:
+        owner_id = str(db.create_user('bench@example.com', 'bench_owner', 'x'))
+        for op, items, sections, tree in cases(args.ops, args.items, args.sections, args.trees):
+            results.append(run_case(db, counter, write_bytes, owner_id, op, items, sections, tree, args.runs))
+            db.db.lists.delete_many({})
+    finally:
+        drop(db)
+
+    regressions = []
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'meta': {'python': platform.python_version(), 'machine': platform.node(), 'runs': args.runs},
+                'results': {case_key(result): result for result in results}
+            }, f, indent=2, sort_keys=True)
+        print(f'Saved baseline {args.baseline}')
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = check_baseline(results, json.load(f), args.time_tolerance, args.size_tolerance)
+
+    print_table(results, ['op', 'items', 'sections', 'tree', 'p50_ms', 'p95_ms', 'commands', 'bytes_written', 'alloc_peak_kb', 'vs_baseline'])
+    if regressions:
+        print(f'{len(regressions)} regression(s) against {args.baseline}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Minimal asyncio HTTP/1.1 load generator for the serving benchmarks.
+
+Each virtual client holds one keep-alive connection and issues requests
+back to back with no think time, so `concurrency` is the number of
+requests in flight.
+"""
+from urllib.parse import urlsplit
+import asyncio
+import time
+
+
+class Connection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, headers=None, body=b''):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', f'Content-Length: {len(body)}']
+        lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        try:
+            return await self._read_response()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            raise
+
+    async def _read_response(self):
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = bytearray()
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                body += chunk[:-2]
+            body = bytes(body)
+        else:
+            body = await self.reader.readexactly(int(headers.get('content-length', 0)))
+
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, headers, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class RouteStats:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+        self.mongo_commands = []
+
+    def summary(self, elapsed):
+        latencies = sorted(self.latencies)
+        return {
+            'requests': len(latencies),
+            'errors': self.errors,
+            'rps': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 0.50),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'max_ms': latencies[-1] if latencies else 0.0,
+            'mongo_ops_per_request': sum(self.mongo_commands) / len(self.mongo_commands) if self.mongo_commands else None,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())}
+        }
+
+
+async def run_sessions(base_url, next_session, concurrency, duration, warmup=1.0):
+    """Drive `base_url` for `duration` seconds with `concurrency` clients.
+
+    `next_session(client_index)` returns the next list of steps for that
+    client to send in order, each (route, method, path, headers, body).
+    Returns per-route throughput, latency percentiles in ms, status counts
+    and, when the server sends `X-Mongo-Commands`, MongoDB ops per request.
+    """
+    url = urlsplit(base_url)
+    routes = {}
+    recording = False
+    stop_at = None
+
+    async def client(index):
+        connection = Connection(url.hostname, url.port or 80)
+        try:
+            while stop_at is None or time.perf_counter() < stop_at:
+                for route, method, path, headers, body in next_session(index):
+                    stats = routes.setdefault(route, RouteStats())
+                    started = time.perf_counter()
+                    try:
+                        status, response_headers, _ = await connection.request(method, path, headers, body)
+                    except (OSError, asyncio.IncompleteReadError, ValueError):
+                        if recording:
+                            stats.errors += 1
+                        connection.close()
+                        break
+                    if recording:
+                        stats.latencies.append((time.perf_counter() - started) * 1000)
+                        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+                        if 'x-mongo-commands' in response_headers:
+                            stats.mongo_commands.append(int(response_headers['x-mongo-commands']))
+        finally:
+            connection.close()
+
+    tasks = [asyncio.create_task(client(i)) for i in range(concurrency)]
+    await asyncio.sleep(warmup)
+    recording = True
+    started = time.perf_counter()
+    stop_at = started + duration
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    total = RouteStats()
+    for stats in routes.values():
+        total.latencies += stats.latencies
+        total.mongo_commands += stats.mongo_commands
+        total.errors += stats.errors
+        for status, count in stats.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + count
+    return {
+        'elapsed_seconds': elapsed,
+        'routes': {route: stats.summary(elapsed) for route, stats in sorted(routes.items())},
+        'total': total.summary(elapsed)
+    }
+
+
+async def run_load(base_url, next_request, concurrency, duration, warmup=1.0):
+    """Single-route form of run_sessions; `next_request(client_index)` returns (method, path, headers, body)."""
+    result = await run_sessions(
+        base_url,
+        lambda index: [('all', *next_request(index))],
+        concurrency,
+        duration,
+        warmup
+    )
+    return result['total']
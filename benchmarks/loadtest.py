@@ -0,0 +1,323 @@
+"""End-to-end load test of the hot routes against a seeded scratch database.
+
+    python -m benchmarks.loadtest --duration 60 --concurrency 64
+    python -m benchmarks.loadtest --server uvicorn --mix explore=1,view=1
+    python -m benchmarks.loadtest --compare before.json after.json
+
+Boots the app (gunicorn by default) on a throwaway database, seeds it
+with synthetic users, lists, shared check lists and autocomplete history,
+and drives weighted scenarios from many virtual users. Logins are minted
+as signed session cookies with the server's SESSION_SECRET so password
+hashing does not dominate the run.
+
+The server runs with REQUEST_STATS_HEADER=true, so every response reports
+its MongoDB command count. Results (throughput, p50/p95/p99 and Mongo ops
+per request for each route) are printed and saved as JSON under
+benchmarks/results/ for later comparison.
+"""
+from bson.objectid import ObjectId
+from datetime import datetime
+from flask import Flask
+from itsdangerous import URLSafeTimedSerializer
+from urllib.parse import quote
+from werkzeug.security import generate_password_hash
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import subprocess
+
+from benchmarks.common import connect, drop, free_port, print_table, start_server, stop_server
+from benchmarks.httpload import run_sessions
+
+DB_NAME = 'listpoint_bench_loadtest'
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+DEFAULT_MIX = {
+    'explore': 30,
+    'view': 30,
+    'checkoff': 15,
+    'autocomplete': 10,
+    'add_item': 7,
+    'favorite': 5,
+    'clone': 3
+}
+
+VOCABULARY = [
+    'apples', 'apricots', 'avocado', 'bananas', 'basil', 'batteries', 'beans', 'bread', 'broccoli',
+    'butter', 'carrots', 'cereal', 'cheese', 'chicken', 'chips', 'coffee', 'cookies', 'cream',
+    'detergent', 'eggs', 'flour', 'garlic', 'ginger', 'granola', 'honey', 'jam', 'lemons', 'lettuce',
+    'milk', 'mushrooms', 'noodles', 'oats', 'olive oil', 'onions', 'oranges', 'pasta', 'peppers',
+    'potatoes', 'rice', 'salmon', 'salt', 'shampoo', 'soap', 'spinach', 'sugar', 'tea', 'tomatoes',
+    'toothpaste', 'tortillas', 'yogurt'
+]
+SECTIONS = [None, None, 'Produce', 'Dairy', 'Pantry', 'Household']
+TAGS = ['groceries', 'travel', 'packing', 'recipes', 'books', 'movies', 'gifts', 'chores']
+
+
+def mint_sessions(secret_key, user_ids):
+    """Request headers per user for a logged-in session, signed as Flask would."""
+    signer = Flask(__name__)
+    signer.secret_key = secret_key
+    cookie_serializer = signer.session_interface.get_signing_serializer(signer)
+    csrf_serializer = URLSafeTimedSerializer(secret_key, salt='wtf-csrf-token')
+    sessions = {}
+    for user_id in user_ids:
+        raw_csrf = secrets.token_hex(20)
+        cookie = cookie_serializer.dumps({'_user_id': user_id, '_fresh': True, '_permanent': True, 'csrf_token': raw_csrf})
+        headers = {'Cookie': f'session={cookie}'}
+        sessions[user_id] = {
+            'get': headers,
+            'post': dict(headers, **{'X-CSRFToken': csrf_serializer.dumps(raw_csrf)})
+        }
+    return sessions
+
+
+def seed(db, users, lists, items_per_list, shared_lists, collaborators):
+    password_hash = generate_password_hash('loadtest')
+    user_ids = [str(db.create_user(f'load{i}@example.com', f'load_user_{i}', password_hash)) for i in range(users)]
+
+    def items(count):
+        return [{
+            '_id': ObjectId(),
+            'text': f'{random.choice(VOCABULARY)} {n}',
+            'quantity': 1,
+            'checked': False,
+            'section': random.choice(SECTIONS)
+        } for n in range(count)]
+
+    public_lists = []
+    for i in range(lists):
+        list_id = db.create_list(
+            f'{random.choice(TAGS).title()} list {i}',
+            random.choice(user_ids),
+            tags=random.sample(TAGS, 2),
+            items=items(items_per_list),
+            is_ethereal=i % 4 == 0
+        )
+        public_lists.append(str(list_id))
+
+    shared = []
+    for i in range(shared_lists):
+        owner_id = random.choice(user_ids)
+        list_items = items(items_per_list)
+        list_id = str(db.create_list(f'Shared check list {i}', owner_id, is_public=False, is_ethereal=True, items=list_items))
+        members = [owner_id]
+        for collaborator_id in random.sample([u for u in user_ids if u != owner_id], collaborators):
+            db.add_collaborator(list_id, collaborator_id)
+            members.append(collaborator_id)
+        shared.append({'id': list_id, 'members': members, 'item_ids': [str(item['_id']) for item in list_items]})
+
+    now = datetime.utcnow()
+    db.db.autocomplete_cache.insert_many([
+        {'user_id': ObjectId(user_id), 'item_text': word, 'last_used': now, 'frequency': random.randint(1, 20)}
+        for user_id in user_ids for word in VOCABULARY
+    ])
+    return user_ids, public_lists, shared
+
+
+def scenarios(sessions, user_ids, public_lists, shared):
+    """Scenario name -> function returning that scenario's request steps."""
+    def user():
+        return sessions[random.choice(user_ids)]
+
+    def explore():
+        session = user()
+        headers = session['get'] if random.random() < 0.5 else None
+        query = random.choice(['', '', '', f'&tags={random.choice(TAGS)}', f'&q={random.choice(TAGS)[:3]}'])
+        steps = [('explore_page', 'GET', '/explore', headers, b'')]
+        for page in range(random.randint(1, 5)):
+            steps.append(('api_explore', 'GET', f'/api/explore?skip={page * 10}&limit=10{query}', headers, b''))
+        return steps
+
+    def view():
+        list_id = random.choice(public_lists)
+        if random.random() < 0.5:
+            return [
+                ('view_list_anonymous', 'GET', f'/lists/{list_id}', None, b''),
+                ('api_get_list', 'GET', f'/api/lists/{list_id}', None, b'')
+            ]
+        session = user()
+        return [
+            ('view_list', 'GET', f'/lists/{list_id}', session['get'], b''),
+            ('api_get_list', 'GET', f'/api/lists/{list_id}', session['get'], b'')
+        ]
+
+    def checkoff():
+        # Collaborators of a few shared lists tick items at the same time
+        shared_list = random.choice(shared)
+        session = sessions[random.choice(shared_list['members'])]
+        steps = [('api_get_list', 'GET', f"/api/lists/{shared_list['id']}", session['get'], b'')]
+        for item_id in random.sample(shared_list['item_ids'], min(8, len(shared_list['item_ids']))):
+            steps.append(('toggle_item', 'POST', f"/api/lists/{shared_list['id']}/items/{item_id}/toggle", session['post'], b''))
+        return steps
+
+    def autocomplete():
+        session = user()
+        word = random.choice(VOCABULARY)
+        return [
+            ('autocomplete', 'GET', f'/api/autocomplete?q={quote(word[:length])}', session['get'], b'')
+            for length in range(2, len(word) + 1)
+        ]
+
+    def add_item():
+        shared_list = random.choice(shared)
+        session = sessions[random.choice(shared_list['members'])]
+        body = json.dumps({'text': f'{random.choice(VOCABULARY)} {random.randint(1, 999)}'}).encode()
+        headers = dict(session['post'], **{'Content-Type': 'application/json'})
+        return [('add_item', 'POST', f"/api/lists/{shared_list['id']}/items", headers, body)]
+
+    def favorite():
+        session = user()
+        return [('toggle_favorite', 'POST', f'/api/favorite/{random.choice(public_lists)}', session['post'], b'')]
+
+    def clone():
+        session = user()
+        return [('clone_list', 'POST', f'/lists/{random.choice(public_lists)}/clone', session['post'], b'')]
+
+    return {
+        'explore': explore,
+        'view': view,
+        'checkoff': checkoff,
+        'autocomplete': autocomplete,
+        'add_item': add_item,
+        'favorite': favorite,
+        'clone': clone
+    }
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f'unknown scenario {name!r}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def opcounters(db):
+    counters = db.client.admin.command('serverStatus')['opcounters']
+    return {name: value for name, value in counters.items() if isinstance(value, int)}
+
+
+def print_results(result):
+    rows = [dict(stats, route=route) for route, stats in result['routes'].items()]
+    rows.append(dict(result['total'], route='TOTAL'))
+    print_table(rows, ['route', 'requests', 'rps', 'p50_ms', 'p95_ms', 'p99_ms', 'mongo_ops_per_request', 'errors', 'statuses'])
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    rows = []
+    for route in sorted(set(before['routes']) | set(after['routes'])) + ['TOTAL']:
+        old = before['total'] if route == 'TOTAL' else before['routes'].get(route)
+        new = after['total'] if route == 'TOTAL' else after['routes'].get(route)
+        if not old or not new:
+            continue
+        rows.append({
+            'route': route,
+            'rps': f"{old['rps']:.1f} -> {new['rps']:.1f}",
+            'p95_ms': f"{old['p95_ms']:.1f} -> {new['p95_ms']:.1f}",
+            'p99_ms': f"{old['p99_ms']:.1f} -> {new['p99_ms']:.1f}",
+            'mongo_ops': f"{old['mongo_ops_per_request'] or 0:.1f} -> {new['mongo_ops_per_request'] or 0:.1f}",
+            'p95_change': f"{(new['p95_ms'] / old['p95_ms'] - 1) * 100:+.0f}%" if old['p95_ms'] else '-'
+        })
+    print(f"{before_path} ({before['meta']['revision']}) -> {after_path} ({after['meta']['revision']})")
+    print_table(rows, ['route', 'rps', 'p95_ms', 'p99_ms', 'mongo_ops', 'p95_change'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri')
+    parser.add_argument('--server', choices=['gunicorn', 'uvicorn'], default='gunicorn')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=64, help='virtual users')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds to measure')
+    parser.add_argument('--warmup', type=float, default=5.0)
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='scenario weights, e.g. explore=30,view=30,checkoff=15')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--lists', type=int, default=2000)
+    parser.add_argument('--items', type=int, default=40, help='items per list')
+    parser.add_argument('--shared-lists', type=int, default=10, help='check lists shared for check-off bursts')
+    parser.add_argument('--collaborators', type=int, default=5, help='collaborators per shared list')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', help='result file (default benchmarks/results/loadtest-<time>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two saved results and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    random.seed(args.seed)
+    secret_key = secrets.token_hex(32)
+    db, _ = connect(DB_NAME, args.mongo_uri)
+    try:
+        user_ids, public_lists, shared = seed(db, args.users, args.lists, args.items, args.shared_lists, args.collaborators)
+        sessions = mint_sessions(secret_key, user_ids)
+        by_name = scenarios(sessions, user_ids, public_lists, shared)
+        names = list(args.mix)
+        weights = [args.mix[name] for name in names]
+
+        def next_session(index):
+            return by_name[random.choices(names, weights)[0]]()
+
+        port = free_port()
+        server = start_server(args.server, port, args.workers, args.threads, DB_NAME, args.mongo_uri, {
+            'SESSION_SECRET': secret_key,
+            'REQUEST_STATS_HEADER': 'true'
+        })
+        try:
+            started_at = datetime.utcnow()
+            ops_before = opcounters(db)
+            result = asyncio.run(run_sessions(f'http://127.0.0.1:{port}', next_session, args.concurrency, args.duration, args.warmup))
+            ops_after = opcounters(db)
+        finally:
+            stop_server(server)
+    finally:
+        drop(db)
+
+    result['mongod_opcounters'] = {name: ops_after[name] - ops_before.get(name, 0) for name in ops_after}
+    result['meta'] = {
+        'revision': git_revision(),
+        'started_at': started_at.isoformat(),
+        'server': args.server,
+        'workers': args.workers,
+        'threads': args.threads,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'mix': args.mix,
+        'dataset': {
+            'users': args.users,
+            'lists': args.lists,
+            'items_per_list': args.items,
+            'shared_lists': args.shared_lists,
+            'collaborators': args.collaborators,
+            'seed': args.seed
+        }
+    }
+
+    print_results(result)
+    out = args.out or os.path.join(RESULTS_DIR, f"loadtest-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f'Saved {out}')
+
+
+if __name__ == '__main__':
+    main()
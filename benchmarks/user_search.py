@@ -0,0 +1,74 @@
+"""Compare the old case-insensitive regex user search with the username_lower range scan.
+
+    python -m benchmarks.user_search --users 1000000
+"""
+from pymongo import InsertOne
+import argparse
+import random
+import string
+
+from benchmarks.common import connect, drop, measure, print_table
+from database import normalize_username, prefix_range
+
+
+def seed(db, count, batch_size=10000):
+    rng = random.Random(42)
+    batch = []
+    for i in range(count):
+        username = ''.join(rng.choice(string.ascii_letters) for _ in range(rng.randint(4, 10))) + str(i)
+        batch.append(InsertOne({
+            'email': f'user{i}@example.com',
+            'username': username,
+            'username_lower': normalize_username(username)
+        }))
+        if len(batch) >= batch_size:
+            db.db.users.bulk_write(batch, ordered=False)
+            batch = []
+    if batch:
+        db.db.users.bulk_write(batch, ordered=False)
+
+
+def legacy_search(db, query, limit=5):
+    users = db.db.users.find({'username': {'$regex': f'^{query}', '$options': 'i'}}).limit(limit)
+    return [{'username': u['username'], '_id': str(u['_id'])} for u in users]
+
+
+def docs_examined(cursor):
+    return cursor.explain()['executionStats']['totalDocsExamined']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mongo-uri')
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+
+    db, counter = connect('listpoint_bench_user_search', args.mongo_uri)
+    try:
+        seed(db, args.users)
+        rows = []
+        for prefix in ('ab', 'Qx', 'zzz'):
+            legacy_cursor = db.db.users.find({'username': {'$regex': f'^{prefix}', '$options': 'i'}}).limit(5)
+            rows.append(dict(
+                prefix=prefix,
+                implementation='regex ^q /i',
+                docs_examined=docs_examined(legacy_cursor),
+                **measure(lambda: legacy_search(db, prefix), counter, args.runs)
+            ))
+            range_cursor = db.db.users.find(
+                {'username_lower': prefix_range(normalize_username(prefix))}
+            ).sort('username_lower', 1).limit(5)
+            rows.append(dict(
+                prefix=prefix,
+                implementation='username_lower range',
+                docs_examined=docs_examined(range_cursor),
+                **measure(lambda: db.search_users_by_username(prefix), counter, args.runs)
+            ))
+        print_table(rows, ['prefix', 'implementation', 'docs_examined', 'mean_ms', 'p50_ms', 'p95_ms'])
+    finally:
+        drop(db)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Pending:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """In-process cache with per-entry expiry and request coalescing.
+
+    Concurrent misses for the same key wait on the first caller's
+    computation instead of each running it. Values are shared between
+    requests, so callers must treat them as read-only.
+    """
+
+    def __init__(self, ttl=30, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._async_pending = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+        self.misses += 1
+        return False, None
+
+    def _store(self, key, value, generation):
+        # Results computed across an invalidation may already be stale
+        if generation == self._generation:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            pending = self._pending.get(key)
+            is_leader = pending is None
+            if is_leader:
+                pending = self._pending[key] = _Pending()
+                generation = self._generation
+
+        if not is_leader:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            value = compute()
+        except Exception as e:
+            pending.error = e
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.event.set()
+            raise
+
+        with self._lock:
+            self._store(key, value, generation)
+            self._pending.pop(key, None)
+        pending.value = value
+        pending.event.set()
+        return value
+
+    async def get_or_compute_async(self, key, compute):
+        """Coroutine variant of get_or_compute; `compute` is an async callable."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            future = self._async_pending.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._async_pending[key] = asyncio.get_running_loop().create_future()
+                generation = self._generation
+
+        if not is_leader:
+            return await asyncio.shield(future)
+
+        try:
+            value = await compute()
+        except Exception as e:
+            with self._lock:
+                self._async_pending.pop(key, None)
+            future.set_exception(e)
+            future.exception()  # retrieved here so waiter-less failures are not logged
+            raise
+
+        with self._lock:
+            self._store(key, value, generation)
+            self._async_pending.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._generation += 1
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class CachedPage:
+    def __init__(self, html, render_seconds):
+        self.html = html
+        self.render_seconds = render_seconds
+        self.fingerprint = hashlib.sha1(html.encode('utf-8')).hexdigest()[:16]
+        self.size = len(html.encode('utf-8'))
+
+
+class PageCache:
+    """LRU cache of rendered HTML, bounded by total size.
+
+    Keys are tuples of (list id, list version, ...), so every page
+    rendered for a list can be dropped when that list changes.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._pages = OrderedDict()
+        self._keys_by_list = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.render_seconds_saved = 0.0
+        self.render_seconds_spent = 0.0
+
+    def get(self, key):
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            self.render_seconds_saved += page.render_seconds
+            return page
+
+    def put(self, key, html, render_seconds):
+        page = CachedPage(html, render_seconds)
+        with self._lock:
+            self.render_seconds_spent += render_seconds
+            # Older versions of the same list can never be requested again
+            for old_key in list(self._keys_by_list.get(key[0], ())):
+                if old_key[1] != key[1]:
+                    self._remove(old_key)
+            if page.size > self.max_bytes:
+                return page
+            self._pages[key] = page
+            self._keys_by_list.setdefault(key[0], set()).add(key)
+            self._size += page.size
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._pages)))
+        return page
+
+    def invalidate(self, list_id=None):
+        with self._lock:
+            if list_id is None:
+                self._pages.clear()
+                self._keys_by_list.clear()
+                self._size = 0
+                return
+            for key in list(self._keys_by_list.get(list_id, ())):
+                self._remove(key)
+
+    def _remove(self, key):
+        page = self._pages.pop(key, None)
+        if page is not None:
+            self._size -= page.size
+        keys = self._keys_by_list.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_list[key[0]]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._pages),
+                'bytes': self._size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'render_seconds_saved': round(self.render_seconds_saved, 3),
+                'render_seconds_spent': round(self.render_seconds_spent, 3)
+            }
@@ -1,31 +1,284 @@
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, DESCENDING, IndexModel, InsertOne, ReturnDocument, UpdateOne, monitoring, read_preferences
+from pymongo.errors import DuplicateKeyError, ExecutionTimeout
 from bson.objectid import ObjectId
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import islice
 from werkzeug.security import generate_password_hash
 import os
+import re
+import threading
 
-class Database:
+# Fields the list cards on the dashboard and explore pages need. Items are
+# reduced to counts so card queries never ship whole item arrays; checked
+# and hidden items are id sets (see Database.run_items), so both counts
+# are array sizes.
+LIST_SUMMARY_PROJECTION = {
+    'name': 1,
+    'owner_id': 1,
+    'thumbnail_url': 1,
+    'tags': 1,
+    'is_public': 1,
+    'is_ethereal': 1,
+    'clone_count': {'$ifNull': ['$clone_count', 0]},
+    'favorite_count': {'$ifNull': ['$favorite_count', 0]},
+    'created_at': 1,
+    'updated_at': 1,
+    'item_count': {'$subtract': [
+        {'$size': {'$ifNull': ['$items', []]}},
+        {'$size': {'$ifNull': ['$hidden_ids', []]}}
+    ]},
+    'checked_count': {'$size': {'$ifNull': ['$checked_ids', []]}}
+}
+
+# How much each event adds to a list's popularity score. Scores halve every
+# POPULARITY_HALF_LIFE_DAYS when `flask decay-popularity` runs.
+POPULARITY_WEIGHTS = {'favorite': 3.0, 'clone': 5.0, 'activity': 1.0}
+POPULARITY_HALF_LIFE_DAYS = float(os.getenv('POPULARITY_HALF_LIFE_DAYS', 7))
+# Decayed scores below this are stored as 0
+POPULARITY_FLOOR = 0.01
+
+EXPLORE_SORTS = {
+    'recent': {'updated_at': -1},
+    'popular': {'popularity': -1, 'updated_at': -1},
+    'favorites': {'favorite_count': -1, 'updated_at': -1}
+}
+
+# Folded into item edits so activity counts towards popularity at no cost
+ACTIVITY_INC = {'popularity': POPULARITY_WEIGHTS['activity']}
+
+# Item changes logged per list for /api/lists/<id>/changes. A client further
+# behind than the log reaches (by count or age) fetches the whole list again.
+LIST_CHANGES_MAX_PER_LIST = int(os.getenv('LIST_CHANGES_MAX_PER_LIST', 500))
+LIST_CHANGES_TTL_SECONDS = int(os.getenv('LIST_CHANGES_TTL_HOURS', 24)) * 3600
+# Older entries of a list are trimmed once every this many versions
+LIST_CHANGES_PRUNE_EVERY = 50
+# List settings that change how every item is laid out
+ITEM_LAYOUT_FIELDS = ('is_ordered', 'show_numbering')
+# Budget for ranking a tag prefix by count before settling for the first
+# tags in alphabetical order
+TAG_SUGGESTION_MAX_MS = 50
+
+def normalize_username(username):
+    return username.lower()
+
+def normalize_email(email):
+    return email.lower()
+
+def normalize_tag(tag):
+    """Vocabulary form of a tag: lowercase, single-spaced, no leading '#'."""
+    return ' '.join(tag.strip().lstrip('#').lower().split())
+
+def normalize_tags(tags):
+    normalized = []
+    for tag in tags or []:
+        tag = normalize_tag(tag)
+        if tag and tag not in normalized:
+            normalized.append(tag)
+    return normalized
+
+def prefix_range(prefix):
+    """Index range matching every string that starts with `prefix`."""
+    # U+10FFFF has no successor, so bump the character before it instead
+    stem = prefix.rstrip(chr(0x10FFFF))
+    if not stem:
+        return {'$gte': prefix}
+    next_char = ord(stem[-1]) + 1
+    if 0xD800 <= next_char <= 0xDFFF:
+        next_char = 0xE000  # surrogates cannot be encoded to BSON
+    return {'$gte': prefix, '$lt': stem[:-1] + chr(next_char)}
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters for this process's MongoClient."""
+    
     def __init__(self):
-        mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
-        self.client = MongoClient(mongo_uri)
-        self.db = self.client['list_tracker']
-        self._create_indexes()
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.pools = 0
+            self.connections_open = 0
+            self.connections_in_use = 0
+            self.connections_created = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.pool_clears = 0
+    
+    def _bump(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+    
+    def pool_created(self, event):
+        self._bump(pools=1)
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        self._bump(pool_clears=1)
+    
+    def pool_closed(self, event):
+        self._bump(pools=-1)
+    
+    def connection_created(self, event):
+        self._bump(connections_open=1, connections_created=1)
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_closed(self, event):
+        self._bump(connections_open=-1)
+    
+    def connection_check_out_started(self, event):
+        pass
+    
+    def connection_check_out_failed(self, event):
+        self._bump(checkout_failures=1)
+    
+    def connection_checked_out(self, event):
+        self._bump(connections_in_use=1, checkouts=1)
+    
+    def connection_checked_in(self, event):
+        self._bump(connections_in_use=-1)
+    
+    def as_dict(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'pools': self.pools,
+                'connections_open': self.connections_open,
+                'connections_in_use': self.connections_in_use,
+                'connections_created': self.connections_created,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'pool_clears': self.pool_clears
+            }
+
+def mongo_client_options():
+    """MongoClient keyword arguments from MONGO_* environment settings."""
+    int_settings = {
+        'maxPoolSize': 'MONGO_MAX_POOL_SIZE',
+        'minPoolSize': 'MONGO_MIN_POOL_SIZE',
+        'maxIdleTimeMS': 'MONGO_MAX_IDLE_TIME_MS',
+        'waitQueueTimeoutMS': 'MONGO_WAIT_QUEUE_TIMEOUT_MS',
+        'connectTimeoutMS': 'MONGO_CONNECT_TIMEOUT_MS',
+        'serverSelectionTimeoutMS': 'MONGO_SERVER_SELECTION_TIMEOUT_MS',
+        'socketTimeoutMS': 'MONGO_SOCKET_TIMEOUT_MS',
+        'zlibCompressionLevel': 'MONGO_ZLIB_COMPRESSION_LEVEL'
+    }
+    options = {}
+    for option, env_var in int_settings.items():
+        if os.getenv(env_var):
+            options[option] = int(os.getenv(env_var))
+    if os.getenv('MONGO_COMPRESSORS'):
+        options['compressors'] = os.getenv('MONGO_COMPRESSORS')
+    if os.getenv('MONGO_READ_PREFERENCE'):
+        options['readPreference'] = os.getenv('MONGO_READ_PREFERENCE')
+    return options
+
+class Database:
+    def __init__(self, mongo_uri=None, db_name=None):
+        self.mongo_uri = mongo_uri or os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+        self.db_name = db_name or os.getenv('MONGO_DB_NAME', 'list_tracker')
+        self.auto_index = os.getenv('MONGO_AUTO_INDEX', 'true').lower() == 'true'
+        # Read-heavy, staleness-tolerant queries (explore) may go to secondaries
+        self.read_heavy_preference = read_preferences.make_read_preference(
+            read_preferences.read_pref_mode_from_name(os.getenv('MONGO_READ_HEAVY_PREFERENCE', 'primary')),
+            None
+        )
+        self.pool_stats = PoolStats()
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        # MongoClient is not fork-safe, so every process (e.g. each gunicorn
+        # worker) opens its own on first use instead of inheriting one.
+        if self._client is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                return
+            self.pool_stats.reset()
+            client = MongoClient(self.mongo_uri, event_listeners=[self.pool_stats], **mongo_client_options())
+            self._db = client[self.db_name]
+            self._read_heavy_db = client.get_database(self.db_name, read_preference=self.read_heavy_preference)
+            self._client = client
+            self._pid = os.getpid()
+            if self.auto_index:
+                self._create_indexes()
+    
+    @property
+    def client(self):
+        self._connect()
+        return self._client
+    
+    @property
+    def db(self):
+        self._connect()
+        return self._db
+    
+    @property
+    def read_heavy_db(self):
+        self._connect()
+        return self._read_heavy_db
     
     def _create_indexes(self):
-        self.db.users.create_index([('email', ASCENDING)], unique=True)
-        self.db.users.create_index([('username', ASCENDING)], unique=True)
-        self.db.lists.create_index([('name', ASCENDING)])
-        self.db.lists.create_index([('owner_id', ASCENDING)])
-        self.db.lists.create_index([('collaborators', ASCENDING)])
-        self.db.lists.create_index([('is_public', ASCENDING)])
-        self.db.lists.create_index([('is_ethereal', ASCENDING)])
-        self.db.lists.create_index([('tags', ASCENDING)])
-        self.db.lists.create_index([('parent_id', ASCENDING)])
-        self.db.favorites.create_index([('user_id', ASCENDING)])
-        self.db.favorites.create_index([('list_id', ASCENDING)])
-        self.db.favorites.create_index([('user_id', ASCENDING), ('list_id', ASCENDING)], unique=True)
-        self.db.autocomplete_cache.create_index([('user_id', ASCENDING)])
-        self.db.autocomplete_cache.create_index([('item_text', ASCENDING)])
+        indexes = {
+            'users': [
+                IndexModel([('email', ASCENDING)], unique=True),
+                IndexModel([('username', ASCENDING)], unique=True),
+                IndexModel([('username_lower', ASCENDING)]),
+                IndexModel([('email_lower', ASCENDING)]),
+                IndexModel([('subscription.stripe_customer_id', ASCENDING)]),
+                IndexModel([('created_at', ASCENDING)])
+            ],
+            'lists': [
+                IndexModel([('name', ASCENDING)]),
+                IndexModel([('owner_id', ASCENDING)]),
+                IndexModel([('collaborators', ASCENDING)]),
+                IndexModel([('is_public', ASCENDING)]),
+                IndexModel([('is_public', ASCENDING), ('popularity', DESCENDING), ('updated_at', DESCENDING)]),
+                IndexModel([('is_public', ASCENDING), ('favorite_count', DESCENDING), ('updated_at', DESCENDING)]),
+                IndexModel([('is_ethereal', ASCENDING)]),
+                IndexModel([('tags', ASCENDING)]),
+                IndexModel([('parent_id', ASCENDING)]),
+                IndexModel([('ancestors', ASCENDING)])
+            ],
+            'favorites': [
+                IndexModel([('user_id', ASCENDING)]),
+                IndexModel([('list_id', ASCENDING)]),
+                IndexModel([('user_id', ASCENDING), ('list_id', ASCENDING)], unique=True)
+            ],
+            'tag_stats': [
+                # Walked in count order for top tags, filtering prefixes on _id
+                IndexModel([('count', DESCENDING), ('_id', ASCENDING)])
+            ],
+            'autocomplete_cache': [
+                IndexModel([('user_id', ASCENDING)]),
+                IndexModel([('item_text', ASCENDING)]),
+                # Cover the vocabulary read and its version lookup
+                IndexModel([('user_id', ASCENDING), ('frequency', DESCENDING), ('item_text', ASCENDING)]),
+                IndexModel([('user_id', ASCENDING), ('last_used', DESCENDING)])
+            ],
+            'list_changes': [
+                IndexModel([('list_id', ASCENDING), ('version', ASCENDING)], unique=True),
+                IndexModel([('at', ASCENDING)], expireAfterSeconds=LIST_CHANGES_TTL_SECONDS)
+            ],
+            'rate_limits': [
+                IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0)
+            ],
+            'stripe_events': [
+                IndexModel([('status', ASCENDING), ('next_attempt_at', ASCENDING)]),
+                IndexModel([('customer', ASCENDING), ('created', ASCENDING), ('received_at', ASCENDING)]),
+                IndexModel([('processed_at', ASCENDING)], expireAfterSeconds=30 * 24 * 3600)
+            ]
+        }
+        # One createIndexes command per collection rather than one per index
+        for collection, models in indexes.items():
+            self.db[collection].create_indexes(models)
 
     def get_user_by_email(self, email):
         return self.db.users.find_one({'email': email})
@@ -36,16 +289,139 @@ class Database:
     def get_user_by_username(self, username):
         return self.db.users.find_one({'username': username})
     
+    def get_usernames_by_ids(self, user_ids):
+        users = self.db.users.find({'_id': {'$in': list(user_ids)}}, {'username': 1})
+        return {user['_id']: user['username'] for user in users}
+    
     def search_users_by_username(self, query, limit=5):
-        users = self.db.users.find({
-            'username': {'$regex': f'^{query}', '$options': 'i'}
-        }).limit(limit)
+        users = self.db.users.find(
+            {'username_lower': prefix_range(normalize_username(query))},
+            {'username': 1}
+        ).sort('username_lower', ASCENDING).limit(limit)
         return [{'username': u['username'], '_id': str(u['_id'])} for u in users]
     
+    def backfill_user_search_keys(self, batch_size=1000):
+        """Add username_lower and email_lower to users created before them."""
+        updated = 0
+        batch = []
+        missing = {'$or': [{'username_lower': {'$exists': False}}, {'email_lower': {'$exists': False}}]}
+        for user in self.db.users.find(missing, {'username': 1, 'email': 1}):
+            batch.append(UpdateOne(
+                {'_id': user['_id']},
+                {'$set': {
+                    'username_lower': normalize_username(user['username']),
+                    'email_lower': normalize_email(user['email'])
+                }}
+            ))
+            if len(batch) >= batch_size:
+                updated += self.db.users.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            updated += self.db.users.bulk_write(batch, ordered=False).modified_count
+        return updated
+    
+    def migrate_checked_state(self, batch_size=500):
+        """Move per-item `checked` flags into `checked_ids` and fold each check
+        list's `original_items` copy of the template into `items`.
+        
+        Flags are merged into any `checked_ids` written since the deploy. A
+        check list edited since the deploy has overlay fields on top of its
+        old run copy; the run they describe is folded against
+        `original_items` the same way, so the real template is kept. A
+        list written to while it is being migrated is skipped; running the
+        command again picks it up.
+        """
+        migrated = 0
+        batch = []
+        query = {'$or': [{'original_items': {'$exists': True}}, {'items.checked': {'$exists': True}}]}
+        fields = {
+            'items': 1, 'original_items': 1, 'is_ordered': 1, 'updated_at': 1,
+            'checked_ids': 1, 'hidden_ids': 1, 'run_text': 1, 'run_edits': 1
+        }
+        for list_doc in self.db.lists.find(query, fields):
+            update = self._compact_checked_state(list_doc)
+            # No list_changes entry for this version, so clients resync
+            update['$inc'] = {'version': 1}
+            batch.append(UpdateOne({'_id': list_doc['_id'], 'updated_at': list_doc.get('updated_at')}, update))
+            if len(batch) >= batch_size:
+                migrated += self.db.lists.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            migrated += self.db.lists.bulk_write(batch, ordered=False).modified_count
+        return migrated
+    
+    def _compact_checked_state(self, list_doc):
+        """The update that migrates `list_doc` (see migrate_checked_state)."""
+        def without_checked(item):
+            return {key: value for key, value in item.items() if key != 'checked'}
+        
+        if 'original_items' not in list_doc:
+            run = list_doc.get('items', [])
+            return {
+                '$set': {'items': [without_checked(item) for item in run]},
+                '$addToSet': {'checked_ids': {'$each': [item['_id'] for item in run if item.get('checked')]}}
+            }
+        
+        # The run as it stands: the old run copy with its flags, plus any
+        # overlay written since the deploy (which treated the copy as the
+        # template)
+        run = self.run_items(list_doc)
+        
+        # Clones gave the run and the template different item ids, so fall
+        # back to matching on text
+        run_by_id = {item['_id']: item for item in run}
+        run_by_text = {item['text'].lower(): item for item in run}
+        matched = set()
+        items = []
+        checked_ids = []
+        hidden_ids = []
+        run_text = {}
+        run_edits = {}
+        for original in list_doc['original_items']:
+            copy = run_by_id.get(original['_id']) or run_by_text.get(original['text'].lower())
+            if copy is None or copy['_id'] in matched:
+                items.append(without_checked(original))
+                hidden_ids.append(original['_id'])
+                continue
+            matched.add(copy['_id'])
+            items.append(without_checked(original))
+            if copy['text'] != original['text']:
+                run_text[str(original['_id'])] = copy['text']
+            # The run copy holds the quantities, sections and order set since
+            # the last restore
+            edits = {
+                field: copy.get(field)
+                for field in ('quantity', 'section', 'order')
+                if copy.get(field) != original.get(field)
+            }
+            if edits:
+                run_edits[str(original['_id'])] = edits
+            if copy['checked']:
+                checked_ids.append(original['_id'])
+        
+        for copy in run:
+            if copy['_id'] not in matched:
+                items.append(dict(without_checked(copy), run_only=True))
+                if copy['checked']:
+                    checked_ids.append(copy['_id'])
+        
+        return {
+            '$set': {
+                'items': self._sort_items_with_sections(items, list_doc.get('is_ordered', False)),
+                'hidden_ids': hidden_ids,
+                'run_text': run_text,
+                'run_edits': run_edits
+            },
+            '$addToSet': {'checked_ids': {'$each': checked_ids}},
+            '$unset': {'original_items': ''}
+        }
+    
     def create_user(self, email, username, password_hash):
         user = {
             'email': email,
+            'email_lower': normalize_email(email),
             'username': username,
+            'username_lower': normalize_username(username),
             'password_hash': password_hash,
             'created_at': datetime.utcnow(),
             'is_admin': False,
@@ -59,7 +435,10 @@ class Database:
                 'stripe_customer_id': None,
                 'stripe_subscription_id': None,
                 'subscription_start': None,
-                'subscription_end': None
+                'subscription_end': None,
+                'status': None,
+                'current_period_end': None,
+                'cancel_at_period_end': False
             }
         }
         result = self.db.users.insert_one(user)
@@ -71,33 +450,294 @@ class Database:
             {'$set': {'preferences.theme': theme}}
         )
     
-    def get_lists_by_owner(self, user_id):
-        return list(self.db.lists.find({'owner_id': ObjectId(user_id)}).sort('created_at', -1))
+    def get_list_summaries(self, query, sort, skip=0, limit=None, read_heavy=False):
+        pipeline = [{'$match': query}, {'$sort': sort}]
+        if skip:
+            pipeline.append({'$skip': skip})
+        if limit:
+            pipeline.append({'$limit': limit})
+        pipeline.append({'$project': LIST_SUMMARY_PROJECTION})
+        source = self.read_heavy_db if read_heavy else self.db
+        return list(source.lists.aggregate(pipeline))
     
-    def get_public_lists(self, search_query=None, tags=None, limit=50):
-        query = {'is_public': True}
-        if search_query:
-            query['name'] = {'$regex': search_query, '$options': 'i'}
-        if tags:
-            query['tags'] = {'$in': tags}
-        return list(self.db.lists.find(query).sort('created_at', -1).limit(limit))
+    def get_dashboard(self, user_id, owned_page=1, favorites_page=1, collaborated_page=1, per_page=24):
+        """Owned, favorited and collaborated list cards for the home page in one aggregation.
+
+        Each section is paged independently and comes back as
+        {'lists': [...], 'total': n}. Cards carry owner_username and
+        is_favorited, resolved with $lookup instead of per-list queries.
+        """
+        user_oid = ObjectId(user_id)
+        
+        def page_stages(page):
+            return [{'$skip': (page - 1) * per_page}, {'$limit': per_page}]
+        
+        owner_stages = [
+            {'$lookup': {
+                'from': 'users',
+                'localField': 'owner_id',
+                'foreignField': '_id',
+                'pipeline': [{'$project': {'username': 1}}],
+                'as': 'owner'
+            }},
+            {'$set': {'owner_username': {'$ifNull': [{'$first': '$owner.username'}, 'Unknown']}}},
+            {'$unset': 'owner'}
+        ]
+        favorite_flag_stages = [
+            {'$lookup': {
+                'from': 'favorites',
+                'localField': '_id',
+                'foreignField': 'list_id',
+                'pipeline': [{'$match': {'user_id': user_oid}}, {'$limit': 1}, {'$project': {'_id': 1}}],
+                'as': 'favorite'
+            }},
+            {'$set': {'is_favorited': {'$gt': [{'$size': '$favorite'}, 0]}}},
+            {'$unset': 'favorite'}
+        ]
+        
+        def list_section(foreign_field, page, extra_stages):
+            return [
+                {'$lookup': {
+                    'from': 'lists',
+                    'localField': '_id',
+                    'foreignField': foreign_field,
+                    'pipeline': [{'$sort': {'created_at': -1}}] + page_stages(page) + [
+                        {'$project': LIST_SUMMARY_PROJECTION}
+                    ] + extra_stages,
+                    'as': 'lists'
+                }},
+                {'$lookup': {
+                    'from': 'lists',
+                    'localField': '_id',
+                    'foreignField': foreign_field,
+                    'pipeline': [{'$count': 'count'}],
+                    'as': 'total'
+                }},
+                {'$project': {'_id': 0, 'lists': 1, 'total': {'$ifNull': [{'$first': '$total.count'}, 0]}}}
+            ]
+        
+        favorites_section = [
+            {'$lookup': {
+                'from': 'favorites',
+                'localField': '_id',
+                'foreignField': 'user_id',
+                'pipeline': [
+                    {'$lookup': {
+                        'from': 'lists',
+                        'localField': 'list_id',
+                        'foreignField': '_id',
+                        'pipeline': [{'$project': LIST_SUMMARY_PROJECTION}],
+                        'as': 'list'
+                    }},
+                    {'$unwind': '$list'},
+                    {'$replaceRoot': {'newRoot': '$list'}},
+                    {'$sort': {'created_at': -1}}
+                ] + page_stages(favorites_page) + owner_stages + [{'$set': {'is_favorited': True}}],
+                'as': 'lists'
+            }},
+            {'$lookup': {
+                'from': 'favorites',
+                'localField': '_id',
+                'foreignField': 'user_id',
+                'pipeline': [{'$count': 'count'}],
+                'as': 'total'
+            }},
+            {'$project': {'_id': 0, 'lists': 1, 'total': {'$ifNull': [{'$first': '$total.count'}, 0]}}}
+        ]
+        
+        result = list(self.db.users.aggregate([
+            {'$match': {'_id': user_oid}},
+            {'$project': {'_id': 1}},
+            {'$facet': {
+                'owned': list_section('owner_id', owned_page, favorite_flag_stages),
+                'favorited': favorites_section,
+                'collaborated': list_section('collaborators', collaborated_page, owner_stages + favorite_flag_stages)
+            }}
+        ]))
+        
+        empty = {'lists': [], 'total': 0}
+        facets = result[0] if result else {}
+        return {
+            section: (facets.get(section) or [empty])[0]
+            for section in ('owned', 'favorited', 'collaborated')
+        }
     
-    def get_public_lists_paginated(self, search_query=None, tags=None, skip=0, limit=10):
+    def get_public_lists_paginated(self, search_query=None, tags=None, skip=0, limit=10, sort='recent'):
         query = {'is_public': True}
         if search_query:
             query['name'] = {'$regex': search_query, '$options': 'i'}
         if tags:
-            query['tags'] = {'$in': tags}
-        return list(self.db.lists.find(query).sort('updated_at', -1).skip(skip).limit(limit))
+            query['tags'] = {'$in': normalize_tags(tags)}
+        return self.get_list_summaries(query, EXPLORE_SORTS[sort], skip=skip, limit=limit, read_heavy=True)
     
     def get_list_by_id(self, list_id):
         return self.db.lists.find_one({'_id': ObjectId(list_id)})
     
+    def get_list_version(self, list_id):
+        """What a cached list page depends on, fetched in one command.
+        
+        Favorites, clones and re-parenting don't touch `updated_at`, and
+        the owner's username lives on the user, so those come back too.
+        """
+        versions = list(self.db.lists.aggregate([
+            {'$match': {'_id': ObjectId(list_id)}},
+            {'$project': {'is_public': 1, 'updated_at': 1, 'favorite_count': 1, 'clone_count': 1, 'parent_id': 1, 'owner_id': 1}},
+            {'$lookup': {
+                'from': 'users',
+                'localField': 'owner_id',
+                'foreignField': '_id',
+                'pipeline': [{'$project': {'username': 1}}],
+                'as': 'owner'
+            }},
+            {'$set': {'owner_username': {'$first': '$owner.username'}}},
+            {'$unset': 'owner'}
+        ]))
+        return versions[0] if versions else None
+    
+    def run_items(self, list_doc):
+        """Items of the list's current run, each with its `checked` flag.
+        
+        Check lists store their template once, in `items`. The run is that
+        template minus `hidden_ids`, plus the items flagged `run_only`, with
+        the `run_text` and `run_edits` (quantity, section, order; None
+        clears the field) overrides applied; restoring clears them all.
+        Checked items are the `checked_ids` set on every list.
+        """
+        checked_ids = set(list_doc.get('checked_ids', []))
+        hidden_ids = set(list_doc.get('hidden_ids', []))
+        run_text = list_doc.get('run_text', {})
+        run_edits = list_doc.get('run_edits', {})
+        items = []
+        for item in list_doc.get('items', []):
+            if item['_id'] in hidden_ids:
+                continue
+            # Flags from before migrate-checked-state count until it has run
+            item = dict(item, checked=item['_id'] in checked_ids or item.get('checked', False))
+            if str(item['_id']) in run_text:
+                item['text'] = run_text[str(item['_id'])]
+            for field, value in run_edits.get(str(item['_id']), {}).items():
+                if value is None:
+                    item.pop(field, None)
+                else:
+                    item[field] = value
+            items.append(item)
+        if run_text or run_edits:
+            items = self._sort_items_with_sections(items, list_doc.get('is_ordered', False))
+        return items
+    
+    def _edit_run_items(self, list_doc, edits, op, extra_set=None):
+        """Set fields of run items, given as {item_id: {field: value}}.
+        
+        None removes a field. On a check list, template items are edited in
+        `run_edits`, so restoring the list undoes the change; other items
+        are rewritten in `items`.
+        """
+        update_set = dict(extra_set or {}, updated_at=datetime.utcnow())
+        items = list_doc.get('items', [])
+        items_by_id = {item['_id']: item for item in items}
+        rewrite_items = False
+        for item_id, fields in edits.items():
+            item = items_by_id[item_id]
+            if list_doc.get('is_ethereal') and not item.get('run_only'):
+                for field, value in fields.items():
+                    update_set[f'run_edits.{item_id}.{field}'] = value
+                continue
+            for field, value in fields.items():
+                if value is None:
+                    item.pop(field, None)
+                else:
+                    item[field] = value
+            rewrite_items = True
+        
+        if rewrite_items:
+            update_set['items'] = self._sort_items_with_sections(items, list_doc.get('is_ordered', False))
+        return self._update_items({'_id': list_doc['_id']}, {'$set': update_set}, op, list(edits))
+    
+    def _update_items(self, query, update, op, item_ids, array_filters=None):
+        """Apply an item-level update to the list matching `query` and log it.
+        
+        The list's `version` is bumped in the same write, and the ids of the
+        items it changed are recorded under that version in `list_changes`
+        (None when the change is not item by item, e.g. a restore). If the
+        log write fails, the version gap sends clients to a full resync.
+        Returns the number of lists matched, like update_one.
+        """
+        update = dict(update, **{'$inc': dict(update.get('$inc', {}), version=1)})
+        list_doc = self.db.lists.find_one_and_update(
+            query, update, projection={'version': 1}, array_filters=array_filters,
+            return_document=ReturnDocument.AFTER
+        )
+        if list_doc is None:
+            return 0
+        self._log_list_change(list_doc['_id'], list_doc['version'], op, item_ids)
+        return 1
+    
+    def _log_list_change(self, list_oid, version, op, item_ids):
+        self.db.list_changes.insert_one({
+            'list_id': list_oid,
+            'version': version,
+            'op': op,
+            'item_ids': None if item_ids is None else list(item_ids),
+            'at': datetime.utcnow()
+        })
+        if version % LIST_CHANGES_PRUNE_EVERY == 0:
+            self.db.list_changes.delete_many({
+                'list_id': list_oid,
+                'version': {'$lte': version - LIST_CHANGES_MAX_PER_LIST}
+            })
+    
+    def get_changed_item_ids(self, list_doc, since):
+        """Ids of the items changed after version `since` of `list_doc`.
+        
+        None when the log cannot account for every version in between:
+        entries were trimmed or expired, one was never written, or a change
+        covered the whole list.
+        """
+        version = list_doc.get('version', 0)
+        if since == version:
+            return set()
+        if since > version or version - since > LIST_CHANGES_MAX_PER_LIST:
+            return None
+        changes = list(self.db.list_changes.find(
+            {'list_id': list_doc['_id'], 'version': {'$gt': since, '$lte': version}},
+            {'item_ids': 1, '_id': 0}
+        ))
+        if len(changes) != version - since:
+            return None
+        item_ids = set()
+        for change in changes:
+            if change['item_ids'] is None:
+                return None
+            item_ids.update(change['item_ids'])
+        return item_ids
+    
     def create_list(self, name, owner_id, thumbnail_url='', is_public=True, is_ethereal=False, tags=None, items=None, parent_id=None, is_ordered=False, show_numbering=False):
+        # Lineage from the root of the clone tree down to the parent
+        ancestors = []
+        if parent_id:
+            parent = self.db.lists.find_one({'_id': ObjectId(parent_id)}, {'ancestors': 1})
+            ancestors = (parent or {}).get('ancestors', []) + [ObjectId(parent_id)]
+        
+        list_doc = self._new_list_doc(name, owner_id, thumbnail_url, is_public, is_ethereal, tags, items, parent_id, ancestors, is_ordered, show_numbering)
+        result = self.db.lists.insert_one(list_doc)
+        if is_public:
+            self._count_tags(list_doc['tags'], 1)
+        
+        if parent_id:
+            self.db.lists.update_one(
+                {'_id': ObjectId(parent_id)},
+                {'$inc': {'clone_count': 1, 'popularity': POPULARITY_WEIGHTS['clone']}}
+            )
+        
+        return result.inserted_id
+    
+    def _new_list_doc(self, name, owner_id, thumbnail_url='', is_public=True, is_ethereal=False, tags=None, items=None, parent_id=None, ancestors=None, is_ordered=False, show_numbering=False):
         items = items or []
+        tags = normalize_tags(tags)
+        checked_ids = [item['_id'] for item in items if item.pop('checked', False)]
         sorted_items = self._sort_items_with_sections(items, is_ordered)
         
-        list_doc = {
+        return {
             'name': name,
             'owner_id': ObjectId(owner_id),
             'thumbnail_url': thumbnail_url,
@@ -105,40 +745,218 @@ class Database:
             'is_ethereal': is_ethereal,
             'is_ordered': is_ordered,
             'show_numbering': show_numbering,
-            'tags': tags or [],
+            'tags': tags,
             'items': sorted_items,
+            'checked_ids': checked_ids,
             'collaborators': [],
             'parent_id': ObjectId(parent_id) if parent_id else None,
+            'ancestors': ancestors or [],
             'clone_count': 0,
+            'favorite_count': 0,
+            'popularity': 0,
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
-        
+    
+    def iter_lists_for_export(self, owner_id, batch_size=100):
+        """Cursor over a user's owned lists, oldest first, fetched in batches."""
+        return self.db.lists.find(
+            {'owner_id': ObjectId(owner_id)},
+            {
+                'name': 1, 'tags': 1, 'is_public': 1, 'is_ethereal': 1, 'is_ordered': 1,
+                'show_numbering': 1, 'thumbnail_url': 1, 'empty_sections': 1, 'items': 1,
+                'checked_ids': 1, 'hidden_ids': 1, 'run_text': 1, 'run_edits': 1, 'created_at': 1
+            }
+        ).sort('_id', ASCENDING).batch_size(batch_size)
+    
+    def import_lists(self, owner_id, records, batch_size=500):
+        """Insert lists parsed by list_transfer, `batch_size` per bulk_write.
+        
+        Consumes `records` lazily, so memory is bounded by one batch however
+        large the upload. Returns the number of lists inserted.
+        """
+        inserted = 0
+        batch = []
+        tag_counts = Counter()
+        for record in records:
+            list_doc = self._imported_list_doc(owner_id, record)
+            batch.append(InsertOne(list_doc))
+            if list_doc['is_public']:
+                tag_counts.update(list_doc['tags'])
+            if len(batch) >= batch_size:
+                inserted += self._write_import_batch(batch, tag_counts)
+                batch = []
+                tag_counts = Counter()
+        if batch:
+            inserted += self._write_import_batch(batch, tag_counts)
+        return inserted
+    
+    def _write_import_batch(self, batch, tag_counts):
+        inserted = self.db.lists.bulk_write(batch, ordered=False).inserted_count
+        if tag_counts:
+            self.db.tag_stats.bulk_write([
+                UpdateOne({'_id': tag}, {'$inc': {'count': count}}, upsert=True)
+                for tag, count in tag_counts.items()
+            ], ordered=False)
+        return inserted
+    
+    def _imported_list_doc(self, owner_id, record):
+        is_ethereal = record['is_ethereal']
+        items = []
+        hidden_ids = []
+        run_text = {}
+        run_edits = {}
+        for entry in record['items']:
+            item = {
+                '_id': ObjectId(),
+                'text': entry['text'],
+                'quantity': entry['quantity'],
+                'checked': entry['checked'],
+                'added_at': datetime.utcnow()
+            }
+            if entry['section']:
+                item['section'] = entry['section']
+            if entry['order'] is not None:
+                item['order'] = entry['order']
+            if is_ethereal:
+                if entry['run_only']:
+                    item['run_only'] = True
+                elif entry['hidden']:
+                    hidden_ids.append(item['_id'])
+                if entry['run_text']:
+                    run_text[str(item['_id'])] = entry['run_text']
+                if entry['run_edits'] and not entry['run_only']:
+                    run_edits[str(item['_id'])] = entry['run_edits']
+            items.append(item)
+        
+        list_doc = self._new_list_doc(
+            record['name'],
+            owner_id,
+            thumbnail_url=record['thumbnail_url'],
+            is_public=record['is_public'],
+            is_ethereal=is_ethereal,
+            tags=record['tags'],
+            items=items,
+            is_ordered=record['is_ordered'],
+            show_numbering=record['show_numbering']
+        )
+        list_doc['empty_sections'] = record['empty_sections']
         if is_ethereal:
-            list_doc['original_items'] = sorted_items.copy()
-        
-        result = self.db.lists.insert_one(list_doc)
-        
-        if parent_id:
-            self.db.lists.update_one(
-                {'_id': ObjectId(parent_id)},
-                {'$inc': {'clone_count': 1}}
-            )
-        
-        return result.inserted_id
+            list_doc['hidden_ids'] = hidden_ids
+            list_doc['run_text'] = run_text
+            list_doc['run_edits'] = run_edits
+        return list_doc
     
     def update_list(self, list_id, **kwargs):
         kwargs['updated_at'] = datetime.utcnow()
-        self.db.lists.update_one(
+        if 'tags' in kwargs:
+            kwargs['tags'] = normalize_tags(kwargs['tags'])
+        update = {'$set': kwargs}
+        # Ordering and numbering re-lay out every item, so clients following
+        # the change log resync the whole list
+        relayout = any(field in kwargs for field in ITEM_LAYOUT_FIELDS)
+        if relayout:
+            update['$inc'] = {'version': 1}
+        
+        before = self.db.lists.find_one_and_update(
             {'_id': ObjectId(list_id)},
-            {'$set': kwargs}
+            update,
+            projection={'tags': 1, 'is_public': 1, 'version': 1}
+        )
+        if not before:
+            return
+        if relayout:
+            self._log_list_change(before['_id'], before.get('version', 0) + 1, 'layout', None)
+        
+        # Tag stats follow the change from the list's previous public tags
+        if 'tags' in kwargs or 'is_public' in kwargs:
+            old_tags = set(before.get('tags', [])) if before.get('is_public') else set()
+            is_public = kwargs.get('is_public', before.get('is_public'))
+            new_tags = set(kwargs.get('tags', before.get('tags', []))) if is_public else set()
+            self._count_tags(old_tags - new_tags, -1)
+            self._count_tags(new_tags - old_tags, 1)
+    
+    def _count_tags(self, tags, delta):
+        """Adjust the public list count of each tag in `tag_stats`."""
+        if not tags:
+            return
+        self.db.tag_stats.bulk_write([
+            UpdateOne({'_id': tag}, {'$inc': {'count': delta}}, upsert=True)
+            for tag in tags
+        ], ordered=False)
+    
+    def get_tag_suggestions(self, prefix, limit=10):
+        """Most used tags starting with `prefix`, ranked by the server.
+        
+        The planner either walks the (count, _id) index until `limit` tags
+        match, or sorts the prefix's `_id` range keeping only the top ones.
+        A prefix too broad to rank in TAG_SUGGESTION_MAX_MS gets its first
+        tags alphabetically instead.
+        """
+        prefix = normalize_tag(prefix)
+        if not prefix:
+            return self.get_popular_tags(limit)
+        query = {'_id': prefix_range(prefix), 'count': {'$gt': 0}}
+        try:
+            return list(
+                self.db.tag_stats.find(query)
+                .sort([('count', DESCENDING), ('_id', ASCENDING)])
+                .limit(limit)
+                .max_time_ms(TAG_SUGGESTION_MAX_MS)
+            )
+        except ExecutionTimeout:
+            return list(self.db.tag_stats.find(query).sort('_id', ASCENDING).limit(limit))
+    
+    def get_popular_tags(self, limit=20):
+        return list(
+            self.db.tag_stats.find({'count': {'$gt': 0}})
+            .sort([('count', DESCENDING), ('_id', ASCENDING)])
+            .limit(limit)
         )
     
+    def get_tag_facets(self, selected_tags=None, limit=20):
+        """Public list counts for the selected tags plus the most used others."""
+        selected_tags = normalize_tags(selected_tags)
+        facets = self.get_popular_tags(limit + len(selected_tags))
+        if selected_tags:
+            seen = {facet['_id'] for facet in facets}
+            missing = [tag for tag in selected_tags if tag not in seen]
+            if missing:
+                facets += self.db.tag_stats.find({'_id': {'$in': missing}})
+        return [
+            {'tag': facet['_id'], 'count': max(0, facet['count']), 'selected': facet['_id'] in selected_tags}
+            for facet in facets
+        ]
+    
+    def rebuild_tag_stats(self, batch_size=1000):
+        """Normalize every list's tags and recount tag_stats from scratch."""
+        normalized = 0
+        batch = []
+        for list_doc in self.db.lists.find({'tags.0': {'$exists': True}}, {'tags': 1}):
+            tags = normalize_tags(list_doc['tags'])
+            if tags != list_doc['tags']:
+                batch.append(UpdateOne({'_id': list_doc['_id']}, {'$set': {'tags': tags}}))
+            if len(batch) >= batch_size:
+                normalized += self.db.lists.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            normalized += self.db.lists.bulk_write(batch, ordered=False).modified_count
+        
+        # $out swaps the collection in atomically and keeps its indexes
+        self.db.lists.aggregate([
+            {'$match': {'is_public': True}},
+            {'$unwind': '$tags'},
+            {'$group': {'_id': '$tags', 'count': {'$sum': 1}}},
+            {'$out': 'tag_stats'}
+        ])
+        return normalized
+    
     def delete_list(self, list_id):
         list_doc = self.get_list_by_id(list_id)
         if not list_doc:
             return
         
+        list_oid = list_doc['_id']
         parent_id = list_doc.get('parent_id')
         if parent_id:
             self.db.lists.update_one(
@@ -146,35 +964,30 @@ class Database:
                 {'$inc': {'clone_count': -1}}
             )
         
-        children = list(self.db.lists.find({'parent_id': ObjectId(list_id)}))
+        if list_doc.get('is_public'):
+            self._count_tags(list_doc.get('tags', []), -1)
         
-        orphan_list_id = None
-        for child in children:
+        child_count = self.db.lists.count_documents({'parent_id': list_oid})
+        if child_count:
             if parent_id:
-                self.db.lists.update_one(
-                    {'_id': child['_id']},
-                    {'$set': {'parent_id': parent_id}}
-                )
-                if parent_id:
-                    self.db.lists.update_one(
-                        {'_id': parent_id},
-                        {'$inc': {'clone_count': 1}}
-                    )
+                # Children move up to the grandparent, so the whole subtree
+                # drops this list from its lineage
+                new_parent_id = parent_id
+                self.db.lists.update_many({'ancestors': list_oid}, {'$pull': {'ancestors': list_oid}})
             else:
-                if orphan_list_id is None:
-                    orphan_list_id = self._create_orphan_list(list_doc)
-                self.db.lists.update_one(
-                    {'_id': child['_id']},
-                    {'$set': {'parent_id': orphan_list_id}}
-                )
-                if orphan_list_id:
-                    self.db.lists.update_one(
-                        {'_id': orphan_list_id},
-                        {'$inc': {'clone_count': 1}}
-                    )
+                # A root is replaced by an orphan copy in the same position
+                new_parent_id = self._create_orphan_list(list_doc)
+                self.db.lists.update_many({'ancestors': list_oid}, {'$set': {'ancestors.$': new_parent_id}})
+            
+            self.db.lists.update_many({'parent_id': list_oid}, {'$set': {'parent_id': new_parent_id}})
+            self.db.lists.update_one(
+                {'_id': new_parent_id},
+                {'$inc': {'clone_count': child_count}}
+            )
         
         self.db.lists.delete_one({'_id': ObjectId(list_id)})
         self.db.favorites.delete_many({'list_id': ObjectId(list_id)})
+        self.db.list_changes.delete_many({'list_id': ObjectId(list_id)})
     
     def _sort_items_with_sections(self, items, is_ordered=False):
         if is_ordered:
@@ -203,7 +1016,8 @@ class Database:
         if not list_doc:
             return False, 'List not found', None
         
-        for item in list_doc['items']:
+        run = self.run_items(list_doc)
+        for item in run:
             if item['text'].lower() == item_text.lower():
                 return False, f'"{item_text}" is already in this list', None
         
@@ -217,71 +1031,120 @@ class Database:
         if section:
             new_item['section'] = section
         
+        # Items added while checking off a check list last until it is restored
+        if list_doc.get('is_ethereal'):
+            new_item['run_only'] = True
+        
         is_ordered = list_doc.get('is_ordered', False)
         if is_ordered:
-            max_order = max([item.get('order', 0) for item in list_doc['items']], default=-1)
+            max_order = max([item.get('order', 0) for item in run], default=-1)
             new_item['order'] = max_order + 1
         
         items = list_doc['items'] + [new_item]
         sorted_items = self._sort_items_with_sections(items, is_ordered)
         
-        self.db.lists.update_one(
+        self._update_items(
             {'_id': ObjectId(list_id)},
-            {'$set': {'items': sorted_items, 'updated_at': datetime.utcnow()}}
+            {'$set': {'items': sorted_items, 'updated_at': datetime.utcnow()}, '$inc': ACTIVITY_INC},
+            'add', [new_item['_id']]
         )
         
         return True, 'Item added successfully', str(new_item['_id'])
     
     def remove_item_from_list(self, list_id, item_id):
-        self.db.lists.update_one(
+        item_oid = ObjectId(item_id)
+        now = datetime.utcnow()
+        
+        # Removing a template item while checking off a check list only hides
+        # it for this run
+        hidden = self._update_items(
+            {
+                '_id': ObjectId(list_id),
+                'is_ethereal': True,
+                'items': {'$elemMatch': {'_id': item_oid, 'run_only': {'$ne': True}}}
+            },
+            {
+                '$addToSet': {'hidden_ids': item_oid},
+                '$pull': {'checked_ids': item_oid},
+                '$set': {'updated_at': now},
+                '$inc': ACTIVITY_INC
+            },
+            'remove', [item_oid]
+        )
+        if hidden:
+            return
+        
+        self._update_items(
             {'_id': ObjectId(list_id)},
             {
-                '$pull': {'items': {'_id': ObjectId(item_id)}},
-                '$set': {'updated_at': datetime.utcnow()}
-            }
+                '$pull': {'items': {'_id': item_oid}, 'checked_ids': item_oid},
+                '$set': {'updated_at': now},
+                '$inc': ACTIVITY_INC
+            },
+            'remove', [item_oid]
         )
     
     def restore_ethereal_list(self, list_id, reset_checked_only=False):
-        list_doc = self.get_list_by_id(list_id)
-        if not list_doc or not list_doc.get('is_ethereal'):
-            return False
-        
+        now = datetime.utcnow()
         if reset_checked_only:
-            items = list_doc.get('items', [])
-            for item in items:
-                item['checked'] = False
-            self.db.lists.update_one(
-                {'_id': ObjectId(list_id)},
-                {'$set': {'items': items, 'updated_at': datetime.utcnow()}}
-            )
+            update = {'$set': {'checked_ids': [], 'updated_at': now}}
         else:
-            original_items = list_doc.get('original_items', [])
-            unchecked_items = []
-            for item in original_items:
-                item_copy = item.copy()
-                item_copy['checked'] = False
-                unchecked_items.append(item_copy)
-            self.db.lists.update_one(
-                {'_id': ObjectId(list_id)},
-                {'$set': {'items': unchecked_items, 'updated_at': datetime.utcnow()}}
-            )
-        return True
-    
-    def toggle_item_checked(self, list_id, item_id):
-        list_doc = self.get_list_by_id(list_id)
-        if not list_doc:
-            return False, 'List not found'
-        
-        items = list_doc.get('items', [])
-        for item in items:
-            if str(item['_id']) == str(item_id):
-                item['checked'] = not item.get('checked', False)
-                break
+            update = {
+                '$set': {'checked_ids': [], 'hidden_ids': [], 'run_text': {}, 'run_edits': {}, 'updated_at': now},
+                '$pull': {'items': {'run_only': True}}
+            }
         
+        # Flags from before migrate-checked-state; a separate write, as the
+        # restore also pulls from `items`
         self.db.lists.update_one(
-            {'_id': ObjectId(list_id)},
-            {'$set': {'items': items, 'updated_at': datetime.utcnow()}}
+            {'_id': ObjectId(list_id), 'is_ethereal': True, 'items.checked': {'$exists': True}},
+            {'$unset': {'items.$[].checked': ''}}
         )
+        
+        op = 'reset' if reset_checked_only else 'restore'
+        return self._update_items({'_id': ObjectId(list_id), 'is_ethereal': True}, update, op, None) > 0
+    
+    def toggle_item_checked(self, list_id, item_id, checked=None):
+        """Check or uncheck an item; `checked=None` flips its current state."""
+        list_oid = ObjectId(list_id)
+        item_oid = ObjectId(item_id)
+        now = datetime.utcnow()
+        
+        # Also clears a flag left from before migrate-checked-state, which
+        # run_items would otherwise still count
+        uncheck = {
+            '$pull': {'checked_ids': item_oid},
+            '$unset': {'items.$[item].checked': ''},
+            '$set': {'updated_at': now}
+        }
+        
+        if checked is None:
+            # Only matches when the item is checked, so a miss means check it
+            matched = self._update_items(
+                {'_id': list_oid, '$or': [
+                    {'checked_ids': item_oid},
+                    {'items': {'$elemMatch': {'_id': item_oid, 'checked': True}}}
+                ]},
+                uncheck, 'uncheck', [item_oid], array_filters=[{'item._id': item_oid}]
+            )
+            if matched:
+                return True, 'Item toggled'
+            checked = True
+        
+        if checked:
+            matched = self._update_items(
+                {'_id': list_oid, 'items._id': item_oid},
+                {'$addToSet': {'checked_ids': item_oid}, '$set': {'updated_at': now}},
+                'check', [item_oid]
+            )
+        else:
+            matched = self._update_items(
+                {'_id': list_oid, 'items._id': item_oid}, uncheck, 'uncheck', [item_oid],
+                array_filters=[{'item._id': item_oid}]
+            )
+        
+        if not matched:
+            return False, 'Item not found'
         return True, 'Item toggled'
     
     def add_item_to_original(self, list_id, item_text):
@@ -289,8 +1152,8 @@ class Database:
         if not list_doc or not list_doc.get('is_ethereal'):
             return False, 'Not an ethereal list', None
         
-        original_items = list_doc.get('original_items', [])
-        for item in original_items:
+        items = list_doc.get('items', [])
+        for item in items:
             if item['text'].lower() == item_text.lower():
                 return False, f'"{item_text}" is already in this list', None
         
@@ -298,67 +1161,53 @@ class Database:
             '_id': ObjectId(),
             'text': item_text,
             'quantity': 1,
-            'checked': False,
             'added_at': datetime.utcnow()
         }
         
         is_ordered = list_doc.get('is_ordered', False)
         if is_ordered:
-            max_order = max([item.get('order', 0) for item in original_items], default=-1)
+            max_order = max([item.get('order', 0) for item in items], default=-1)
             new_item['order'] = max_order + 1
         
-        original_items.append(new_item)
-        sorted_original = self._sort_items_with_sections(original_items, is_ordered)
-        
-        items = list_doc.get('items', [])
-        items.append(new_item.copy())
+        items.append(new_item)
         sorted_items = self._sort_items_with_sections(items, is_ordered)
         
-        self.db.lists.update_one(
+        self._update_items(
             {'_id': ObjectId(list_id)},
-            {'$set': {
-                'original_items': sorted_original,
-                'items': sorted_items,
-                'updated_at': datetime.utcnow()
-            }}
+            {'$set': {'items': sorted_items, 'updated_at': datetime.utcnow()}, '$inc': ACTIVITY_INC},
+            'add', [new_item['_id']]
         )
         return True, 'Item added to original', str(new_item['_id'])
     
     def remove_item_from_original(self, list_id, item_id):
-        list_doc = self.get_list_by_id(list_id)
-        if not list_doc or not list_doc.get('is_ethereal'):
-            return False
-        
-        self.db.lists.update_one(
-            {'_id': ObjectId(list_id)},
+        item_oid = ObjectId(item_id)
+        matched = self._update_items(
+            {'_id': ObjectId(list_id), 'is_ethereal': True},
             {
                 '$pull': {
-                    'original_items': {'_id': ObjectId(item_id)},
-                    'items': {'_id': ObjectId(item_id)}
+                    'items': {'_id': item_oid},
+                    'checked_ids': item_oid,
+                    'hidden_ids': item_oid
                 },
-                '$set': {'updated_at': datetime.utcnow()}
-            }
+                '$unset': {f'run_text.{item_id}': '', f'run_edits.{item_id}': ''},
+                '$set': {'updated_at': datetime.utcnow()},
+                '$inc': ACTIVITY_INC
+            },
+            'remove', [item_oid]
         )
-        return True
+        return matched > 0
     
     def adjust_item_quantity(self, list_id, item_id, delta):
         list_doc = self.get_list_by_id(list_id)
         if not list_doc:
             return False, 'List not found'
         
-        items = list_doc.get('items', [])
-        for item in items:
+        for item in self.run_items(list_doc):
             if str(item['_id']) == str(item_id):
-                current_qty = item.get('quantity', 1)
-                new_qty = max(1, current_qty + delta)
-                item['quantity'] = new_qty
-                break
-        
-        self.db.lists.update_one(
-            {'_id': ObjectId(list_id)},
-            {'$set': {'items': items, 'updated_at': datetime.utcnow()}}
-        )
-        return True, 'Quantity updated'
+                new_qty = max(1, item.get('quantity', 1) + delta)
+                self._edit_run_items(list_doc, {item['_id']: {'quantity': new_qty}}, 'quantity')
+                return True, 'Quantity updated'
+        return False, 'Item not found'
     
     def reorder_items(self, list_id, item_orders):
         list_doc = self.get_list_by_id(list_id)
@@ -368,19 +1217,14 @@ class Database:
         if not list_doc.get('is_ordered', False):
             return False, 'List is not an ordered list'
         
-        items = list_doc.get('items', [])
-        item_dict = {str(item['_id']): item for item in items}
+        item_dict = {str(item['_id']): item for item in self.run_items(list_doc)}
         
+        moved = {}
         for item_id, order in item_orders.items():
-            if item_id in item_dict:
-                item_dict[item_id]['order'] = order
+            if item_id in item_dict and item_dict[item_id].get('order') != order:
+                moved[item_dict[item_id]['_id']] = {'order': order}
         
-        reordered_items = self._sort_items_with_sections(list(item_dict.values()), is_ordered=True)
-        
-        self.db.lists.update_one(
-            {'_id': ObjectId(list_id)},
-            {'$set': {'items': reordered_items, 'updated_at': datetime.utcnow()}}
-        )
+        self._edit_run_items(list_doc, moved, 'reorder')
         return True, 'Items reordered successfully'
     
     def update_item_text(self, list_id, item_id, new_text):
@@ -388,22 +1232,32 @@ class Database:
         if not list_doc:
             return False, 'List not found', None
         
-        items = list_doc.get('items', [])
         old_text = None
-        item_found = False
+        target = None
         
-        for item in items:
+        for item in self.run_items(list_doc):
             if str(item['_id']) == str(item_id):
                 old_text = item['text']
                 if old_text.lower() == new_text.lower():
                     return False, 'New text is the same as current text', old_text
-                item_found = True
+                target = item
             elif item['text'].lower() == new_text.lower():
                 return False, 'An item with this text already exists', old_text
         
-        if not item_found:
+        if target is None:
             return False, 'Item not found', None
         
+        # Editing a template item while checking off a check list lasts
+        # until it is restored
+        if list_doc.get('is_ethereal') and not target.get('run_only'):
+            self._update_items(
+                {'_id': ObjectId(list_id)},
+                {'$set': {f'run_text.{item_id}': new_text, 'updated_at': datetime.utcnow()}, '$inc': ACTIVITY_INC},
+                'text', [target['_id']]
+            )
+            return True, 'Item updated successfully', old_text
+        
+        items = list_doc.get('items', [])
         for item in items:
             if str(item['_id']) == str(item_id):
                 item['text'] = new_text
@@ -411,9 +1265,10 @@ class Database:
         
         sorted_items = self._sort_items_with_sections(items)
         
-        self.db.lists.update_one(
+        self._update_items(
             {'_id': ObjectId(list_id)},
-            {'$set': {'items': sorted_items, 'updated_at': datetime.utcnow()}}
+            {'$set': {'items': sorted_items, 'updated_at': datetime.utcnow()}, '$inc': ACTIVITY_INC},
+            'text', [target['_id']]
         )
         
         return True, 'Item updated successfully', old_text
@@ -424,11 +1279,12 @@ class Database:
             return False, 'Not an ethereal list', None
         
         items = list_doc.get('items', [])
-        original_items = list_doc.get('original_items', [])
         old_text = None
         item_found = False
         
-        for item in original_items:
+        for item in items:
+            if item.get('run_only'):
+                continue
             if str(item['_id']) == str(item_id):
                 old_text = item['text']
                 if old_text.lower() == new_text.lower():
@@ -440,26 +1296,21 @@ class Database:
         if not item_found:
             return False, 'Item not found', None
         
-        for item in original_items:
-            if str(item['_id']) == str(item_id):
-                item['text'] = new_text
-                break
-        
         for item in items:
             if str(item['_id']) == str(item_id):
                 item['text'] = new_text
                 break
         
         sorted_items = self._sort_items_with_sections(items)
-        sorted_original = self._sort_items_with_sections(original_items)
         
-        self.db.lists.update_one(
+        self._update_items(
             {'_id': ObjectId(list_id)},
-            {'$set': {
-                'items': sorted_items,
-                'original_items': sorted_original,
-                'updated_at': datetime.utcnow()
-            }}
+            {
+                '$set': {'items': sorted_items, 'updated_at': datetime.utcnow()},
+                '$unset': {f'run_text.{item_id}': ''},
+                '$inc': ACTIVITY_INC
+            },
+            'text', [ObjectId(item_id)]
         )
         
         return True, 'Item updated successfully', old_text
@@ -470,35 +1321,154 @@ class Database:
             'list_id': ObjectId(list_id)
         }) is not None
     
+    def get_favorited_list_ids(self, user_id, list_ids):
+        favorites = self.db.favorites.find({
+            'user_id': ObjectId(user_id),
+            'list_id': {'$in': [ObjectId(list_id) for list_id in list_ids]}
+        }, {'list_id': 1, '_id': 0})
+        return {str(fav['list_id']) for fav in favorites}
+    
     def add_favorite(self, user_id, list_id):
+        """Favorite a list; returns its new favorite_count, or None if it already was."""
         try:
             self.db.favorites.insert_one({
                 'user_id': ObjectId(user_id),
                 'list_id': ObjectId(list_id),
                 'created_at': datetime.utcnow()
             })
-            return True
         except:
-            return False
+            return None
+        return self._bump_favorite_count(list_id, 1)
     
     def remove_favorite(self, user_id, list_id):
-        self.db.favorites.delete_one({
+        """Unfavorite a list; returns its new favorite_count, or None if it was not one."""
+        result = self.db.favorites.delete_one({
             'user_id': ObjectId(user_id),
             'list_id': ObjectId(list_id)
         })
+        if not result.deleted_count:
+            return None
+        return self._bump_favorite_count(list_id, -1)
     
-    def get_favorited_lists(self, user_id):
-        favorites = self.db.favorites.find({'user_id': ObjectId(user_id)})
-        list_ids = [fav['list_id'] for fav in favorites]
-        return list(self.db.lists.find({'_id': {'$in': list_ids}}).sort('created_at', -1))
+    def _bump_favorite_count(self, list_id, delta):
+        list_doc = self.db.lists.find_one_and_update(
+            {'_id': ObjectId(list_id)},
+            # Pipeline update so popularity, which decays, can't go negative
+            [{'$set': {
+                'favorite_count': {'$add': [{'$ifNull': ['$favorite_count', 0]}, delta]},
+                'popularity': {'$max': [0, {'$add': [{'$ifNull': ['$popularity', 0]}, delta * POPULARITY_WEIGHTS['favorite']]}]}
+            }}],
+            projection={'favorite_count': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        return list_doc['favorite_count'] if list_doc else 0
+    
+    def reconcile_favorite_counts(self, batch_size=1000):
+        """Reset favorite_count from the favorites collection wherever it drifted."""
+        repaired = 0
+        lists = self.db.lists.find({}, {'favorite_count': 1}).batch_size(batch_size)
+        while True:
+            chunk = list(islice(lists, batch_size))
+            if not chunk:
+                break
+            counts = self.db.favorites.aggregate([
+                {'$match': {'list_id': {'$in': [lst['_id'] for lst in chunk]}}},
+                {'$group': {'_id': '$list_id', 'count': {'$sum': 1}}}
+            ])
+            counts = {count['_id']: count['count'] for count in counts}
+            batch = [
+                # Skipped if a favorite landed since the read; the next run repairs it
+                UpdateOne(
+                    {'_id': lst['_id'], 'favorite_count': lst.get('favorite_count')},
+                    {'$set': {'favorite_count': counts.get(lst['_id'], 0)}}
+                )
+                for lst in chunk
+                if lst.get('favorite_count') != counts.get(lst['_id'], 0)
+            ]
+            if batch:
+                repaired += self.db.lists.bulk_write(batch, ordered=False).modified_count
+        return repaired
+    
+    def decay_popularity(self, batch_size=1000, now=None):
+        """Apply time decay to every popularity score, in batches.
+        
+        Lists without a score yet are seeded from their clones and favorites.
+        Each write is conditional on the score it was computed from, so a
+        list favorited or edited mid-run keeps its increment and is decayed
+        on the next run instead.
+        """
+        now = now or datetime.utcnow()
+        half_life = POPULARITY_HALF_LIFE_DAYS * 86400
+        updated = self._seed_popularity(batch_size, now)
+        batch = []
+        lists = self.db.lists.find(
+            {'popularity': {'$exists': True, '$ne': 0}},
+            {'popularity': 1, 'popularity_decayed_at': 1}
+        )
+        for list_doc in lists:
+            decayed_at = list_doc.get('popularity_decayed_at') or now
+            elapsed = max(0, (now - decayed_at).total_seconds())
+            score = list_doc['popularity'] * 0.5 ** (elapsed / half_life)
+            if score < POPULARITY_FLOOR:
+                score = 0
+            batch.append(UpdateOne(
+                {'_id': list_doc['_id'], 'popularity': list_doc['popularity']},
+                {'$set': {'popularity': score, 'popularity_decayed_at': now}}
+            ))
+            if len(batch) >= batch_size:
+                updated += self.db.lists.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            updated += self.db.lists.bulk_write(batch, ordered=False).modified_count
+        return updated
+    
+    def _seed_popularity(self, batch_size, now):
+        updated = 0
+        lists = self.db.lists.find({'popularity': {'$exists': False}}, {'clone_count': 1}).batch_size(batch_size)
+        while True:
+            chunk = list(islice(lists, batch_size))
+            if not chunk:
+                break
+            favorites = self.db.favorites.aggregate([
+                {'$match': {'list_id': {'$in': [lst['_id'] for lst in chunk]}}},
+                {'$group': {'_id': '$list_id', 'count': {'$sum': 1}}}
+            ])
+            favorite_counts = {fav['_id']: fav['count'] for fav in favorites}
+            batch = [UpdateOne(
+                {'_id': lst['_id'], 'popularity': {'$exists': False}},
+                {'$set': {
+                    'popularity': lst.get('clone_count', 0) * POPULARITY_WEIGHTS['clone']
+                    + favorite_counts.get(lst['_id'], 0) * POPULARITY_WEIGHTS['favorite'],
+                    'popularity_decayed_at': now
+                }}
+            ) for lst in chunk]
+            updated += self.db.lists.bulk_write(batch, ordered=False).modified_count
+        return updated
     
     def get_autocomplete_suggestions(self, user_id, query, limit=5):
         suggestions = self.db.autocomplete_cache.find({
             'user_id': ObjectId(user_id),
-            'item_text': {'$regex': f'^{query}', '$options': 'i'}
+            'item_text': {'$regex': f'^{re.escape(query)}', '$options': 'i'}
         }).sort('frequency', -1).limit(limit)
         return [s['item_text'] for s in suggestions]
     
+    def get_vocabulary(self, user_id, limit):
+        """[item_text, frequency] pairs, most used first, read from the index alone."""
+        entries = self.db.autocomplete_cache.find(
+            {'user_id': ObjectId(user_id)},
+            {'item_text': 1, 'frequency': 1, '_id': 0}
+        ).sort([('frequency', DESCENDING), ('item_text', ASCENDING)]).limit(limit)
+        return [[entry['item_text'], entry['frequency']] for entry in entries]
+    
+    def get_vocabulary_version(self, user_id):
+        """When the user's vocabulary last changed; every write sets last_used."""
+        latest = self.db.autocomplete_cache.find_one(
+            {'user_id': ObjectId(user_id)},
+            {'last_used': 1, '_id': 0},
+            sort=[('last_used', DESCENDING)]
+        )
+        return latest['last_used'] if latest else None
+    
     def update_autocomplete_cache(self, user_id, item_text):
         existing = self.db.autocomplete_cache.find_one({
             'user_id': ObjectId(user_id),
@@ -559,31 +1529,17 @@ class Database:
         if not list_doc:
             return False, 'List not found'
         
-        items = list_doc.get('items', [])
-        item_found = False
-        
-        for item in items:
-            if str(item['_id']) == str(item_id):
-                item['section'] = section_name
-                item_found = True
-                break
-        
-        if not item_found:
+        target = next((item for item in self.run_items(list_doc) if str(item['_id']) == str(item_id)), None)
+        if target is None:
             return False, 'Item not found'
         
-        sorted_items = self._sort_items_with_sections(items, list_doc.get('is_ordered', False))
-        
         empty_sections = list_doc.get('empty_sections', [])
         if section_name in empty_sections:
             empty_sections.remove(section_name)
         
-        self.db.lists.update_one(
-            {'_id': ObjectId(list_id)},
-            {'$set': {
-                'items': sorted_items,
-                'empty_sections': empty_sections,
-                'updated_at': datetime.utcnow()
-            }}
+        self._edit_run_items(
+            list_doc, {target['_id']: {'section': section_name}}, 'section',
+            {'empty_sections': empty_sections}
         )
         
         return True, 'Section created successfully'
@@ -593,25 +1549,11 @@ class Database:
         if not list_doc:
             return False, 'List not found'
         
-        items = list_doc.get('items', [])
-        item_found = False
-        
-        for item in items:
-            if str(item['_id']) == str(item_id):
-                if 'section' in item:
-                    del item['section']
-                item_found = True
-                break
-        
-        if not item_found:
+        target = next((item for item in self.run_items(list_doc) if str(item['_id']) == str(item_id)), None)
+        if target is None:
             return False, 'Item not found'
         
-        sorted_items = self._sort_items_with_sections(items, list_doc.get('is_ordered', False))
-        
-        self.db.lists.update_one(
-            {'_id': ObjectId(list_id)},
-            {'$set': {'items': sorted_items, 'updated_at': datetime.utcnow()}}
-        )
+        self._edit_run_items(list_doc, {target['_id']: {'section': None}}, 'section')
         
         return True, 'Item moved to loose items successfully'
     
@@ -620,13 +1562,12 @@ class Database:
         if not list_doc:
             return False, 'List not found'
         
-        items = list_doc.get('items', [])
-        updated = False
-        
-        for item in items:
-            if item.get('section') == old_section_name:
-                item['section'] = new_section_name
-                updated = True
+        renamed = {
+            item['_id']: {'section': new_section_name}
+            for item in self.run_items(list_doc)
+            if item.get('section') == old_section_name
+        }
+        updated = bool(renamed)
         
         empty_sections = list_doc.get('empty_sections', [])
         if old_section_name in empty_sections:
@@ -637,16 +1578,7 @@ class Database:
         if not updated:
             return False, 'Section not found'
         
-        sorted_items = self._sort_items_with_sections(items, list_doc.get('is_ordered', False))
-        
-        self.db.lists.update_one(
-            {'_id': ObjectId(list_id)},
-            {'$set': {
-                'items': sorted_items,
-                'empty_sections': empty_sections,
-                'updated_at': datetime.utcnow()
-            }}
-        )
+        self._edit_run_items(list_doc, renamed, 'section', {'empty_sections': empty_sections})
         
         return True, 'Section renamed successfully'
     
@@ -655,11 +1587,10 @@ class Database:
         if not list_doc:
             return False, 'List not found'
         
-        items = list_doc.get('items', [])
-        filtered_items = [item for item in items if item.get('section') != section_name]
+        removed = [item for item in self.run_items(list_doc) if item.get('section') == section_name]
         
         empty_sections = list_doc.get('empty_sections', [])
-        section_existed = len(filtered_items) != len(items) or section_name in empty_sections
+        section_existed = bool(removed) or section_name in empty_sections
         
         if not section_existed:
             return False, 'Section not found'
@@ -667,14 +1598,22 @@ class Database:
         if section_name in empty_sections:
             empty_sections.remove(section_name)
         
-        self.db.lists.update_one(
-            {'_id': ObjectId(list_id)},
-            {'$set': {
-                'items': filtered_items,
-                'empty_sections': empty_sections,
-                'updated_at': datetime.utcnow()
-            }}
-        )
+        removed_ids = [item['_id'] for item in removed]
+        update = {
+            '$set': {'empty_sections': empty_sections, 'updated_at': datetime.utcnow()},
+            '$pull': {'checked_ids': {'$in': removed_ids}}
+        }
+        if list_doc.get('is_ethereal'):
+            # Template items are only hidden for this run, like removing them
+            # one by one
+            hidden_ids = [item['_id'] for item in removed if not item.get('run_only')]
+            run_only_ids = [item['_id'] for item in removed if item.get('run_only')]
+            update['$addToSet'] = {'hidden_ids': {'$each': hidden_ids}}
+            update['$pull']['items'] = {'_id': {'$in': run_only_ids}}
+        else:
+            update['$pull']['items'] = {'_id': {'$in': removed_ids}}
+        
+        self._update_items({'_id': ObjectId(list_id)}, update, 'remove', removed_ids)
         
         return True, 'Section deleted successfully'
     
@@ -683,31 +1622,17 @@ class Database:
         if not list_doc:
             return False, 'List not found'
         
-        items = list_doc.get('items', [])
-        item_found = False
-        
-        for item in items:
-            if str(item['_id']) == str(item_id):
-                item['section'] = section_name
-                item_found = True
-                break
-        
-        if not item_found:
+        target = next((item for item in self.run_items(list_doc) if str(item['_id']) == str(item_id)), None)
+        if target is None:
             return False, 'Item not found'
         
-        sorted_items = self._sort_items_with_sections(items, list_doc.get('is_ordered', False))
-        
         empty_sections = list_doc.get('empty_sections', [])
         if section_name in empty_sections:
             empty_sections.remove(section_name)
         
-        self.db.lists.update_one(
-            {'_id': ObjectId(list_id)},
-            {'$set': {
-                'items': sorted_items,
-                'empty_sections': empty_sections,
-                'updated_at': datetime.utcnow()
-            }}
+        self._edit_run_items(
+            list_doc, {target['_id']: {'section': section_name}}, 'section',
+            {'empty_sections': empty_sections}
         )
         
         return True, f'Item promoted to section "{section_name}"'
@@ -718,7 +1643,7 @@ class Database:
             return []
         
         sections = set()
-        for item in list_doc.get('items', []):
+        for item in self.run_items(list_doc):
             if item.get('section'):
                 sections.add(item['section'])
         
@@ -740,19 +1665,104 @@ class Database:
             }}
         )
     
+    def sync_user_subscription(self, user_id, **fields):
+        self.db.users.update_one(
+            {'_id': ObjectId(user_id)},
+            {'$set': {f'subscription.{field}': value for field, value in fields.items()}}
+        )
+    
     def cancel_user_subscription(self, user_id):
         self.db.users.update_one(
             {'_id': ObjectId(user_id)},
             {'$set': {
                 'subscription.is_ad_free': False,
                 'subscription.stripe_subscription_id': None,
-                'subscription.subscription_end': datetime.utcnow()
+                'subscription.subscription_end': datetime.utcnow(),
+                'subscription.status': 'canceled',
+                'subscription.cancel_at_period_end': False,
+                'subscription.synced_at': datetime.utcnow()
             }}
         )
     
+    def get_subscribed_users(self):
+        return self.db.users.find(
+            {'subscription.stripe_subscription_id': {'$ne': None}},
+            {'subscription': 1}
+        )
+    
     def get_user_by_stripe_customer_id(self, stripe_customer_id):
         return self.db.users.find_one({'subscription.stripe_customer_id': stripe_customer_id})
     
+    # Stripe webhook inbox
+    def record_stripe_event(self, event):
+        """Store a verified webhook event. Returns False for duplicate deliveries."""
+        now = datetime.utcnow()
+        try:
+            self.db.stripe_events.insert_one({
+                '_id': event['id'],
+                'type': event['type'],
+                'customer': event['data']['object'].get('customer'),
+                'created': event.get('created'),
+                'payload': event,
+                'status': 'pending',
+                'attempts': 0,
+                'received_at': now,
+                'next_attempt_at': now
+            })
+            return True
+        except DuplicateKeyError:
+            return False
+    
+    def claim_stripe_event(self, lease_seconds=120):
+        now = datetime.utcnow()
+        claimable = {'$or': [
+            {'status': 'pending', 'next_attempt_at': {'$lte': now}},
+            {'status': 'processing', 'locked_until': {'$lt': now}}
+        ]}
+        candidates = self.db.stripe_events.find(
+            claimable, {'customer': 1, 'created': 1, 'received_at': 1}
+        ).sort([('created', ASCENDING), ('received_at', ASCENDING)]).limit(50)
+        
+        for candidate in candidates:
+            # Keep per-customer order: wait until earlier events are done
+            if candidate.get('customer') and self.db.stripe_events.find_one({
+                'customer': candidate['customer'],
+                'status': {'$in': ['pending', 'processing']},
+                '$or': [
+                    {'created': {'$lt': candidate['created']}},
+                    {'created': candidate['created'], 'received_at': {'$lt': candidate['received_at']}}
+                ]
+            }, {'_id': 1}):
+                continue
+            
+            claimed = self.db.stripe_events.find_one_and_update(
+                {'_id': candidate['_id'], **claimable},
+                {
+                    '$set': {'status': 'processing', 'locked_until': now + timedelta(seconds=lease_seconds)},
+                    '$inc': {'attempts': 1}
+                },
+                return_document=ReturnDocument.AFTER
+            )
+            if claimed:
+                return claimed
+        return None
+    
+    def complete_stripe_event(self, event_id):
+        self.db.stripe_events.update_one(
+            {'_id': event_id},
+            {'$set': {'status': 'processed', 'processed_at': datetime.utcnow()}, '$unset': {'locked_until': ''}}
+        )
+    
+    def fail_stripe_event(self, event_id, error, next_attempt_at, give_up=False):
+        self.db.stripe_events.update_one(
+            {'_id': event_id},
+            {'$set': {
+                'status': 'dead' if give_up else 'pending',
+                'last_error': error,
+                'next_attempt_at': next_attempt_at
+            }, '$unset': {'locked_until': ''}}
+        )
+    
     def add_collaborator(self, list_id, user_id):
         try:
             list_doc = self.get_list_by_id(list_id)
@@ -783,11 +1793,6 @@ class Database:
         )
         return True, 'Collaborator removed successfully'
     
-    def get_collaborated_lists(self, user_id):
-        return list(self.db.lists.find({
-            'collaborators': ObjectId(user_id)
-        }).sort('created_at', -1))
-    
     def is_collaborator(self, user_id, list_id):
         list_doc = self.get_list_by_id(list_id)
         if not list_doc:
@@ -803,20 +1808,72 @@ class Database:
         )
         return result.modified_count > 0
     
-    def get_all_users(self):
-        users = list(self.db.users.find({}).sort('created_at', -1))
-        # Remove password_hash from the results
-        for user in users:
-            user.pop('password_hash', None)
-        return users
+    def get_users_page(self, search=None, page=1, per_page=50):
+        query = {}
+        if search:
+            # Prefix ranges walk the username_lower/email_lower indexes
+            query = {'$or': [
+                {'username_lower': prefix_range(normalize_username(search))},
+                {'email_lower': prefix_range(normalize_email(search))}
+            ]}
+        
+        total = self.db.users.count_documents(query)
+        users = list(self.db.users.aggregate([
+            {'$match': query},
+            {'$sort': {'created_at': -1}},
+            {'$skip': (page - 1) * per_page},
+            {'$limit': per_page},
+            {'$project': {
+                'username': 1,
+                'email': 1,
+                'created_at': 1,
+                'is_admin': 1,
+                'roles': 1,
+                'groups': 1,
+                'subscription.is_ad_free': 1
+            }},
+            {'$lookup': {
+                'from': 'lists',
+                'localField': '_id',
+                'foreignField': 'owner_id',
+                'pipeline': [{'$count': 'count'}],
+                'as': 'owned_counts'
+            }},
+            {'$lookup': {
+                'from': 'lists',
+                'localField': '_id',
+                'foreignField': 'collaborators',
+                'pipeline': [{'$count': 'count'}],
+                'as': 'collaboration_counts'
+            }},
+            {'$lookup': {
+                'from': 'favorites',
+                'localField': '_id',
+                'foreignField': 'user_id',
+                'pipeline': [{'$count': 'count'}],
+                'as': 'favorite_counts'
+            }},
+            {'$set': {
+                'lists_owned': {'$ifNull': [{'$first': '$owned_counts.count'}, 0]},
+                'collaborations': {'$ifNull': [{'$first': '$collaboration_counts.count'}, 0]},
+                'favorites': {'$ifNull': [{'$first': '$favorite_counts.count'}, 0]}
+            }},
+            {'$unset': ['owned_counts', 'collaboration_counts', 'favorite_counts']}
+        ]))
+        return users, total
     
     def update_user_field(self, user_id, field, value):
         # Prevent updating password_hash directly
         if field == 'password_hash':
             return False
+        update = {field: value}
+        if field == 'username':
+            update['username_lower'] = normalize_username(value)
+        elif field == 'email':
+            update['email_lower'] = normalize_email(value)
         result = self.db.users.update_one(
             {'_id': ObjectId(user_id)},
-            {'$set': {field: value}}
+            {'$set': update}
         )
         return result.modified_count > 0
     
@@ -853,28 +1910,20 @@ class Database:
         if not original_list:
             return None
         
+        # A cloned check list starts a fresh run of the template
+        if original_list.get('is_ethereal'):
+            source_items = [item for item in original_list.get('items', []) if not item.get('run_only')]
+        else:
+            source_items = self.run_items(original_list)
+        
         items_copy = []
-        for item in original_list.get('items', []):
-            item_copy = {
+        for item in source_items:
+            items_copy.append({
                 '_id': ObjectId(),
                 'text': item['text'],
                 'quantity': item.get('quantity', 1),
                 'added_at': datetime.utcnow()
-            }
-            if original_list.get('is_ethereal'):
-                item_copy['checked'] = False
-            items_copy.append(item_copy)
-        
-        original_items_copy = []
-        if original_list.get('is_ethereal'):
-            for item in original_list.get('original_items', []):
-                original_items_copy.append({
-                    '_id': ObjectId(),
-                    'text': item['text'],
-                    'quantity': item.get('quantity', 1),
-                    'checked': False,
-                    'added_at': datetime.utcnow()
-                })
+            })
         
         cloned_list_id = self.create_list(
             name=original_list['name'],
@@ -889,19 +1938,83 @@ class Database:
             show_numbering=original_list.get('show_numbering', False)
         )
         
-        if original_list.get('is_ethereal') and original_items_copy:
-            self.db.lists.update_one(
-                {'_id': cloned_list_id},
-                {'$set': {'original_items': original_items_copy}}
-            )
-        
         return cloned_list_id
     
     def get_children_lists(self, list_id):
         return list(self.db.lists.find({'parent_id': ObjectId(list_id)}))
     
+    def get_descendant_tree(self, list_doc, viewer_id=None, max_depth=None, skip=0, limit=50):
+        """One page of a list's clone subtree, breadth first, with counts.
+        
+        A single aggregate on the `ancestors` index returns the visible
+        descendants (public, or owned by or shared with `viewer_id`) down to
+        `max_depth` levels, their total and the count at each depth.
+        """
+        root_depth = len(list_doc.get('ancestors', []))
+        match = {'ancestors': list_doc['_id']}
+        if max_depth is not None:
+            # Deeper lists have an element at this position
+            match[f'ancestors.{root_depth + max_depth}'] = {'$exists': False}
+        visibility = [{'is_public': True}]
+        if viewer_id:
+            visibility += [{'owner_id': ObjectId(viewer_id)}, {'collaborators': ObjectId(viewer_id)}]
+        match['$or'] = visibility
+        
+        result = next(self.db.lists.aggregate([
+            {'$match': match},
+            {'$project': {
+                'name': 1,
+                'owner_id': 1,
+                'parent_id': 1,
+                'is_public': 1,
+                'clone_count': {'$ifNull': ['$clone_count', 0]},
+                'created_at': 1,
+                'depth': {'$subtract': [{'$size': '$ancestors'}, root_depth]}
+            }},
+            {'$facet': {
+                'lists': [{'$sort': {'depth': 1, '_id': 1}}, {'$skip': skip}, {'$limit': limit}],
+                'depths': [{'$group': {'_id': '$depth', 'count': {'$sum': 1}}}, {'$sort': {'_id': 1}}]
+            }}
+        ]))
+        depth_counts = {depth['_id']: depth['count'] for depth in result['depths']}
+        return {
+            'lists': result['lists'],
+            'total': sum(depth_counts.values()),
+            'depth_counts': depth_counts
+        }
+    
+    def backfill_ancestors(self, batch_size=1000):
+        """Add `ancestors` to lists created before it existed, a tree level at a time."""
+        updated = 0
+        seen = set()
+        level = {doc['_id']: [] for doc in self.db.lists.find({'parent_id': None}, {'_id': 1})}
+        while level:
+            seen.update(level)
+            batch = []
+            for list_id, ancestors in level.items():
+                batch.append(UpdateOne({'_id': list_id}, {'$set': {'ancestors': ancestors}}))
+                if len(batch) >= batch_size:
+                    updated += self.db.lists.bulk_write(batch, ordered=False).modified_count
+                    batch = []
+            if batch:
+                updated += self.db.lists.bulk_write(batch, ordered=False).modified_count
+            
+            next_level = {}
+            parent_ids = list(level)
+            for start in range(0, len(parent_ids), batch_size):
+                children = self.db.lists.find(
+                    {'parent_id': {'$in': parent_ids[start:start + batch_size]}},
+                    {'parent_id': 1}
+                )
+                for child in children:
+                    if child['_id'] not in seen:
+                        next_level[child['_id']] = level[child['parent_id']] + [child['parent_id']]
+            level = next_level
+        return updated
+    
     def _create_orphan_list(self, deleted_list):
         items_copy = []
+        new_ids = {}
         for item in deleted_list.get('items', []):
             item_copy = {
                 '_id': ObjectId(),
@@ -909,21 +2022,11 @@ class Database:
                 'quantity': item.get('quantity', 1),
                 'added_at': datetime.utcnow()
             }
-            if deleted_list.get('is_ethereal'):
-                item_copy['checked'] = item.get('checked', False)
+            if item.get('run_only'):
+                item_copy['run_only'] = True
+            new_ids[item['_id']] = item_copy['_id']
             items_copy.append(item_copy)
         
-        original_items_copy = []
-        if deleted_list.get('is_ethereal'):
-            for item in deleted_list.get('original_items', []):
-                original_items_copy.append({
-                    '_id': ObjectId(),
-                    'text': item['text'],
-                    'quantity': item.get('quantity', 1),
-                    'checked': False,
-                    'added_at': datetime.utcnow()
-                })
-        
         none_user = self.db.users.find_one({'username': 'None'})
         if not none_user:
             password_hash = generate_password_hash('none_user_no_login')
@@ -939,15 +2042,32 @@ class Database:
             'is_ethereal': deleted_list.get('is_ethereal', False),
             'tags': deleted_list.get('tags', []),
             'items': items_copy,
+            'checked_ids': [new_ids[item_id] for item_id in deleted_list.get('checked_ids', []) if item_id in new_ids],
             'collaborators': [],
             'parent_id': None,
+            'ancestors': [],
             'clone_count': 0,
+            'favorite_count': 0,
+            'popularity': 0,
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
         
-        if deleted_list.get('is_ethereal') and original_items_copy:
-            orphan_list_doc['original_items'] = original_items_copy
+        if deleted_list.get('is_ethereal'):
+            orphan_list_doc['hidden_ids'] = [new_ids[item_id] for item_id in deleted_list.get('hidden_ids', []) if item_id in new_ids]
+            orphan_list_doc['run_text'] = {
+                str(new_ids[ObjectId(item_id)]): text
+                for item_id, text in deleted_list.get('run_text', {}).items()
+                if ObjectId(item_id) in new_ids
+            }
+            # Orphans drop sections and order, so only quantities carry over
+            orphan_list_doc['run_edits'] = {
+                str(new_ids[ObjectId(item_id)]): {'quantity': edits['quantity']}
+                for item_id, edits in deleted_list.get('run_edits', {}).items()
+                if ObjectId(item_id) in new_ids and 'quantity' in edits
+            }
         
         result = self.db.lists.insert_one(orphan_list_doc)
+        if orphan_list_doc['is_public']:
+            self._count_tags(orphan_list_doc['tags'], 1)
         return result.inserted_id
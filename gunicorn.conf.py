@@ -0,0 +1,13 @@
+"""gunicorn settings; loaded automatically from the working directory.
+
+With PROMETHEUS_MULTIPROC_DIR set, each worker writes its metrics to files
+there. When a worker exits its files must be marked dead, or its gauges
+linger in /metrics after gunicorn replaces it.
+"""
+import os
+
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
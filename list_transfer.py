@@ -0,0 +1,352 @@
+"""Streaming export and import of a user's lists as NDJSON or CSV.
+
+NDJSON has one list per line. CSV has one row per item, with the list's
+fields repeated on each row and rows of the same list kept together
+(`list_id` groups them); a list without items is a single row with the
+item columns empty.
+
+Check lists keep their run state: `checked` on every item, plus
+`run_only`, `hidden`, `run_text` and `run_edits` (see Database.run_items;
+in CSV `run_edits` is a JSON object).
+"""
+import csv
+import io
+import json
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+CSV_COLUMNS = [
+    'list_id', 'list_name', 'tags', 'is_public', 'is_ethereal', 'is_ordered', 'show_numbering',
+    'empty_sections', 'item_text', 'quantity', 'section', 'order', 'checked', 'run_only', 'hidden', 'run_text',
+    'run_edits'
+]
+
+MAX_NAME_LENGTH = 100
+MAX_ITEM_LENGTH = 500
+MAX_ITEMS_PER_LIST = 10000
+MAX_REPORTED_ERRORS = 20
+MAX_QUANTITY = 1000000
+# Orders are stored as 32-bit ints; anything larger fails the whole batch
+MAX_ORDER = 2 ** 31 - 1
+
+
+class ImportRecordError(ValueError):
+    pass
+
+
+def export_record(list_doc):
+    checked_ids = set(list_doc.get('checked_ids', []))
+    hidden_ids = set(list_doc.get('hidden_ids', []))
+    run_text = list_doc.get('run_text', {})
+    run_edits = list_doc.get('run_edits', {})
+    items = []
+    for item in list_doc.get('items', []):
+        items.append({
+            'text': item['text'],
+            'quantity': item.get('quantity', 1),
+            'section': item.get('section'),
+            'order': item.get('order'),
+            'checked': item['_id'] in checked_ids,
+            'run_only': bool(item.get('run_only')),
+            'hidden': item['_id'] in hidden_ids,
+            'run_text': run_text.get(str(item['_id'])),
+            'run_edits': run_edits.get(str(item['_id']))
+        })
+    return {
+        'id': str(list_doc['_id']),
+        'name': list_doc['name'],
+        'tags': list_doc.get('tags', []),
+        'is_public': list_doc.get('is_public', True),
+        'is_ethereal': list_doc.get('is_ethereal', False),
+        'is_ordered': list_doc.get('is_ordered', False),
+        'show_numbering': list_doc.get('show_numbering', False),
+        'thumbnail_url': list_doc.get('thumbnail_url', ''),
+        'empty_sections': list_doc.get('empty_sections', []),
+        'created_at': list_doc['created_at'].isoformat() if list_doc.get('created_at') else None,
+        'items': items
+    }
+
+
+def export_ndjson(list_docs):
+    for list_doc in list_docs:
+        yield json.dumps(export_record(list_doc)) + '\n'
+
+
+def export_csv(list_docs):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for list_doc in list_docs:
+        record = export_record(list_doc)
+        list_fields = [
+            record['id'],
+            record['name'],
+            ';'.join(record['tags']),
+            _csv_bool(record['is_public']),
+            _csv_bool(record['is_ethereal']),
+            _csv_bool(record['is_ordered']),
+            _csv_bool(record['show_numbering']),
+            ';'.join(record['empty_sections'])
+        ]
+        if not record['items']:
+            writer.writerow(list_fields + [''] * 9)
+        for item in record['items']:
+            writer.writerow(list_fields + [
+                item['text'],
+                item['quantity'],
+                item['section'] or '',
+                '' if item['order'] is None else item['order'],
+                _csv_bool(item['checked']),
+                _csv_bool(item['run_only']),
+                _csv_bool(item['hidden']),
+                item['run_text'] or '',
+                json.dumps(item['run_edits']) if item['run_edits'] else ''
+            ])
+        # One chunk per list keeps memory flat however many lists there are
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _csv_bool(value):
+    return 'true' if value else 'false'
+
+
+def parse_ndjson(lines):
+    """Yield (line number, raw record or ImportRecordError) per non-blank line."""
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, ImportRecordError(f'invalid JSON: {e}')
+
+
+def parse_csv(lines):
+    """Yield (first line number, raw record or ImportRecordError) per list.
+
+    A row the csv module cannot parse (e.g. a field over its size limit)
+    fails the list it belongs to, and that list's remaining rows are
+    dropped rather than imported as a partial list.
+    """
+    lines = _RowLines(lines)
+    reader = csv.DictReader(lines)
+    try:
+        missing = {'list_id', 'list_name'} - set(reader.fieldnames or [])
+    except csv.Error as e:
+        yield 1, ImportRecordError(f'invalid CSV: {e}')
+        return
+    if missing:
+        yield 1, ImportRecordError(f'missing columns: {", ".join(sorted(missing))}')
+        return
+    id_column = reader.fieldnames.index('list_id')
+    record = None
+    current_id = None
+    start_line = None
+    broken_id = None
+    while True:
+        lines.start_row()
+        try:
+            row = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as e:
+            bad_id = lines.row_field(id_column)
+            if record is not None and bad_id not in (None, current_id):
+                yield start_line, record
+            yield reader.line_num, ImportRecordError(f'invalid CSV: {e}')
+            broken_id = current_id if bad_id is None else bad_id
+            record = None
+            continue
+        if row['list_id'] == broken_id:
+            continue
+        broken_id = None
+        if record is None or row['list_id'] != current_id:
+            if record is not None:
+                yield start_line, record
+            current_id = row['list_id']
+            start_line = reader.line_num
+            record = {
+                'name': row['list_name'],
+                'tags': _split(row.get('tags')),
+                'is_public': _parse_bool(row.get('is_public'), True),
+                'is_ethereal': _parse_bool(row.get('is_ethereal'), False),
+                'is_ordered': _parse_bool(row.get('is_ordered'), False),
+                'show_numbering': _parse_bool(row.get('show_numbering'), False),
+                'empty_sections': _split(row.get('empty_sections')),
+                'items': []
+            }
+        if row.get('item_text'):
+            record['items'].append({
+                'text': row['item_text'],
+                'quantity': row.get('quantity') or 1,
+                'section': row.get('section') or None,
+                'order': row.get('order') or None,
+                'checked': _parse_bool(row.get('checked'), False),
+                'run_only': _parse_bool(row.get('run_only'), False),
+                'hidden': _parse_bool(row.get('hidden'), False),
+                'run_text': row.get('run_text') or None,
+                'run_edits': row.get('run_edits') or None
+            })
+    if record is not None:
+        yield start_line, record
+
+
+class _RowLines:
+    """The upload's lines, remembering the first one of the row being read."""
+
+    def __init__(self, lines):
+        self.lines = iter(lines)
+        self.first = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self.lines)
+        if self.first is None:
+            self.first = line
+        return line
+
+    def start_row(self):
+        self.first = None
+
+    def row_field(self, column):
+        """A leading field of a row csv could not parse, if it is unquoted."""
+        if self.first is None:
+            return None
+        fields = self.first.split(',', column + 1)
+        if len(fields) <= column or '"' in ''.join(fields[:column + 1]):
+            return None
+        return fields[column].strip('\r\n')
+
+
+def _split(value):
+    return [part for part in (value or '').split(';') if part.strip()]
+
+
+def _parse_bool(value, default):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('true', '1', 'yes')
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+def _clean_run_edits(run_edits, text):
+    if not run_edits:
+        return None
+    try:
+        if isinstance(run_edits, str):
+            run_edits = json.loads(run_edits)
+        if not isinstance(run_edits, dict):
+            raise ValueError
+        cleaned = {}
+        if 'quantity' in run_edits:
+            cleaned['quantity'] = _clamp(int(run_edits['quantity']), 1, MAX_QUANTITY)
+        if 'order' in run_edits:
+            order = run_edits['order']
+            cleaned['order'] = None if order is None else _clamp(int(order), -MAX_ORDER, MAX_ORDER)
+        if 'section' in run_edits:
+            section = run_edits['section']
+            cleaned['section'] = str(section).strip() if section else None
+    except (TypeError, ValueError, OverflowError):
+        raise ImportRecordError(f'bad run_edits for "{text}"')
+    return cleaned or None
+
+
+def clean_record(raw):
+    """Validate a parsed record into the shape Database.import_lists expects."""
+    if not isinstance(raw, dict):
+        raise ImportRecordError('expected an object')
+    name = raw.get('name')
+    if not isinstance(name, str) or not name.strip():
+        raise ImportRecordError('list name is required')
+    if len(name) > MAX_NAME_LENGTH:
+        raise ImportRecordError(f'list name is longer than {MAX_NAME_LENGTH} characters')
+    items = raw.get('items') or []
+    if not isinstance(items, list):
+        raise ImportRecordError('items must be a list')
+    if len(items) > MAX_ITEMS_PER_LIST:
+        raise ImportRecordError(f'more than {MAX_ITEMS_PER_LIST} items')
+
+    cleaned_items = []
+    seen = set()
+    for entry in items:
+        if isinstance(entry, str):
+            entry = {'text': entry}
+        if not isinstance(entry, dict):
+            raise ImportRecordError('each item must be an object or a string')
+        text = entry.get('text')
+        if not isinstance(text, str) or not text.strip():
+            raise ImportRecordError('item text is required')
+        text = text.strip()
+        if len(text) > MAX_ITEM_LENGTH:
+            raise ImportRecordError(f'item text is longer than {MAX_ITEM_LENGTH} characters')
+        if text.lower() in seen:
+            continue
+        seen.add(text.lower())
+        try:
+            quantity = _clamp(int(entry.get('quantity') or 1), 1, MAX_QUANTITY)
+            order = None if entry.get('order') is None else _clamp(int(entry['order']), -MAX_ORDER, MAX_ORDER)
+        except (TypeError, ValueError, OverflowError):
+            # OverflowError: int() of an infinite float such as 1e999
+            raise ImportRecordError(f'bad quantity or order for "{text}"')
+        run_text = entry.get('run_text')
+        cleaned_items.append({
+            'text': text,
+            'quantity': quantity,
+            'section': str(entry['section']).strip() if entry.get('section') else None,
+            'order': order,
+            'checked': _parse_bool(entry.get('checked'), False),
+            'run_only': _parse_bool(entry.get('run_only'), False),
+            'hidden': _parse_bool(entry.get('hidden'), False),
+            'run_text': run_text.strip()[:MAX_ITEM_LENGTH] if isinstance(run_text, str) and run_text.strip() else None,
+            'run_edits': _clean_run_edits(entry.get('run_edits'), text)
+        })
+
+    tags = raw.get('tags') or []
+    empty_sections = raw.get('empty_sections') or []
+    if not isinstance(tags, list) or not isinstance(empty_sections, list):
+        raise ImportRecordError('tags and empty_sections must be lists')
+    thumbnail_url = raw.get('thumbnail_url') or ''
+    return {
+        'name': name.strip(),
+        'tags': [str(tag) for tag in tags],
+        'is_public': _parse_bool(raw.get('is_public'), True),
+        'is_ethereal': _parse_bool(raw.get('is_ethereal'), False),
+        'is_ordered': _parse_bool(raw.get('is_ordered'), False),
+        'show_numbering': _parse_bool(raw.get('show_numbering'), False),
+        # Only thumbnails already in our object storage; never arbitrary URLs
+        'thumbnail_url': thumbnail_url if isinstance(thumbnail_url, str) and thumbnail_url.startswith('/objects/') else '',
+        'empty_sections': [str(section) for section in empty_sections],
+        'items': cleaned_items
+    }
+
+
+class ImportReport:
+    """Collects skipped records while import_lists consumes `records()`."""
+
+    def __init__(self, parsed):
+        self.parsed = parsed
+        self.skipped = 0
+        self.errors = []
+
+    def records(self):
+        for line_no, raw in self.parsed:
+            try:
+                if isinstance(raw, ImportRecordError):
+                    raise raw
+                yield clean_record(raw)
+            except ImportRecordError as e:
+                self.skipped += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append(f'line {line_no}: {e}')
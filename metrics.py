@@ -0,0 +1,142 @@
+"""Prometheus metrics for request latency, MongoDB commands, object storage and rate limiting.
+
+Off unless METRICS_ENABLED=true. When off nothing is registered: no request
+hooks, no command listener and no /metrics route, and `storage_timer` is a
+shared no-op context manager. Commands are recorded by request_stats,
+shared with the query diagnostics.
+
+With several gunicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory so /metrics aggregates every worker instead of the one that
+answered the scrape. Leave it unset otherwise: prometheus_client treats
+any value, even an empty one, as multiprocess mode. gunicorn.conf.py
+marks exited workers dead.
+"""
+from contextlib import nullcontext
+from flask import Response, jsonify, request
+from flask_login import current_user
+from request_stats import track_commands
+import hmac
+import os
+import time
+
+ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+# Encoding commands and replies to measure them costs time proportional
+# to their size, so byte counts are a separate opt-in
+MONGO_BYTES_ENABLED = ENABLED and os.getenv('METRICS_MONGO_BYTES', 'false').lower() == 'true'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_disabled_timer = nullcontext()
+
+if ENABLED:
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+    from prometheus_client import multiprocess
+
+    REQUEST_LATENCY = Histogram(
+        'listpoint_http_request_duration_seconds', 'Time spent serving HTTP requests',
+        ['endpoint', 'method'], buckets=LATENCY_BUCKETS
+    )
+    REQUESTS = Counter(
+        'listpoint_http_requests_total', 'HTTP requests served',
+        ['endpoint', 'method', 'status']
+    )
+    REQUEST_MONGO_COMMANDS = Histogram(
+        'listpoint_http_request_mongo_commands', 'MongoDB commands issued per HTTP request',
+        ['endpoint'], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+    )
+    MONGO_COMMANDS = Counter(
+        'listpoint_mongo_commands_total', 'MongoDB commands issued',
+        ['endpoint', 'command', 'outcome']
+    )
+    MONGO_LATENCY = Histogram(
+        'listpoint_mongo_command_duration_seconds', 'MongoDB command round-trip time',
+        ['endpoint', 'command'], buckets=LATENCY_BUCKETS
+    )
+    MONGO_BYTES = Counter(
+        'listpoint_mongo_command_bytes_total', 'BSON bytes of MongoDB commands and replies',
+        ['endpoint', 'command', 'direction']
+    )
+    STORAGE_LATENCY = Histogram(
+        'listpoint_storage_operation_duration_seconds', 'Object storage call time',
+        ['operation'], buckets=LATENCY_BUCKETS
+    )
+    STORAGE_ERRORS = Counter(
+        'listpoint_storage_errors_total', 'Object storage calls that raised',
+        ['operation']
+    )
+    THROTTLED = Counter(
+        'listpoint_rate_limited_requests_total', 'Requests answered 429 by the rate limiter',
+        ['endpoint']
+    )
+
+    def _record_mongo_command(command):
+        MONGO_COMMANDS.labels(command.endpoint, command.name, command.outcome).inc()
+        MONGO_LATENCY.labels(command.endpoint, command.name).observe(command.duration_ms / 1000)
+        if MONGO_BYTES_ENABLED:
+            MONGO_BYTES.labels(command.endpoint, command.name, 'sent').inc(command.bytes_sent)
+            if command.bytes_received is not None:
+                MONGO_BYTES.labels(command.endpoint, command.name, 'received').inc(command.bytes_received)
+
+    def _record_request(stats, response):
+        if stats.endpoint == 'metrics':
+            return
+        REQUEST_LATENCY.labels(stats.endpoint, request.method).observe(time.perf_counter() - stats.started)
+        REQUESTS.labels(stats.endpoint, request.method, str(response.status_code)).inc()
+        REQUEST_MONGO_COMMANDS.labels(stats.endpoint).observe(len(stats.recorder.commands))
+
+    class _StorageTimer:
+        __slots__ = ('operation', 'started')
+
+        def __init__(self, operation):
+            self.operation = operation
+
+        def __enter__(self):
+            self.started = time.perf_counter()
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            STORAGE_LATENCY.labels(self.operation).observe(time.perf_counter() - self.started)
+            if exc_type is not None:
+                STORAGE_ERRORS.labels(self.operation).inc()
+            return False
+
+
+def storage_timer(operation):
+    """Context manager timing one object storage call."""
+    if not ENABLED:
+        return _disabled_timer
+    return _StorageTimer(operation)
+
+
+def count_throttled(endpoint):
+    if ENABLED:
+        THROTTLED.labels(endpoint).inc()
+
+
+def _authorized():
+    token = os.getenv('METRICS_TOKEN')
+    header = request.headers.get('Authorization', '')
+    if token and header.startswith('Bearer ') and hmac.compare_digest(header[len('Bearer '):], token):
+        return True
+    return current_user.is_authenticated and current_user.is_admin
+
+
+def init_metrics(app):
+    """Subscribe to the shared command recorder and add the /metrics route.
+
+    Call before the other request hooks so timing covers them, and before
+    the first MongoClient is created so the recorder's listener applies.
+    """
+    if not ENABLED:
+        return
+    track_commands(app, sizes=MONGO_BYTES_ENABLED, on_command=_record_mongo_command, on_response=_record_request)
+
+    @app.route('/metrics')
+    def metrics():
+        if not _authorized():
+            return jsonify({'success': False, 'message': 'Access denied'}), 403
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+        return Response(generate_latest(), content_type=CONTENT_TYPE_LATEST)
@@ -1,5 +1,6 @@
 from replit.object_storage import Client
 from flask import Response
+from metrics import storage_timer
 import uuid
 
 class ObjectStorageService:
@@ -16,7 +17,8 @@ class ObjectStorageService:
         file_data = file_obj.read()
         
         # Upload using Replit's SDK
-        self.client.upload_from_bytes(object_name, file_data)
+        with storage_timer('upload'):
+            self.client.upload_from_bytes(object_name, file_data)
         
         return f'/objects/{object_id}{file_extension}'
     
@@ -33,11 +35,14 @@ class ObjectStorageService:
         object_name = f"thumbnails/{entity_id}"
         
         # Check if file exists
-        if not self.client.exists(object_name):
+        with storage_timer('exists'):
+            exists = self.client.exists(object_name)
+        if not exists:
             raise FileNotFoundError("Object not found")
         
         # Return the object data
-        return self.client.download_as_bytes(object_name)
+        with storage_timer('download'):
+            return self.client.download_as_bytes(object_name)
     
     def download_object(self, file_data, response):
         """Stream an object to a Flask response."""
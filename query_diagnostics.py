@@ -0,0 +1,167 @@
+"""N+1 and slow-query detector for development and staging.
+
+With QUERY_DIAGNOSTICS=true every MongoDB command issued while serving a
+request is recorded with its query shape (the filter with values blanked
+out), duration and the app.py line that caused it. After the request a
+one-line report is logged; repeated identical shapes (N+1 loops) and slow
+commands are logged as warnings with their call sites.
+
+    QUERY_DIAGNOSTICS=true
+    QUERY_REPEAT_THRESHOLD=3     # same shape this many times is flagged
+    SLOW_QUERY_MS=100
+
+Tests can assert a route's budget (with QUERY_DIAGNOSTICS=true set before
+the app is imported, so the listener is on the client):
+
+    with query_budget(max_commands=4, max_repeats=1):
+        client.get('/api/explore')
+"""
+from collections import Counter
+from flask import request
+from request_stats import CommandRecorder, pop_recorder, push_recorder, track_commands
+import logging
+import os
+import sys
+
+ENABLED = os.getenv('QUERY_DIAGNOSTICS', 'false').lower() == 'true'
+REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', 3))
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Frames in these files are plumbing, not the call site worth reporting
+SKIPPED_FILES = {os.path.join(ROOT, 'database.py'), os.path.join(ROOT, 'request_stats.py'), os.path.abspath(__file__)}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def repeated(recorder, threshold):
+    """(count, example command) for each shape issued at least `threshold` times."""
+    counts = Counter(command.shape for command in recorder.commands)
+    examples = {}
+    for command in recorder.commands:
+        examples.setdefault(command.shape, command)
+    return [(count, examples[shape]) for shape, count in counts.most_common() if count >= threshold]
+
+
+def slow(recorder, limit_ms):
+    return [command for command in recorder.commands if command.duration_ms is not None and command.duration_ms >= limit_ms]
+
+
+def report(recorder, label, repeat_threshold, slow_ms):
+    """Summary line plus one line per N+1 shape and slow command."""
+    lines = [f'{label}: {len(recorder.commands)} commands, {recorder.total_ms():.1f} ms in MongoDB']
+    for count, command in repeated(recorder, repeat_threshold):
+        lines.append(f'  N+1 {count}x {command.shape} at {command.call_site}')
+    for command in slow(recorder, slow_ms):
+        lines.append(f'  slow {command.duration_ms:.1f} ms {command.shape} at {command.call_site}')
+    return lines
+
+
+def query_shape(command_name, command):
+    """`find users {_id: ?}`-style description with every literal value blanked."""
+    collection = command.get('collection') if command_name == 'getMore' else command.get(command_name)
+    if command_name == 'find':
+        shape = _blank(command.get('filter', {}))
+    elif command_name == 'aggregate':
+        shape = _blank(command.get('pipeline', []))
+    elif command_name in ('update', 'delete'):
+        statements = command.get('updates' if command_name == 'update' else 'deletes', [])
+        shape = _blank(statements[0].get('q', {})) if statements else {}
+    elif command_name in ('findAndModify', 'count', 'distinct'):
+        shape = _blank(command.get('query', {}))
+    else:
+        shape = None
+    if shape is None:
+        return f'{command_name} {collection}'
+    return f'{command_name} {collection} {_format(shape)}'
+
+
+def _blank(value):
+    if isinstance(value, dict):
+        return {key: _blank(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # $in lists of any length are the same query shape
+        return [_blank(value[0])] if value else []
+    return '?'
+
+
+def _format(shape):
+    if isinstance(shape, dict):
+        return '{' + ', '.join(f'{key}: {_format(item)}' for key, item in shape.items()) + '}'
+    if isinstance(shape, list):
+        return '[' + ', '.join(_format(item) for item in shape) + ']'
+    return shape
+
+
+def call_site():
+    """First frame in this repo outside database.py, plus the Database method it called."""
+    frame = sys._getframe(2)
+    db_method = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(ROOT) and 'site-packages' not in filename:
+            if filename in SKIPPED_FILES:
+                if filename.endswith('database.py'):
+                    db_method = frame.f_code.co_name
+            else:
+                site = f'{os.path.relpath(filename, ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}'
+                return f'{site} (db.{db_method})' if db_method else site
+        frame = frame.f_back
+    return 'unknown'
+
+
+def describe_command(event):
+    return query_shape(event.command_name, event.command), call_site()
+
+
+class query_budget:
+    """Fail with QueryBudgetExceeded when the block issues too many commands.
+
+    `max_commands` caps the total; `max_repeats` caps how often one query
+    shape may be issued, which catches N+1 loops regardless of page size.
+    """
+
+    def __init__(self, max_commands=None, max_repeats=None):
+        self.max_commands = max_commands
+        self.max_repeats = max_repeats
+        self.recorder = CommandRecorder()
+
+    def __enter__(self):
+        if not ENABLED:
+            raise RuntimeError('query_budget needs QUERY_DIAGNOSTICS=true before the app is imported')
+        self._token = push_recorder(self.recorder)
+        return self.recorder
+
+    def __exit__(self, exc_type, exc, tb):
+        pop_recorder(self._token)
+        if exc_type is not None:
+            return False
+        problems = []
+        if self.max_commands is not None and len(self.recorder.commands) > self.max_commands:
+            problems.append(f'{len(self.recorder.commands)} commands (budget {self.max_commands})')
+        if self.max_repeats is not None:
+            for count, command in repeated(self.recorder, self.max_repeats + 1):
+                problems.append(f'{count}x {command.shape} at {command.call_site} (budget {self.max_repeats})')
+        if problems:
+            lines = report(self.recorder, 'query budget', REPEAT_THRESHOLD, SLOW_QUERY_MS)
+            raise QueryBudgetExceeded('Query budget exceeded: ' + '; '.join(problems) + '\n' + '\n'.join(lines))
+        return False
+
+
+def init_query_diagnostics(app):
+    """Log each request's command report from the shared recorder."""
+    if not ENABLED:
+        return
+    if app.logger.level == logging.NOTSET:
+        app.logger.setLevel(logging.INFO)
+
+    def report_queries(stats, error):
+        lines = report(stats.recorder, f'{request.method} {request.path} ({stats.endpoint})', REPEAT_THRESHOLD, SLOW_QUERY_MS)
+        if len(lines) > 1:
+            app.logger.warning('\n'.join(lines))
+        else:
+            app.logger.info(lines[0])
+
+    track_commands(app, describe=describe_command, on_teardown=report_queries)
@@ -0,0 +1,234 @@
+"""Token-bucket rate limits for the endpoints called on every keystroke.
+
+`/api/autocomplete`, `/api/search_users` and `/api/explore?q=` each get a
+bucket per logged-in user (or per IP for anonymous callers) that holds up
+to `burst` requests and refills at `rate` per second. An empty bucket
+answers 429 with `Retry-After`. Plain explore pages without `q` are not
+limited.
+
+    RATE_LIMIT_ENABLED=true
+    RATE_LIMIT_BACKEND=memory            # or mongo, shared by every worker
+    RATE_LIMIT_AUTOCOMPLETE=20/5         # burst/refill per second
+    RATE_LIMIT_SEARCH_USERS=10/2
+    RATE_LIMIT_EXPLORE_SEARCH=30/5
+    TRUSTED_PROXY_HOPS=1                 # proxies that append X-Forwarded-For
+
+The memory backend keeps buckets in the process, so with N workers a
+client gets up to N times the budget. The mongo backend keeps them in the
+`rate_limits` collection and costs one findAndModify per limited request.
+If that command fails the request is let through.
+
+Anonymous callers are keyed on the address TRUSTED_PROXY_HOPS entries
+from the end of X-Forwarded-For (werkzeug's ProxyFix does the same for
+Flask's remote_addr). Set it to 0 when clients connect directly, or they
+can pick their own key by sending the header.
+"""
+from flask import jsonify, request
+from flask_login import current_user
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from metrics import count_throttled
+from collections import OrderedDict
+import math
+import os
+import threading
+import time
+
+ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory').lower()
+MAX_BUCKETS = 100000
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', 1))
+
+
+def _budget(name, default):
+    burst, _, rate = os.getenv(name, default).partition('/')
+    return int(burst), float(rate)
+
+
+# Flask endpoint -> (burst, tokens refilled per second)
+BUDGETS = {
+    'autocomplete': _budget('RATE_LIMIT_AUTOCOMPLETE', '20/5'),
+    'search_users': _budget('RATE_LIMIT_SEARCH_USERS', '10/2'),
+    'api_explore': _budget('RATE_LIMIT_EXPLORE_SEARCH', '30/5')
+}
+
+
+class MemoryBuckets:
+    """Buckets in this process, as [tokens, last refill] lists keyed by
+    (endpoint, client) and kept in least recently used order.
+
+    Past `max_buckets` the least recently used bucket is dropped, which
+    at worst hands that client a full bucket early.
+    """
+
+    shared = False
+
+    def __init__(self, refill_horizon, max_buckets=MAX_BUCKETS):
+        # A bucket untouched this long is full again, the same as no bucket
+        self.refill_horizon = refill_horizon
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, rate):
+        """Seconds until a token is available, or 0 after taking one."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._evict(now)
+                self._buckets[key] = [burst - 1, now]
+                return 0
+            self._buckets.move_to_end(key)
+            tokens = bucket[0] + (now - bucket[1]) * rate
+            if tokens > burst:
+                tokens = burst
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return 0
+            bucket[0] = tokens
+        return (1 - tokens) / rate
+
+    def _evict(self, now):
+        # Idle buckets sit at the front, so this stops at the first busy one
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket[1] < self.refill_horizon and len(self._buckets) < self.max_buckets:
+                break
+            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class MongoBuckets:
+    """Buckets in the `rate_limits` collection, refilled with the server's clock."""
+
+    shared = True
+
+    def __init__(self, db):
+        self.db = db
+
+    def take(self, key, burst, rate):
+        endpoint, client = key
+        try:
+            bucket = self.db.db.rate_limits.find_one_and_update(
+                {'_id': f'{endpoint}:{client}'},
+                [
+                    {'$set': {'tokens': {'$min': [burst, {'$add': [
+                        {'$ifNull': ['$tokens', burst]},
+                        {'$multiply': [
+                            {'$divide': [{'$subtract': ['$$NOW', {'$ifNull': ['$refilled_at', '$$NOW']}]}, 1000]},
+                            rate
+                        ]}
+                    ]}]}}},
+                    {'$set': {
+                        'allowed': {'$gte': ['$tokens', 1]},
+                        'tokens': {'$cond': [{'$gte': ['$tokens', 1]}, {'$subtract': ['$tokens', 1]}, '$tokens']},
+                        'refilled_at': '$$NOW',
+                        # Full again by then; the TTL index removes it
+                        'expires_at': {'$add': ['$$NOW', int(burst / rate * 1000)]}
+                    }}
+                ],
+                projection={'allowed': 1, 'tokens': 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except PyMongoError:
+            return 0
+        if bucket['allowed']:
+            return 0
+        return (1 - bucket['tokens']) / rate
+
+    def __len__(self):
+        return self.db.db.rate_limits.estimated_document_count()
+
+
+class RateLimiter:
+    def __init__(self, buckets, budgets=BUDGETS):
+        self.buckets = buckets
+        self.budgets = budgets
+        self.throttled = dict.fromkeys(budgets, 0)
+        self._lock = threading.Lock()
+
+    def check(self, endpoint, client):
+        """Seconds the client must wait before calling `endpoint` again, or 0."""
+        burst, rate = self.budgets[endpoint]
+        retry_after = self.buckets.take((endpoint, client), burst, rate)
+        if retry_after:
+            with self._lock:
+                self.throttled[endpoint] += 1
+            count_throttled(endpoint)
+        return retry_after
+
+    def stats(self):
+        with self._lock:
+            throttled = dict(self.throttled)
+        return {
+            'backend': 'mongo' if self.buckets.shared else 'memory',
+            'buckets': len(self.buckets),
+            'throttled': throttled
+        }
+
+
+# Body of the 429 answer, from Flask and from the ASGI routes
+TOO_MANY_REQUESTS = {'success': False, 'message': 'Too many requests, slow down'}
+
+
+def client_key(user_id, address):
+    """The bucket owner: the logged-in user, or else the caller's address."""
+    return f'u:{user_id}' if user_id else f'ip:{address}'
+
+
+def limited_endpoint(endpoint, search_query):
+    """The budget a request is charged to, if any."""
+    if endpoint == 'api_explore' and not search_query:
+        return None
+    return endpoint if endpoint in BUDGETS else None
+
+
+def forwarded_client(remote_addr, forwarded_for):
+    """The client's address as ProxyFix would pick it, for the ASGI routes."""
+    if TRUSTED_PROXY_HOPS and forwarded_for:
+        hops = [addr.strip() for addr in forwarded_for.split(',')]
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            return hops[-TRUSTED_PROXY_HOPS]
+    return remote_addr
+
+
+def retry_after_header(retry_after):
+    return str(max(1, math.ceil(retry_after)))
+
+
+def make_rate_limiter(db):
+    if BACKEND == 'mongo':
+        return RateLimiter(MongoBuckets(db))
+    return RateLimiter(MemoryBuckets(max(burst / rate for burst, rate in BUDGETS.values())))
+
+
+def init_rate_limits(app, db):
+    """Answer 429 once a client's bucket for a limited endpoint is empty.
+
+    Returns the limiter (None when disabled) so the ASGI routes and the
+    admin stats can share it.
+    """
+    if not ENABLED:
+        return None
+    limiter = make_rate_limiter(db)
+
+    @app.before_request
+    def check_rate_limit():
+        endpoint = limited_endpoint(request.endpoint, request.args.get('q'))
+        if endpoint is None:
+            return None
+        user_id = current_user.id if current_user.is_authenticated else None
+        retry_after = limiter.check(endpoint, client_key(user_id, request.remote_addr))
+        if not retry_after:
+            return None
+        response = jsonify(TOO_MANY_REQUESTS)
+        response.status_code = 429
+        response.headers['Retry-After'] = retry_after_header(retry_after)
+        return response
+
+    return limiter
@@ -0,0 +1,182 @@
+"""The MongoDB commands each request issues, recorded once for every consumer.
+
+A single pymongo CommandListener and one set of request hooks feed the
+`X-Mongo-Commands` header, the Prometheus metrics (metrics.py) and the
+N+1/slow-query report (query_diagnostics.py). Each asks `track_commands` for what it needs:
+query shapes and call sites, byte counts, a callback per finished command
+or per finished request. Nothing is registered until one of them does.
+
+pymongo calls command listeners on the thread that runs the command, so
+a context variable set in before_request follows the request. Commands
+issued outside a request (e.g. by the Stripe event worker thread) are
+attributed to 'background'.
+"""
+from flask import request
+from pymongo import monitoring
+import bson
+import contextvars
+import os
+import time
+
+# The request being served, as a RequestStats; None outside a request
+_request = contextvars.ContextVar('request_stats', default=None)
+# Extra recorders for the commands issued in this context (query_budget)
+_recorders = contextvars.ContextVar('command_recorders', default=())
+
+
+class RecordedCommand:
+    __slots__ = ('name', 'endpoint', 'shape', 'call_site', 'duration_ms', 'outcome', 'bytes_sent', 'bytes_received')
+
+    def __init__(self, name, endpoint):
+        self.name = name
+        self.endpoint = endpoint
+        self.shape = None
+        self.call_site = None
+        self.duration_ms = None
+        self.outcome = None
+        self.bytes_sent = None
+        self.bytes_received = None
+
+
+class CommandRecorder:
+    """Commands in the order they were started; durations fill in as they finish."""
+
+    def __init__(self):
+        self.commands = []
+
+    def total_ms(self):
+        return sum(command.duration_ms or 0 for command in self.commands)
+
+
+class RequestStats:
+    __slots__ = ('endpoint', 'started', 'recorder')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.recorder = CommandRecorder()
+
+
+class _Tracking:
+    def __init__(self):
+        self.describe = None
+        self.sizes = False
+        self.on_command = []
+        self.on_response = []
+        self.on_teardown = []
+        self.listener = None
+        self.apps = set()
+
+
+_tracking = _Tracking()
+
+
+class RequestCommandListener(monitoring.CommandListener):
+    def __init__(self):
+        # Keyed by connection and request id, which pair started with finished
+        self._pending = {}
+
+    def started(self, event):
+        stats = _request.get()
+        command = RecordedCommand(event.command_name, stats.endpoint if stats is not None else 'background')
+        if _tracking.describe is not None:
+            command.shape, command.call_site = _tracking.describe(event)
+        if _tracking.sizes:
+            command.bytes_sent = len(bson.encode(event.command))
+        if stats is not None:
+            stats.recorder.commands.append(command)
+        for recorder in _recorders.get():
+            recorder.commands.append(command)
+        self._pending[(event.connection_id, event.request_id)] = command
+
+    def succeeded(self, event):
+        command = self._finished(event, 'ok')
+        if command is not None and _tracking.sizes:
+            command.bytes_received = len(bson.encode(event.reply))
+        self._notify(command)
+
+    def failed(self, event):
+        self._notify(self._finished(event, 'error'))
+
+    def _finished(self, event, outcome):
+        command = self._pending.pop((event.connection_id, event.request_id), None)
+        if command is not None:
+            command.duration_ms = event.duration_micros / 1000
+            command.outcome = outcome
+        return command
+
+    def _notify(self, command):
+        if command is not None:
+            for callback in _tracking.on_command:
+                callback(command)
+
+
+def track_commands(app, describe=None, sizes=False, on_command=None, on_response=None, on_teardown=None):
+    """Record commands and subscribe to them.
+
+    `describe(event)` returns a command's (shape, call_site); `sizes`
+    measures BSON bytes both ways. `on_command(command)` runs as each
+    command finishes, `on_response(stats, response)` after each request
+    and `on_teardown(stats, error)` at its teardown. Must be called before
+    the first MongoClient is created so the listener applies. The first
+    caller's hooks run before any registered later.
+    """
+    if describe is not None:
+        _tracking.describe = describe
+    _tracking.sizes = _tracking.sizes or sizes
+    for callbacks, callback in ((_tracking.on_command, on_command), (_tracking.on_response, on_response), (_tracking.on_teardown, on_teardown)):
+        if callback is not None:
+            callbacks.append(callback)
+
+    if _tracking.listener is None:
+        _tracking.listener = RequestCommandListener()
+        monitoring.register(_tracking.listener)
+
+    if app in _tracking.apps:
+        return
+    _tracking.apps.add(app)
+
+    @app.before_request
+    def start_request_stats():
+        _request.set(RequestStats(request.endpoint or 'unmatched'))
+
+    @app.after_request
+    def report_request_stats(response):
+        stats = _request.get()
+        if stats is not None:
+            for callback in _tracking.on_response:
+                callback(stats, response)
+        return response
+
+    @app.teardown_request
+    def finish_request_stats(error=None):
+        stats = _request.get()
+        if stats is None:
+            return
+        _request.set(None)
+        for callback in _tracking.on_teardown:
+            callback(stats, error)
+
+
+def push_recorder(recorder):
+    """Also record this context's commands into `recorder`; returns a token for pop_recorder."""
+    return _recorders.set(_recorders.get() + (recorder,))
+
+
+def pop_recorder(token):
+    _recorders.reset(token)
+
+
+def init_request_stats(app):
+    """Report each response's MongoDB command count in `X-Mongo-Commands`.
+
+    Off unless REQUEST_STATS_HEADER=true; the load test turns it on. Must
+    run before the first MongoClient is created so the listener applies.
+    """
+    if os.getenv('REQUEST_STATS_HEADER', 'false').lower() != 'true':
+        return
+
+    def report_command_count(stats, response):
+        response.headers['X-Mongo-Commands'] = str(len(stats.recorder.commands))
+
+    track_commands(app, on_response=report_command_count)
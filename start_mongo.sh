@@ -6,4 +6,7 @@ mongod --dbpath=data/db --bind_ip=127.0.0.1 --port=27017 --fork --logpath=data/m
 
 sleep 2
 
-gunicorn --bind 0.0.0.0:5000 --workers 2 --timeout 120 app:app
+python asset_pipeline.py
+flask --app app create-indexes
+
+MONGO_AUTO_INDEX=false gunicorn --bind 0.0.0.0:5000 --workers 2 --timeout 120 app:app
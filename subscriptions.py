@@ -0,0 +1,119 @@
+from datetime import datetime
+import stripe
+
+ACTIVE_STATUSES = ('active', 'trialing')
+ENDED_STATUSES = ('canceled', 'incomplete_expired')
+
+SUBSCRIPTION_EVENTS = (
+    'customer.subscription.created',
+    'customer.subscription.updated',
+    'customer.subscription.deleted',
+)
+INVOICE_EVENTS = (
+    'invoice.paid',
+    'invoice.payment_succeeded',
+    'invoice.payment_failed',
+)
+
+
+def _field(obj, name):
+    try:
+        return obj[name]
+    except (KeyError, TypeError):
+        return None
+
+
+def subscription_state(stripe_subscription):
+    """Map a Stripe subscription to the fields mirrored on the user document."""
+    status = _field(stripe_subscription, 'status')
+    period_end = _field(stripe_subscription, 'current_period_end')
+    if period_end is None:
+        # Newer API versions report billing periods per subscription item
+        items = _field(_field(stripe_subscription, 'items'), 'data') or []
+        if items:
+            period_end = _field(items[0], 'current_period_end')
+
+    return {
+        'stripe_subscription_id': _field(stripe_subscription, 'id'),
+        'status': status,
+        'current_period_end': datetime.utcfromtimestamp(period_end) if period_end else None,
+        'cancel_at_period_end': bool(_field(stripe_subscription, 'cancel_at_period_end')),
+        'is_ad_free': status in ACTIVE_STATUSES,
+        'synced_at': datetime.utcnow()
+    }
+
+
+def sync_subscription(db, user_id, stripe_subscription):
+    state = subscription_state(stripe_subscription)
+    if state['status'] in ENDED_STATUSES:
+        db.cancel_user_subscription(user_id)
+    else:
+        db.sync_user_subscription(user_id, **state)
+    return state
+
+
+def _invoice_subscription_id(invoice):
+    subscription_id = _field(invoice, 'subscription')
+    if subscription_id is None:
+        details = _field(_field(invoice, 'parent'), 'subscription_details')
+        subscription_id = _field(details, 'subscription')
+    if subscription_id is not None and not isinstance(subscription_id, str):
+        subscription_id = _field(subscription_id, 'id')
+    return subscription_id
+
+
+def apply_subscription_event(db, event, stripe_client=stripe):
+    """Mirror a verified Stripe webhook event onto the local user document.
+
+    Returns True when the event was relevant and a user was updated.
+    """
+    event_type = event['type']
+    if event_type not in SUBSCRIPTION_EVENTS and event_type not in INVOICE_EVENTS:
+        return False
+
+    obj = event['data']['object']
+    user_dict = db.get_user_by_stripe_customer_id(_field(obj, 'customer'))
+    if not user_dict:
+        return False
+    user_id = str(user_dict['_id'])
+
+    if event_type == 'customer.subscription.deleted':
+        db.cancel_user_subscription(user_id)
+        return True
+
+    if event_type in SUBSCRIPTION_EVENTS:
+        sync_subscription(db, user_id, obj)
+        return True
+
+    # Invoices only reference the subscription, whose status they change
+    subscription_id = _invoice_subscription_id(obj)
+    if not subscription_id:
+        return False
+    sync_subscription(db, user_id, stripe_client.Subscription.retrieve(subscription_id))
+    return True
+
+
+def reconcile_subscriptions(db, stripe_client=stripe):
+    """Re-read every locally active subscription from Stripe.
+
+    Catches anything a missed or failed webhook delivery left stale. Meant to
+    be run periodically via `flask --app app reconcile-subscriptions`.
+    """
+    synced = 0
+    cancelled = 0
+    for user_dict in db.get_subscribed_users():
+        user_id = str(user_dict['_id'])
+        subscription_id = user_dict['subscription']['stripe_subscription_id']
+        try:
+            stripe_subscription = stripe_client.Subscription.retrieve(subscription_id)
+        except stripe.error.InvalidRequestError:
+            db.cancel_user_subscription(user_id)
+            cancelled += 1
+            continue
+
+        state = sync_subscription(db, user_id, stripe_subscription)
+        if state['status'] in ENDED_STATUSES:
+            cancelled += 1
+        else:
+            synced += 1
+    return synced, cancelled
@@ -0,0 +1,11 @@
+module.exports = {
+    darkMode: 'class',
+    content: [
+        './templates/**/*.html',
+        './assets/js/**/*.js'
+    ],
+    theme: {
+        extend: {}
+    },
+    plugins: []
+}
@@ -0,0 +1,103 @@
+"""migrate-checked-state on check lists written to after the deploy.
+
+_compact_checked_state only reads the list document, so the update it
+returns is applied here to a plain dict instead of MongoDB.
+"""
+from copy import deepcopy
+
+from bson import ObjectId
+
+from database import Database
+
+
+def apply_update(doc, update):
+    doc = deepcopy(doc)
+    doc.update(update.get('$set', {}))
+    for field in update.get('$unset', {}):
+        doc.pop(field, None)
+    for field, spec in update.get('$addToSet', {}).items():
+        values = doc.setdefault(field, [])
+        values.extend(value for value in spec['$each'] if value not in values)
+    return doc
+
+
+def restore(doc):
+    """Database.restore_ethereal_list's update, applied to a dict."""
+    doc = deepcopy(doc)
+    doc.update({'checked_ids': [], 'hidden_ids': [], 'run_text': {}, 'run_edits': {}})
+    doc['items'] = [item for item in doc['items'] if not item.get('run_only')]
+    return doc
+
+
+def template(name, quantity=1, section=None):
+    item = {'_id': ObjectId(), 'text': name, 'quantity': quantity}
+    if section:
+        item['section'] = section
+    return item
+
+
+def legacy_check_list(originals, run):
+    return {'_id': ObjectId(), 'is_ethereal': True, 'original_items': originals, 'items': run}
+
+
+def run_view(db, doc):
+    return [(item['text'], item['quantity'], item.get('section'), item['checked']) for item in db.run_items(doc)]
+
+
+db = Database.__new__(Database)
+
+
+def test_untouched_list_folds_run_into_overlay():
+    bread, milk, eggs = template('Bread'), template('Milk', section='Dairy'), template('Eggs')
+    run = [
+        dict(bread, quantity=2, checked=True),
+        dict(milk, checked=False),
+        {'_id': ObjectId(), 'text': 'Jam', 'quantity': 1, 'checked': True}
+    ]
+    doc = legacy_check_list([bread, milk, eggs], run)
+
+    migrated = apply_update(doc, db._compact_checked_state(doc))
+
+    assert 'original_items' not in migrated
+    assert run_view(db, migrated) == [('Milk', 1, 'Dairy', False), ('Bread', 2, None, True), ('Jam', 1, None, True)]
+    assert run_view(db, restore(migrated)) == [
+        ('Milk', 1, 'Dairy', False), ('Bread', 1, None, False), ('Eggs', 1, None, False)
+    ]
+
+
+def test_list_restored_after_the_deploy_keeps_its_template():
+    bread, milk, eggs = template('Bread'), template('Milk'), template('Eggs')
+    # The run had dropped Eggs and renamed Milk before the deploy
+    run = [dict(bread, quantity=3, checked=True), dict(milk, text='Oat milk', checked=False)]
+    doc = legacy_check_list([bread, milk, eggs], run)
+    # After the deploy the list was restored (which wrote the overlay
+    # fields and cleared the flags) and then edited
+    doc = restore(doc)
+    for item in doc['items']:
+        item.pop('checked', None)
+    doc['run_text'] = {str(bread['_id']): 'Rye bread'}
+    doc['checked_ids'] = [milk['_id']]
+
+    migrated = apply_update(doc, db._compact_checked_state(doc))
+
+    assert 'original_items' not in migrated
+    assert run_view(db, migrated) == [('Oat milk', 1, None, True), ('Rye bread', 3, None, False)]
+    # Restoring brings back the real template, not the old run copy
+    assert run_view(db, restore(migrated)) == [('Bread', 1, None, False), ('Eggs', 1, None, False), ('Milk', 1, None, False)]
+
+
+def test_overlay_edits_made_after_the_deploy_carry_over():
+    bread, milk = template('Bread'), template('Milk')
+    doc = legacy_check_list([bread, milk], [dict(bread, checked=False), dict(milk, checked=True)])
+    jam = {'_id': ObjectId(), 'text': 'Jam', 'quantity': 1, 'run_only': True}
+    doc['items'].append(jam)
+    doc['hidden_ids'] = [bread['_id']]
+    doc['run_edits'] = {str(milk['_id']): {'section': 'Dairy', 'quantity': 2}}
+    doc['checked_ids'] = [jam['_id']]
+
+    migrated = apply_update(doc, db._compact_checked_state(doc))
+
+    assert 'original_items' not in migrated
+    assert migrated['hidden_ids'] == [bread['_id']]
+    assert run_view(db, migrated) == [('Milk', 2, 'Dairy', True), ('Jam', 1, None, True)]
+    assert run_view(db, restore(migrated)) == [('Bread', 1, None, False), ('Milk', 1, None, False)]
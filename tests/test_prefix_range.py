@@ -0,0 +1,14 @@
+from database import prefix_range
+
+
+def test_range_ends_at_the_next_string():
+    assert prefix_range('ab') == {'$gte': 'ab', '$lt': 'ac'}
+
+
+def test_range_skips_surrogates():
+    assert prefix_range('a퟿') == {'$gte': 'a퟿', '$lt': 'a'}
+
+
+def test_last_code_point_bumps_the_character_before_it():
+    assert prefix_range('a\U0010ffff') == {'$gte': 'a\U0010ffff', '$lt': 'b'}
+    assert prefix_range('\U0010ffff') == {'$gte': '\U0010ffff'}
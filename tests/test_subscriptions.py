@@ -0,0 +1,216 @@
+"""Subscription mirroring against an in-memory stand-in for Stripe.
+
+Events and subscriptions are built with the stripe library's own
+construct_from, so handlers see the same object types as in production,
+but nothing talks to the Stripe API or to MongoDB.
+"""
+from datetime import datetime
+
+import pytest
+import stripe
+
+from subscriptions import apply_subscription_event, reconcile_subscriptions, sync_subscription
+
+PERIOD_END = 1767225600  # 2026-01-01 00:00:00 UTC
+
+
+class FakeDatabase:
+    """The user-subscription methods of Database, over a dict of users."""
+
+    def __init__(self):
+        self.users = {}
+
+    def add_user(self, user_id, customer_id, subscription_id=None, is_ad_free=False):
+        self.users[user_id] = {'_id': user_id, 'subscription': {
+            'stripe_customer_id': customer_id,
+            'stripe_subscription_id': subscription_id,
+            'is_ad_free': is_ad_free
+        }}
+
+    def subscription(self, user_id):
+        return self.users[user_id]['subscription']
+
+    def get_user_by_stripe_customer_id(self, stripe_customer_id):
+        for user in self.users.values():
+            if user['subscription']['stripe_customer_id'] == stripe_customer_id:
+                return user
+        return None
+
+    def get_subscribed_users(self):
+        return [user for user in self.users.values() if user['subscription']['stripe_subscription_id'] is not None]
+
+    def sync_user_subscription(self, user_id, **fields):
+        self.users[user_id]['subscription'].update(fields)
+
+    def cancel_user_subscription(self, user_id):
+        self.users[user_id]['subscription'].update({
+            'is_ad_free': False,
+            'stripe_subscription_id': None,
+            'subscription_end': datetime.utcnow(),
+            'status': 'canceled',
+            'cancel_at_period_end': False,
+            'synced_at': datetime.utcnow()
+        })
+
+
+class FakeStripe:
+    """Stands in for the `stripe` module: Subscription.retrieve reads a dict."""
+
+    def __init__(self, subscriptions=()):
+        stand_in = self
+        self.subscriptions = {sub['id']: sub for sub in subscriptions}
+        self.retrieved = []
+
+        class Subscription:
+            @staticmethod
+            def retrieve(subscription_id):
+                stand_in.retrieved.append(subscription_id)
+                if subscription_id not in stand_in.subscriptions:
+                    raise stripe.error.InvalidRequestError(f'No such subscription: {subscription_id}', 'id')
+                return stand_in.subscriptions[subscription_id]
+
+        self.Subscription = Subscription
+
+
+def make_subscription(subscription_id, status, customer='cus_1', cancel_at_period_end=False):
+    # Billing periods on the item, as current API versions report them
+    return stripe.Subscription.construct_from({
+        'id': subscription_id,
+        'object': 'subscription',
+        'customer': customer,
+        'status': status,
+        'cancel_at_period_end': cancel_at_period_end,
+        'items': {'object': 'list', 'data': [
+            {'id': 'si_1', 'object': 'subscription_item', 'current_period_end': PERIOD_END}
+        ]}
+    }, 'sk_test')
+
+
+def make_event(event_type, obj):
+    return stripe.Event.construct_from({
+        'id': 'evt_1',
+        'object': 'event',
+        'type': event_type,
+        'data': {'object': obj}
+    }, 'sk_test')
+
+
+def subscription_event(event_type, subscription):
+    return make_event(event_type, subscription.to_dict())
+
+
+def invoice_event(event_type, subscription_id, customer='cus_1'):
+    return make_event(event_type, {
+        'id': 'in_1',
+        'object': 'invoice',
+        'customer': customer,
+        'parent': {'subscription_details': {'subscription': subscription_id}}
+    })
+
+
+@pytest.fixture
+def db():
+    db = FakeDatabase()
+    db.add_user('u1', 'cus_1')
+    return db
+
+
+def test_active_subscription_turns_ads_off(db):
+    event = subscription_event('customer.subscription.created', make_subscription('sub_1', 'active'))
+
+    assert apply_subscription_event(db, event, FakeStripe())
+    subscription = db.subscription('u1')
+    assert subscription['stripe_subscription_id'] == 'sub_1'
+    assert subscription['status'] == 'active'
+    assert subscription['is_ad_free'] is True
+    assert subscription['current_period_end'] == datetime(2026, 1, 1)
+
+
+@pytest.mark.parametrize('status', ['past_due', 'unpaid'])
+def test_unpaid_subscription_keeps_its_id_without_ad_free(db, status):
+    db.add_user('u1', 'cus_1', subscription_id='sub_1', is_ad_free=True)
+    event = subscription_event('customer.subscription.updated', make_subscription('sub_1', status))
+
+    assert apply_subscription_event(db, event, FakeStripe())
+    subscription = db.subscription('u1')
+    assert subscription['stripe_subscription_id'] == 'sub_1'
+    assert subscription['status'] == status
+    assert subscription['is_ad_free'] is False
+    # Still subscribed, so the reconcile job keeps checking it
+    assert db.get_subscribed_users() == [db.users['u1']]
+
+
+def test_cancel_at_period_end_stays_ad_free(db):
+    subscription = make_subscription('sub_1', 'active', cancel_at_period_end=True)
+
+    assert apply_subscription_event(db, subscription_event('customer.subscription.updated', subscription), FakeStripe())
+    assert db.subscription('u1')['cancel_at_period_end'] is True
+    assert db.subscription('u1')['is_ad_free'] is True
+
+
+def test_deleted_subscription_cancels(db):
+    db.add_user('u1', 'cus_1', subscription_id='sub_1', is_ad_free=True)
+    event = subscription_event('customer.subscription.deleted', make_subscription('sub_1', 'canceled'))
+
+    assert apply_subscription_event(db, event, FakeStripe())
+    assert db.subscription('u1')['stripe_subscription_id'] is None
+    assert db.subscription('u1')['is_ad_free'] is False
+
+
+def test_failed_invoice_reads_the_subscription_from_stripe(db):
+    db.add_user('u1', 'cus_1', subscription_id='sub_1', is_ad_free=True)
+    stand_in = FakeStripe([make_subscription('sub_1', 'past_due')])
+
+    assert apply_subscription_event(db, invoice_event('invoice.payment_failed', 'sub_1'), stand_in)
+    assert stand_in.retrieved == ['sub_1']
+    assert db.subscription('u1')['status'] == 'past_due'
+    assert db.subscription('u1')['stripe_subscription_id'] == 'sub_1'
+    assert db.subscription('u1')['is_ad_free'] is False
+
+
+def test_paid_invoice_restores_ad_free(db):
+    db.add_user('u1', 'cus_1', subscription_id='sub_1')
+    stand_in = FakeStripe([make_subscription('sub_1', 'active')])
+
+    assert apply_subscription_event(db, invoice_event('invoice.paid', 'sub_1'), stand_in)
+    assert db.subscription('u1')['is_ad_free'] is True
+
+
+def test_events_for_unknown_customers_and_types_are_ignored(db):
+    subscription = make_subscription('sub_9', 'active', customer='cus_unknown')
+    stand_in = FakeStripe()
+
+    assert not apply_subscription_event(db, subscription_event('customer.subscription.created', subscription), stand_in)
+    assert not apply_subscription_event(db, make_event('charge.refunded', {'id': 'ch_1', 'object': 'charge', 'customer': 'cus_1'}), stand_in)
+    assert db.subscription('u1') == {'stripe_customer_id': 'cus_1', 'stripe_subscription_id': None, 'is_ad_free': False}
+
+
+def test_sync_cancels_expired_subscriptions(db):
+    db.add_user('u1', 'cus_1', subscription_id='sub_1', is_ad_free=True)
+
+    state = sync_subscription(db, 'u1', make_subscription('sub_1', 'incomplete_expired'))
+    assert state['is_ad_free'] is False
+    assert db.subscription('u1')['stripe_subscription_id'] is None
+
+
+def test_reconcile_repairs_what_webhooks_missed():
+    db = FakeDatabase()
+    db.add_user('active', 'cus_a', subscription_id='sub_a', is_ad_free=True)
+    db.add_user('lapsed', 'cus_b', subscription_id='sub_b', is_ad_free=True)
+    db.add_user('ended', 'cus_c', subscription_id='sub_c', is_ad_free=True)
+    db.add_user('gone', 'cus_d', subscription_id='sub_d', is_ad_free=True)
+    db.add_user('never', 'cus_e')
+    stand_in = FakeStripe([
+        make_subscription('sub_a', 'active', customer='cus_a'),
+        make_subscription('sub_b', 'unpaid', customer='cus_b'),
+        make_subscription('sub_c', 'canceled', customer='cus_c')
+    ])
+
+    assert reconcile_subscriptions(db, stand_in) == (2, 2)
+    assert sorted(stand_in.retrieved) == ['sub_a', 'sub_b', 'sub_c', 'sub_d']
+    assert db.subscription('active')['is_ad_free'] is True
+    assert db.subscription('lapsed')['stripe_subscription_id'] == 'sub_b'
+    assert db.subscription('lapsed')['is_ad_free'] is False
+    for user_id in ('ended', 'gone'):
+        assert db.subscription(user_id)['stripe_subscription_id'] is None
+        assert db.subscription(user_id)['is_ad_free'] is False
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+import os
+import threading
+import traceback
+
+
+class StripeEventWorker:
+    """Processes Stripe webhook events from the `stripe_events` inbox.
+
+    The webhook only records verified events and returns, so retries caused
+    by slow processing stop. Events are claimed one at a time. Events for
+    the same customer are applied in `created` order, and failures are
+    retried with exponential backoff until `max_attempts`.
+    """
+
+    def __init__(self, db, handler, poll_interval=10, max_attempts=8, base_delay=5, max_delay=3600):
+        self.db = db
+        self.handler = handler
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        # Threads do not survive a fork, so each gunicorn worker starts its own
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='stripe-event-worker', daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def run_pending(self):
+        processed = 0
+        while True:
+            event_doc = self.db.claim_stripe_event()
+            if event_doc is None:
+                return processed
+            self._process(event_doc)
+            processed += 1
+
+    def _process(self, event_doc):
+        try:
+            self.handler(event_doc['payload'])
+        except Exception as e:
+            attempts = event_doc.get('attempts', 1)
+            delay = min(self.base_delay * 2 ** (attempts - 1), self.max_delay)
+            print(f"Error processing Stripe event {event_doc['_id']} (attempt {attempts}): {str(e)}")
+            traceback.print_exc()
+            self.db.fail_stripe_event(
+                event_doc['_id'],
+                error=str(e),
+                next_attempt_at=datetime.utcnow() + timedelta(seconds=delay),
+                give_up=attempts >= self.max_attempts
+            )
+        else:
+            self.db.complete_stripe_event(event_doc['_id'])
+
+    def _run(self):
+        while True:
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"Stripe event worker error: {str(e)}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()